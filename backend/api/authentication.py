@@ -0,0 +1,134 @@
+"""
+JWT authentication from signed role claims.
+
+Access tokens carry the user's role and profile ids (stamped at login and on
+every refresh, see ``role_claims``).  ``ClaimsJWTAuthentication`` turns them
+into a ``ClaimsUser``: id, username and role are read from the token, and the
+``User`` row is only loaded if a view touches anything else.  Role checks
+such as ``is_counsellor(request.user)`` therefore cost no query, where
+``hasattr(request.user, 'counsellorprofile')`` cost one per request.
+
+The claims are as fresh as the access token (``ACCESS_TOKEN_LIFETIME``): a
+new counselor profile, or a deactivated or deleted account, takes effect at
+the next refresh.  Tokens issued before the claims existed fall back to the
+regular database lookup.
+"""
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+ROLE_USER = "user"
+ROLE_COUNSELLOR = "counsellor"
+ROLE_DOCTOR = "doctor"
+ROLE_ADMIN = "admin"
+
+ROLE_CLAIM = "role"
+
+
+def role_claims(user_id) -> dict:
+    """Role and profile id claims for ``user_id``, in one query."""
+    row = get_user_model().objects.filter(id=user_id).values(
+        "username", "is_superuser", "profile__id", "counsellorprofile__id", "doctorprofile__id"
+    ).first()
+    if row is None:
+        return {}
+    if row["counsellorprofile__id"]:
+        role = ROLE_COUNSELLOR
+    elif row["doctorprofile__id"]:
+        role = ROLE_DOCTOR
+    elif row["is_superuser"]:
+        role = ROLE_ADMIN
+    else:
+        role = ROLE_USER
+    return {
+        ROLE_CLAIM: role,
+        "username": row["username"],
+        "user_profile_id": row["profile__id"],
+        "counsellor_profile_id": row["counsellorprofile__id"],
+    }
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Request principal built from a token's claims.
+
+    ``id``, ``pk``, ``username``, ``role`` and the profile ids come from the
+    token; every other attribute loads the ``User`` (one query, once).  It
+    passes for a ``User`` in ORM filters and relation assignments, like
+    Django's own lazy ``request.user``, but ``isinstance`` checks on it
+    (which the ORM makes for ``filter(user=request.user)``) load the User:
+    filter hot paths by ``user_id=request.user.id``.
+    """
+
+    def __init__(self, token):
+        # simplejwt stores the id as a string; compare like User.id does
+        user_id = get_user_model()._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+
+        def load():
+            user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            if user is None:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+            return user
+
+        super().__init__(load)
+        # Set through __dict__: LazyObject forwards attribute writes to the User
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            username=token.get("username", ""),
+            role=token[ROLE_CLAIM],
+            user_profile_id=token.get("user_profile_id"),
+            counsellor_profile_id=token.get("counsellor_profile_id"),
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    # LazyObject proxies these to the User, which would load it for every
+    # permission check (bool) or set membership (hash)
+    def __bool__(self):
+        return True
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __eq__(self, other):
+        if isinstance(other, ClaimsUser) or type(other) is get_user_model():
+            return self.pk == other.pk
+        return super().__eq__(other)
+
+
+def is_counsellor(user) -> bool:
+    """Whether ``user`` is a counselor; free for a ClaimsUser, one query for a User."""
+    if isinstance(user, ClaimsUser):
+        return user.role == ROLE_COUNSELLOR
+    return hasattr(user, "counsellorprofile")
+
+
+def token_role(token) -> str | None:
+    """The role claim of a validated token, or None for tokens issued without claims."""
+    return token.get(ROLE_CLAIM)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that authenticates from role claims without loading the user."""
+
+    def get_user(self, validated_token):
+        if token_role(validated_token) is None or api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
+
+
+class RoleClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh that re-stamps the role claims, so role changes reach new access tokens."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data["access"], verify=False)
+        for name, value in role_claims(access[api_settings.USER_ID_CLAIM]).items():
+            access[name] = value
+        data["access"] = str(access)
+        return data
@@ -1,12 +1,28 @@
 """
 WebSocket consumers for real-time chat functionality.
 """
+import asyncio
 import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import User
-from .models import Chat, ChatMessage
+from .authentication import ROLE_COUNSELLOR, ROLE_USER
+from .models import Chat, ChatMessage, CounsellorProfile, UpcomingSession
+from .utils.chat_summary import create_message
+from .utils.cost_ticker import check_low_balance, client_group_name
+from .utils.presence import presence
+from .utils.read_state import READ_DEBOUNCE_SECONDS, mark_read
+from .utils.replica import pin_to_primary
+from .utils.session_events import (
+    SESSION_EVENT_CHECKPOINT,
+    SESSION_EVENT_START,
+    SESSION_TIMER_CHECKPOINT_SECONDS,
+    broadcast_session_event,
+    session_group_name,
+    session_timer_frame,
+    session_timer_state,
+)
+from .utils.session_lifecycle import link_chat_session
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +30,16 @@ logger = logging.getLogger(__name__)
 class ChatConsumer(AsyncWebsocketConsumer):
     """WebSocket consumer for real-time chat messaging."""
 
+    # Frames relayed through the channel layer without touching the database
+    EPHEMERAL_FRAMES = ("typing", "presence", "ping")
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.chat = None  # Cache chat object to avoid repeated queries
+        # Newest message id reported by "read" frames but not yet written
+        self._pending_read = None
+        self._read_flush = None
+        self._low_balance_watch = None
 
     async def connect(self):
         """Handle WebSocket connection."""
@@ -62,18 +85,48 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             logger.info("WS CONNECT: Counselor %s joined counselor_queue group", self.user.username)
+        if self._cached_is_user_sender:
+            # Wallet frames go to the client only, never to the counsellor
+            await self.channel_layer.group_add(client_group_name(self.chat_id), self.channel_name)
 
         await self.accept()
         
         logger.info("WS CONNECT success: Joined group %s as channel %s (user=%s, is_user_sender=%s)",
                     self.room_group_name, self.channel_name, self.user.username, self._cached_is_user_sender)
 
+        presence.connect(self.user.id, self.channel_name, ROLE_COUNSELLOR if is_counselor else ROLE_USER)
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {"type": "chat.presence", "user_id": self.user.id, "online": True},
+        )
+        if self._cached_is_user_sender:
+            self._low_balance_watch = asyncio.create_task(self.watch_low_balance())
+
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection."""
+        # Write a debounced read watermark now rather than losing it
+        if self._read_flush is not None and not self._read_flush.done():
+            self._read_flush.cancel()
+            await self.flush_read()
+        if self._low_balance_watch is not None:
+            self._low_balance_watch.cancel()
+        if hasattr(self, 'user') and self.user.is_authenticated:
+            if presence.clear_typing(self.chat_id, self.user.id):
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    {"type": "chat.typing", "user_id": self.user.id, "username": self.user.username, "is_typing": False},
+                )
+            if presence.disconnect(self.user.id, self.channel_name):
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    {"type": "chat.presence", "user_id": self.user.id, "online": False},
+                )
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
+        if getattr(self, "_cached_is_user_sender", False):
+            await self.channel_layer.group_discard(client_group_name(self.chat_id), self.channel_name)
         
         # Also leave counselor_queue if counselor
         if hasattr(self, 'user') and self.user.is_authenticated:
@@ -91,10 +144,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def receive(self, text_data):
         """Handle message received from WebSocket."""
-        logger.info("WS RECEIVE: chat_id=%s, channel=%s, user=%s, raw_text=%s",
-                    self.chat_id, self.channel_name, self.user.username, text_data[:100])
         try:
             data = json.loads(text_data)
+            frame_type = data.get("type")
+            if frame_type in self.EPHEMERAL_FRAMES:
+                await getattr(self, f"receive_{frame_type}")(data)
+                return
+            logger.info("WS RECEIVE: chat_id=%s, channel=%s, user=%s, raw_text=%s",
+                        self.chat_id, self.channel_name, self.user.username, text_data[:100])
+            if frame_type == "read":
+                await self.queue_read(data.get("message_id"))
+                return
             message_text = data.get("message", "").strip()
             client_message_id = data.get("client_message_id")  # Extract client_message_id
 
@@ -111,7 +171,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
             # Validate chat exists and user has access
             if not self.chat:
-                logger.warning(f"Chat cache lost for chat {self.chat_id}, reloading...")
+                logger.warning("Chat cache lost for chat %s, reloading...", self.chat_id)
                 chat_data = await self.get_chat_and_check_access(self.user, self.chat_id)
                 if not chat_data:
                     await self.send(text_data=json.dumps({
@@ -144,37 +204,25 @@ class ChatConsumer(AsyncWebsocketConsumer):
             except ValueError as e:
                 # Handle chat expiration error specifically
                 error_msg = str(e)
-                logger.warning(f"Chat {self.chat_id} expired: {error_msg}")
+                logger.warning("Chat %s expired: %s", self.chat_id, error_msg)
                 await self.send(text_data=json.dumps({
                     "error": error_msg,
                     "chat_expired": True
                 }))
                 return
             except Exception as e:
-                logger.error(f"Failed to save message for chat {self.chat_id}: {e}", exc_info=True)
+                logger.error("Failed to save message for chat %s: %s", self.chat_id, e, exc_info=True)
                 await self.send(text_data=json.dumps({
                     "error": "Failed to save message. Please try again."
                 }))
                 return
 
             # Determine if sender is the user (not counsellor) - recalculate to ensure accuracy
-            # Use the method directly (it's properly defined with @database_sync_to_async)
-            # The cached value is stored in _cached_is_user_sender to avoid conflicts
+            # The cached value is stored in _cached_is_user_sender as a fallback
             try:
-                # Get the method using getattr to avoid any attribute resolution issues
-                method = getattr(self, 'is_user_sender', None)
-                if method and callable(method):
-                    is_user_sender = await method(self.chat_id, self.user.id)
-                else:
-                    # Method not available or not callable, use cached value
-                    logger.warning(f"is_user_sender method not callable for chat {self.chat_id}, using cached value")
-                    is_user_sender = self._cached_is_user_sender if hasattr(self, '_cached_is_user_sender') else False
-            except TypeError as e:
-                # This happens if is_user_sender is a boolean instead of a method (old code issue)
-                logger.warning(f"TypeError calling is_user_sender for chat {self.chat_id}: {e}. Using cached value.")
-                is_user_sender = self._cached_is_user_sender if hasattr(self, '_cached_is_user_sender') else False
+                is_user_sender = await self.is_user_sender(self.chat_id, self.user.id)
             except Exception as e:
-                logger.error(f"Failed to determine sender type for chat {self.chat_id}: {e}", exc_info=True)
+                logger.error("Failed to determine sender type for chat %s: %s", self.chat_id, e, exc_info=True)
                 # Fallback to cached value
                 is_user_sender = self._cached_is_user_sender if hasattr(self, '_cached_is_user_sender') else False
 
@@ -194,7 +242,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     logger.info("WS ACK: Sent ACK for client_message_id=%s, message_id=%s", 
                                 client_message_id, message_obj.id)
                 except Exception as e:
-                    logger.error(f"Failed to send ACK for chat {self.chat_id}: {e}", exc_info=True)
+                    logger.error("Failed to send ACK for chat %s: %s", self.chat_id, e, exc_info=True)
             
             # Send message to room group (broadcast to all connected clients)
             try:
@@ -206,6 +254,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     "is_user": is_user_sender,
                     "timestamp": message_obj.created_at.isoformat(),
                     "message_id": message_obj.id,
+                    "seq": message_obj.seq,
                 }
                 if client_message_id:
                     payload["client_message_id"] = client_message_id
@@ -214,7 +263,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 logger.info("WS BROADCAST: Successfully sent to group %s (payload keys: %s)",
                             self.room_group_name, list(payload.keys()))
             except Exception as e:
-                logger.error(f"Failed to broadcast message in chat {self.chat_id}: {e}", exc_info=True)
+                logger.error("Failed to broadcast message in chat %s: %s", self.chat_id, e, exc_info=True)
                 await self.send(text_data=json.dumps({
                     "error": "Failed to send message to other participants"
                 }))
@@ -243,15 +292,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             self.chat_id
                         )
                 except Exception as e:
-                    logger.error(f"Failed to broadcast chat status update for chat {self.chat_id}: {e}", exc_info=True)
+                    logger.error("Failed to broadcast chat status update for chat %s: %s", self.chat_id, e, exc_info=True)
                 
         except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in WebSocket message: {e}")
+            logger.error("Invalid JSON in WebSocket message: %s", e)
             await self.send(text_data=json.dumps({
                 "error": "Invalid message format"
             }))
         except Exception as e:
-            logger.error(f"Error processing message in chat {self.chat_id}: {e}", exc_info=True)
+            logger.error("Error processing message in chat %s: %s", self.chat_id, e, exc_info=True)
             await self.send(text_data=json.dumps({
                 "error": f"Failed to process message: {str(e)}"
             }))
@@ -272,12 +321,105 @@ class ChatConsumer(AsyncWebsocketConsumer):
             "is_user": event["is_user"],
             "timestamp": event["timestamp"],
             "message_id": event.get("message_id"),
+            "seq": event.get("seq"),
         }
         if "client_message_id" in event:
             payload["client_message_id"] = event["client_message_id"]
         await self.send(text_data=json.dumps(payload))
         logger.debug("WS DELIVER: Sent payload to channel %s (user may have multiple connections)", self.channel_name)
     
+    async def receive_typing(self, data):
+        """Relay typing start (throttled) and stop to the other participants."""
+        is_typing = bool(data.get("is_typing", True))
+        if is_typing:
+            if not presence.should_send_typing(self.chat_id, self.user.id):
+                return
+        elif not presence.clear_typing(self.chat_id, self.user.id):
+            return
+        await self.channel_layer.group_send(self.room_group_name, {
+            "type": "chat.typing",
+            "user_id": self.user.id,
+            "username": self.user.username,
+            "is_typing": is_typing,
+        })
+
+    async def receive_presence(self, data):
+        """Reply with the online state of this chat's participants."""
+        participants = [self.chat.user_id, self.chat.counsellor_id] if self.chat else [self.user.id]
+        await self.send(text_data=json.dumps({
+            "type": "presence",
+            "users": {str(user_id): online for user_id, online in presence.online(filter(None, participants)).items()},
+        }))
+
+    async def receive_ping(self, data):
+        """Keepalive; echoes the client's timestamp so it can measure round trips."""
+        await self.send(text_data=json.dumps({"type": "pong", "ts": data.get("ts")}))
+
+    async def chat_typing(self, event):
+        """Deliver a typing indicator, except back to the typist."""
+        if event["user_id"] == self.user.id:
+            return
+        await self.send(text_data=json.dumps({
+            "type": "typing",
+            "user_id": event["user_id"],
+            "username": event["username"],
+            "is_typing": event["is_typing"],
+        }))
+
+    async def chat_presence(self, event):
+        """Deliver a participant's online state change."""
+        await self.send(text_data=json.dumps({
+            "type": "presence",
+            "users": {str(event["user_id"]): event["online"]},
+        }))
+
+    async def queue_read(self, message_id):
+        """
+        Note that the client has read up to ``message_id``.
+
+        Clients send a "read" frame as messages scroll into view; the newest
+        id is kept and written once per READ_DEBOUNCE_SECONDS.
+        """
+        if not isinstance(message_id, int) or isinstance(message_id, bool) or message_id <= 0:
+            await self.send(text_data=json.dumps({"error": "read frame needs a message_id"}))
+            return
+        self._pending_read = max(message_id, self._pending_read or 0)
+        if self._read_flush is None or self._read_flush.done():
+            self._read_flush = asyncio.create_task(self._flush_read_later())
+
+    async def _flush_read_later(self):
+        await asyncio.sleep(READ_DEBOUNCE_SECONDS)
+        await self.flush_read()
+
+    async def flush_read(self):
+        """Write the pending read watermark and tell the chat's other sockets."""
+        message_id, self._pending_read = self._pending_read, None
+        if message_id is None:
+            return
+        try:
+            seq = await database_sync_to_async(mark_read, thread_sensitive=False)(
+                self.chat_id, self.user.id, message_id
+            )
+        except Exception as e:
+            logger.error("Failed to save read watermark for chat %s: %s", self.chat_id, e, exc_info=True)
+            return
+        if seq is not None:
+            await self.channel_layer.group_send(self.room_group_name, {
+                "type": "chat.read",
+                "user_id": self.user.id,
+                "message_id": message_id,
+                "seq": seq,
+            })
+
+    async def chat_read(self, event):
+        """Deliver a participant's new read watermark (read receipts, badge sync across devices)."""
+        await self.send(text_data=json.dumps({
+            "type": "read",
+            "user_id": event["user_id"],
+            "message_id": event["message_id"],
+            "seq": event["seq"],
+        }))
+
     async def chat_status_change(self, event):
         """Handler to deliver chat status updates to counselors."""
         # This will be received by counselor clients listening on counselor_queue
@@ -295,23 +437,47 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.channel_name, event["chat_id"], event["new_status"]
         )
 
-    @database_sync_to_async
-    def get_chat_and_check_access(self, user, chat_id):
+    async def chat_low_balance(self, event):
+        """Deliver the one-time low-balance warning with the chat's cost state."""
+        await self.send(text_data=json.dumps({"type": "low_balance_warning", **event["state"]}))
+
+    async def watch_low_balance(self):
+        """
+        Send the client's low-balance warning when it falls due.
+
+        Sleeps until the moment computed from the chat's cost state and
+        re-checks then, so the warning goes out from this process, where the
+        channel layer reaches the client's sockets.
+        """
+        while True:
+            delay = await database_sync_to_async(check_low_balance)(self.chat_id)
+            if delay is None:
+                return
+            await asyncio.sleep(max(delay, 1))
+
+    async def session_timer(self, event):
+        """Forward start/end events of the session linked to this chat."""
+        await self.send(text_data=json.dumps(session_timer_frame(event["state"], event["event"])))
+
+    async def get_chat_and_check_access(self, user, chat_id):
         """
         Get chat object and check access in a single query.
         Returns (chat, is_user_sender) tuple or None if no access.
         """
         try:
-            chat = Chat.objects.select_related('user', 'counsellor').get(id=chat_id)
+            chat = await Chat.objects.select_related('user', 'counsellor').aget(id=chat_id)
             
             # Log access check
             logger.info(
-                f"get_chat_and_check_access: chat_id={chat_id}, "
-                f"user={user.username} (id={user.id}), "
-                f"chat_user={chat.user.username} (id={chat.user.id}), "
-                f"chat_counsellor={chat.counsellor.username if chat.counsellor else None} "
-                f"(id={chat.counsellor_id if chat.counsellor else None}), "
-                f"chat_status={chat.status}"
+                "get_chat_and_check_access: chat_id=%s, "
+                "user=%s (id=%s), "
+                "chat_user=%s (id=%s), "
+                "chat_counsellor=%s "
+                "(id=%s), "
+                "chat_status=%s",
+                chat_id, user.username, user.id, chat.user.username, chat.user.id,
+                chat.counsellor.username if chat.counsellor else None,
+                chat.counsellor_id if chat.counsellor else None, chat.status
             )
             
             # User can access if they are the chat user or the assigned counsellor
@@ -321,10 +487,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
             
             if not has_access:
                 logger.warning(
-                    f"Access denied: user {user.username} (id={user.id}) not authorized for chat {chat_id}. "
-                    f"Chat user: {chat.user.username} (id={chat.user.id}), "
-                    f"Chat counsellor: {chat.counsellor.username if chat.counsellor else None} "
-                    f"(id={chat.counsellor_id if chat.counsellor else None})"
+                    "Access denied: user %s (id=%s) not authorized for chat %s. "
+                    "Chat user: %s (id=%s), "
+                    "Chat counsellor: %s "
+                    "(id=%s)",
+                    user.username, user.id, chat_id, chat.user.username, chat.user.id,
+                    chat.counsellor.username if chat.counsellor else None,
+                    chat.counsellor_id if chat.counsellor else None
                 )
                 return None
             
@@ -332,22 +501,32 @@ class ChatConsumer(AsyncWebsocketConsumer):
             is_user_sender = is_chat_user
             
             logger.info(
-                f"Access granted: user {user.username} (id={user.id}) has access to chat {chat_id}. "
-                f"is_user_sender={is_user_sender}"
+                "Access granted: user %s (id=%s) has access to chat %s. "
+                "is_user_sender=%s",
+                user.username, user.id, chat_id, is_user_sender
             )
             return (chat, is_user_sender)
         except Chat.DoesNotExist:
-            logger.error(f"get_chat_and_check_access: Chat {chat_id} not found in database")
+            logger.error("get_chat_and_check_access: Chat %s not found in database", chat_id)
             return None
         except Exception as e:
-            logger.error(f"get_chat_and_check_access: Error checking access for chat {chat_id}: {e}", exc_info=True)
+            logger.error("get_chat_and_check_access: Error checking access for chat %s: %s", chat_id, e, exc_info=True)
             return None
 
-    @database_sync_to_async
-    def save_message(self, text, client_message_id=None):
+    async def save_message(self, text, client_message_id=None):
         """Save message to database using atomic transaction with select_for_update.
         Automatically activates queued chats when user sends message.
-        Returns (message_obj, chat_was_activated) tuple or None if duplicate."""
+        Returns (message_obj, chat_was_activated) tuple or None if duplicate.
+
+        The transaction has to run synchronously. It runs on a pooled worker
+        thread (thread_sensitive=False) with its own connection instead of the
+        single thread-sensitive executor, so sockets do not queue behind each
+        other's transactions."""
+        return await database_sync_to_async(self._save_message_sync, thread_sensitive=False)(
+            text, client_message_id
+        )
+
+    def _save_message_sync(self, text, client_message_id=None):
         from django.db import transaction
         from django.utils import timezone
         from datetime import timedelta
@@ -367,8 +546,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     
                     if existing:
                         logger.info(
-                            f"DUPLICATE MESSAGE DETECTED: client_message_id={client_message_id}, "
-                            f"existing_message_id={existing.id}, chat_id={self.chat_id}, sender={self.user.username}"
+                            "DUPLICATE MESSAGE DETECTED: client_message_id=%s, "
+                            "existing_message_id=%s, chat_id=%s, sender=%s",
+                            client_message_id, existing.id, self.chat_id, self.user.username
                         )
                         return None  # Return None to indicate duplicate
                 
@@ -383,8 +563,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     
                     if recent_duplicate:
                         logger.info(
-                            f"DUPLICATE MESSAGE DETECTED (fallback): same text within 2s, "
-                            f"existing_message_id={recent_duplicate.id}, chat_id={self.chat_id}, sender={self.user.username}"
+                            "DUPLICATE MESSAGE DETECTED (fallback): same text within 2s, "
+                            "existing_message_id=%s, chat_id=%s, sender=%s",
+                            recent_duplicate.id, self.chat_id, self.user.username
                         )
                         return None
                 
@@ -408,15 +589,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             # User was inactive for > 5 minutes, log it
                             minutes_inactive = (now - previous_activity).total_seconds() / 60
                             logger.info(
-                                f"USER RETURNED AFTER INACTIVITY: chat_id={self.chat_id}, "
-                                f"was_inactive_for={minutes_inactive:.1f} minutes, "
-                                f"previous_status={chat.status}"
+                                "USER RETURNED AFTER INACTIVITY: chat_id=%s, "
+                                "was_inactive_for=%.1f minutes, "
+                                "previous_status=%s",
+                                self.chat_id, minutes_inactive, chat.status
                             )
                             # If chat was inactive, reactivate it now that user sent a message
                             if chat.status == 'inactive':
                                 chat.status = 'active'
                                 chat.ended_at = None  # Clear ended_at since chat is active again
-                                logger.info(f"Chat {self.chat_id} reactivated from inactive status (user sent message)")
+                                logger.info("Chat %s reactivated from inactive status (user sent message)", self.chat_id)
                     
                     # Check if chat is active but user has been inactive for > 1 hour
                     # Auto-disconnect inactive chats (long-term cleanup)
@@ -425,9 +607,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
                         if chat.last_user_activity < one_hour_ago:
                             # User was inactive for > 1 hour, auto-disconnect
                             logger.info(
-                                f"AUTO-DISCONNECTING INACTIVE CHAT (1 hour): chat_id={self.chat_id}, "
-                                f"last_user_activity={chat.last_user_activity}, "
-                                f"hours_inactive={(now - chat.last_user_activity).total_seconds() / 3600:.2f}"
+                                "AUTO-DISCONNECTING INACTIVE CHAT (1 hour): chat_id=%s, "
+                                "last_user_activity=%s, "
+                                "hours_inactive=%.2f",
+                                self.chat_id, chat.last_user_activity,
+                                (now - chat.last_user_activity).total_seconds() / 3600
                             )
                             chat.status = 'completed'
                             if not chat.ended_at:
@@ -436,7 +620,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             if not chat.started_at:
                                 chat.started_at = chat.created_at or now
                             chat.save(update_fields=['status', 'ended_at', 'started_at', 'last_user_activity', 'updated_at'])
-                            logger.info(f"Chat {self.chat_id} auto-disconnected due to 1 hour inactivity")
+                            logger.info("Chat %s auto-disconnected due to 1 hour inactivity", self.chat_id)
                     
                     # Auto-activate chat if it's queued, completed, inactive, or cancelled (ONLY for user)
                     if chat.status in ['queued', 'completed', 'inactive', 'cancelled']:
@@ -448,34 +632,43 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             has_balance, balance_message, current_balance = check_chat_wallet_balance(chat.user)
                             if not has_balance:
                                 logger.warning(
-                                    f"LOW WALLET BALANCE when activating chat: chat_id={self.chat_id}, "
-                                    f"user={chat.user.username}, balance=₹{current_balance}. "
-                                    f"Chat will be billed when it ends."
+                                    "LOW WALLET BALANCE when activating chat: chat_id=%s, "
+                                    "user=%s, balance=₹%s. "
+                                    "Chat will be billed when it ends.",
+                                    self.chat_id, chat.user.username, current_balance
                                 )
                                 # Still allow activation - billing will be handled when chat ends
                                 # If insufficient balance at that time, it will be logged
                         
                         logger.info(
-                            f"ACTIVATING CHAT: chat_id={self.chat_id}, current_status={old_status}, "
-                            f"activated_by={self.user.username} (USER)"
+                            "ACTIVATING CHAT: chat_id=%s, current_status=%s, "
+                            "activated_by=%s (USER)",
+                            self.chat_id, old_status, self.user.username
                         )
                         
                         # If chat is queued and user is sending, assign to first available counselor if not assigned
                         if old_status == 'queued':
                             # Check if chat needs a counselor assigned
                             if not chat.counsellor:
-                                # Try to auto-assign to first available counselor
+                                # Prefer a counselor who is online and accepting chats
                                 from django.contrib.auth import get_user_model
                                 User = get_user_model()
-                                available_counselor = User.objects.filter(
-                                    counsellorprofile__isnull=False
-                                ).first()
+                                counselors = User.objects.filter(counsellorprofile__isnull=False)
+                                online = presence.online_counsellors()
+                                available_counselor = None
+                                if online:
+                                    available_counselor = counselors.filter(
+                                        id__in=online, counsellorprofile__is_available=True
+                                    ).first()
+                                if available_counselor is None:
+                                    available_counselor = counselors.first()
                                 
                                 if available_counselor:
                                     chat.counsellor = available_counselor
                                     logger.info(
-                                        f"AUTO-ASSIGNED COUNSELOR: chat_id={self.chat_id}, "
-                                        f"counselor={available_counselor.username} (id={available_counselor.id})"
+                                        "AUTO-ASSIGNED COUNSELOR: chat_id=%s, "
+                                        "counselor=%s (id=%s)",
+                                        self.chat_id, available_counselor.username, available_counselor.id
                                     )
                             
                             chat_was_activated = True
@@ -490,8 +683,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             # This means user wants to continue the conversation
                             chat_was_activated = True
                             logger.info(
-                                f"REOPENING CHAT: chat_id={self.chat_id}, "
-                                f"old_status={old_status}, ended_at={chat.ended_at}"
+                                "REOPENING CHAT: chat_id=%s, "
+                                "old_status=%s, ended_at=%s",
+                                self.chat_id, old_status, chat.ended_at
                             )
                             
                             # Notify counselor that user wants to continue chat
@@ -526,24 +720,29 @@ class ChatConsumer(AsyncWebsocketConsumer):
                                     session.session_status = 'in_progress'
                                     session.is_confirmed = True
                                     session.save()
+                                    link_chat_session(chat, session)
+                                    broadcast_session_event(session, SESSION_EVENT_START, chat_id=chat.id)
                                     
                                     logger.info(
-                                        f"AUTO-STARTED SESSION: session_id={session.id}, "
-                                        f"chat_id={self.chat_id}, started_at={now}"
+                                        "AUTO-STARTED SESSION: session_id=%s, "
+                                        "chat_id=%s, started_at=%s",
+                                        session.id, self.chat_id, now
                                     )
                             except Exception as e:
-                                logger.error(f"Error auto-starting session for chat {self.chat_id}: {e}", exc_info=True)
+                                logger.error("Error auto-starting session for chat %s: %s", self.chat_id, e, exc_info=True)
                         
                         logger.info(
-                            f"Chat {self.chat_id} activated from {old_status} to active status. "
-                            f"Counsellor: {chat.counsellor.username if chat.counsellor else 'None'}"
+                            "Chat %s activated from %s to active status. "
+                            "Counsellor: %s",
+                            self.chat_id, old_status, chat.counsellor.username if chat.counsellor else 'None'
                         )
                 else:
                     # Counselor is sending message - do NOT activate chat
                     # But check if user has been inactive for 5+ minutes and mark chat as inactive
                     logger.info(
-                        f"COUNSELOR MESSAGE: chat_id={self.chat_id}, "
-                        f"counselor={self.user.username}, status={chat.status}"
+                        "COUNSELOR MESSAGE: chat_id=%s, "
+                        "counselor=%s, status=%s",
+                        self.chat_id, self.user.username, chat.status
                     )
                     
                     # Check if user has been inactive for 5+ minutes
@@ -553,9 +752,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             # User has been inactive for > 5 minutes, mark chat as inactive
                             minutes_inactive = (now - chat.last_user_activity).total_seconds() / 60
                             logger.info(
-                                f"AUTO-INACTIVATING CHAT (from counselor message): chat_id={self.chat_id}, "
-                                f"last_user_activity={chat.last_user_activity}, "
-                                f"minutes_inactive={minutes_inactive:.1f}"
+                                "AUTO-INACTIVATING CHAT (from counselor message): chat_id=%s, "
+                                "last_user_activity=%s, "
+                                "minutes_inactive=%.1f",
+                                self.chat_id, chat.last_user_activity, minutes_inactive
                             )
                             chat.status = 'inactive'
                             if not chat.ended_at:
@@ -564,18 +764,21 @@ class ChatConsumer(AsyncWebsocketConsumer):
                             if not chat.started_at:
                                 chat.started_at = chat.created_at or timezone.now()
                             chat.save(update_fields=['status', 'ended_at', 'started_at', 'updated_at'])
-                            logger.info(f"Chat {self.chat_id} auto-inactivated due to 5 minutes user inactivity")
+                            logger.info("Chat %s auto-inactivated due to 5 minutes user inactivity", self.chat_id)
                     
                     # Don't change chat status or activate it for counselor messages
                 
                 # Create and save the message
                 logger.info(
-                    f"SAVING MESSAGE: chat_id={self.chat_id}, sender={self.user.username} (id={self.user.id}), "
-                    f"text_length={len(text)}, client_message_id={client_message_id}"
+                    "SAVING MESSAGE: chat_id=%s, sender=%s (id=%s), "
+                    "text_length=%s, client_message_id=%s",
+                    self.chat_id, self.user.username, self.user.id, len(text), client_message_id
                 )
                 
-                message = ChatMessage.objects.create(
-                    chat=chat,
+                # chat is locked above: its message_count is current
+                message = create_message(
+                    chat,
+                    locked=True,
                     sender=self.user,
                     text=text,
                     client_message_id=client_message_id
@@ -584,35 +787,96 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 # Update cached chat object
                 self.chat = chat
                 
-                # Verify it was saved
-                saved_message = ChatMessage.objects.get(id=message.id)
                 logger.info(
-                    f"MESSAGE SAVED SUCCESSFULLY: message_id={saved_message.id}, chat_id={saved_message.chat_id}, "
-                    f"created_at={saved_message.created_at}, client_message_id={saved_message.client_message_id}"
+                    "MESSAGE SAVED SUCCESSFULLY: message_id=%s, chat_id=%s, "
+                    "created_at=%s, client_message_id=%s",
+                    message.id, message.chat_id, message.created_at, message.client_message_id
                 )
-                
-                # Count total messages for this chat
-                total_messages = ChatMessage.objects.filter(chat=chat).count()
-                logger.info(f"Total messages in chat {self.chat_id}: {total_messages}")
+
+                # The sender's next history read must include this message
+                pin_to_primary(self.user.id)
                 
                 # Return message and whether chat was activated
-                return (saved_message, chat_was_activated)
+                return (message, chat_was_activated)
         except Exception as e:
-            logger.error(f"ERROR SAVING MESSAGE: chat_id={self.chat_id}, error={e}", exc_info=True)
+            logger.error("ERROR SAVING MESSAGE: chat_id=%s, error=%s", self.chat_id, e, exc_info=True)
             raise
     
-    @database_sync_to_async
-    def is_counselor(self, user):
-        """Check if user is a counselor."""
-        return hasattr(user, 'counsellorprofile')
+    async def is_counselor(self, user):
+        """Check if user is a counselor (cached for the lifetime of the socket)."""
+        if getattr(self, "_is_counselor", None) is None:
+            role = self.scope.get("role")
+            if role is not None:
+                # From the token's role claim, no query
+                self._is_counselor = role == ROLE_COUNSELLOR
+            else:
+                self._is_counselor = await CounsellorProfile.objects.filter(user_id=user.id).aexists()
+        return self._is_counselor
 
-    @database_sync_to_async
-    def is_user_sender(self, chat_id, sender_id):
+    async def is_user_sender(self, chat_id, sender_id):
         """Check if sender is the chat user (not counsellor)."""
-        try:
-            chat = Chat.objects.get(id=chat_id)
-            sender = User.objects.get(id=sender_id)
-            return chat.user == sender
-        except (Chat.DoesNotExist, User.DoesNotExist):
-            return False
+        return await Chat.objects.filter(id=chat_id, user_id=sender_id).aexists()
+
+
+
+class SessionConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer pushing session timer events.
 
+    Sends a checkpoint on connect and every SESSION_TIMER_CHECKPOINT_SECONDS
+    while the session is in progress, plus start/end events as they happen.
+    Checkpoints are computed from the cached state; only connect reads the DB.
+    """
+
+    async def connect(self):
+        """Handle WebSocket connection."""
+        self.session_id = self.scope["url_route"]["kwargs"]["session_id"]
+        self.group_name = session_group_name(self.session_id)
+        self.user = self.scope["user"]
+        self.checkpoint_task = None
+
+        if not self.user.is_authenticated:
+            logger.warning("WS SESSION CONNECT rejected: user not authenticated (session_id=%s)", self.session_id)
+            await self.close()
+            return
+
+        self.state = await self.get_session_state(self.user, self.session_id)
+        if self.state is None:
+            logger.warning("WS SESSION CONNECT rejected: no access to session %s for user %s",
+                           self.session_id, self.user.username)
+            await self.close()
+            return
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_frame(SESSION_EVENT_CHECKPOINT)
+        self.checkpoint_task = asyncio.create_task(self.send_checkpoints())
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection."""
+        if getattr(self, "checkpoint_task", None):
+            self.checkpoint_task.cancel()
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def send_frame(self, event):
+        await self.send(text_data=json.dumps(session_timer_frame(self.state, event)))
+
+    async def send_checkpoints(self):
+        while True:
+            await asyncio.sleep(SESSION_TIMER_CHECKPOINT_SECONDS)
+            if self.state["status"] == "in_progress":
+                await self.send_frame(SESSION_EVENT_CHECKPOINT)
+
+    async def session_timer(self, event):
+        """Apply a start/end event to the cached state and forward it."""
+        self.state = event["state"]
+        await self.send_frame(event["event"])
+
+    @database_sync_to_async
+    def get_session_state(self, user, session_id):
+        """Timer state of the session if the user takes part in it."""
+        session = UpcomingSession.objects.filter(id=session_id).first()
+        if session is None or user.id not in (session.user_id, session.counsellor_id):
+            return None
+        return session_timer_state(session)
@@ -0,0 +1,147 @@
+"""
+Django management command reporting redundant and unused database indexes.
+
+Seeds a user, a counselor and their chats inside a transaction, replays the
+chat endpoints and background jobs that hit the chat tables, and EXPLAINs
+every captured statement (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on
+PostgreSQL) to see which indexes the planner actually uses. Indexes that are
+a prefix of another index are reported as redundant. All changes are rolled
+back afterwards.
+
+Usage:
+    python manage.py advise_indexes
+    python manage.py advise_indexes --show-plans
+    python manage.py advise_indexes --fail-on-redundant
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Chat, ChatMessage, CounsellorProfile, UserProfile
+from api.utils.billing import bill_active_chats
+from api.utils.chat_archive import archivable_chats
+from api.utils.cost_ticker import check_low_balance
+from api.utils.index_advisor import analyze_workload, collect_indexes, mark_redundant, unused_indexes
+from api.utils.read_state import unread_counts
+from api.views import (
+    ChatCostView,
+    ChatListView,
+    ChatMessageListView,
+    CounsellorStatsView,
+    QueuedChatsView,
+)
+
+
+class Command(BaseCommand):
+    help = 'Replay chat queries through EXPLAIN and report redundant or unused indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--show-plans',
+            action='store_true',
+            help='Print the query plan of every replayed statement',
+        )
+        parser.add_argument(
+            '--fail-on-redundant',
+            action='store_true',
+            help='Exit with an error if any redundant index exists',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            statements = self._replay()
+            indexes = collect_indexes(connection)
+            tables, plans = analyze_workload(connection, indexes, statements)
+            transaction.set_rollback(True)
+
+        redundant = mark_redundant(indexes)
+        unused = unused_indexes(indexes, tables)
+
+        self.stdout.write(f"Replayed {len(statements)} statements ({len(plans)} distinct) on {connection.vendor}")
+        if options['show_plans']:
+            for sql, plan in plans.items():
+                self.stdout.write(f"\n{sql}\n    " + plan.replace("\n", "\n    "))
+
+        self.stdout.write("\nIndex usage:")
+        for table in sorted(tables):
+            self.stdout.write(f"  {table}")
+            for index in indexes[table]:
+                usage = ", ".join(sorted(index.used_by)) or "-"
+                self.stdout.write(f"    {index.name:<45} {index.definition:<55} {usage}")
+
+        if redundant:
+            self.stdout.write(self.style.WARNING(f"\nRedundant indexes ({len(redundant)}):"))
+            for index in redundant:
+                self.stdout.write(f"  {index.name}: {index.definition} is covered by {index.covered_by}")
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNo redundant indexes"))
+
+        if unused:
+            self.stdout.write(self.style.WARNING(f"\nIndexes not used by the replayed workload ({len(unused)}):"))
+            for index in unused:
+                note = " (redundant)" if index.covered_by else ""
+                self.stdout.write(f"  {index.name}: {index.definition}{note}")
+
+        if options['fail_on_redundant'] and redundant:
+            raise CommandError(f"{len(redundant)} redundant indexes found")
+
+    def _replay(self):
+        """Run the chat workload and return the captured (label, sql) pairs."""
+        now = timezone.now()
+        user = User.objects.create(username="index_advisor_user")
+        UserProfile.objects.create(user=user, wallet_minutes=100)
+        counsellor = User.objects.create(username="index_advisor_counsellor")
+        CounsellorProfile.objects.create(user=counsellor)
+        chat = Chat.objects.create(
+            user=user,
+            counsellor=counsellor,
+            status=Chat.STATUS_ACTIVE,
+            started_at=now - timedelta(minutes=30),
+            last_user_activity=now - timedelta(minutes=10),
+        )
+        Chat.objects.create(user=user, status=Chat.STATUS_QUEUED)
+        ChatMessage.objects.create(chat=chat, sender=user, text="hello", client_message_id="index-advisor")
+
+        factory = APIRequestFactory()
+        views = [
+            ("chat list (user)", ChatListView, user, "/api/chats/list/", {}),
+            ("chat list (counselor)", ChatListView, counsellor, "/api/chats/list/", {}),
+            ("queued chats", QueuedChatsView, counsellor, "/api/counselor/queued-chats/", {}),
+            ("counselor stats", CounsellorStatsView, counsellor, "/api/counselor/stats/", {}),
+            ("chat messages", ChatMessageListView, user, f"/api/chats/{chat.id}/messages/", {"chat_id": chat.id}),
+            ("chat cost", ChatCostView, user, f"/api/chats/{chat.id}/cost/", {"chat_id": chat.id}),
+        ]
+        jobs = [
+            ("message dedup", lambda: ChatMessage.objects.filter(
+                chat=chat, sender=user, client_message_id="index-advisor"
+            ).first()),
+            ("message dedup fallback", lambda: ChatMessage.objects.filter(
+                chat=chat, sender=user, text="hello", created_at__gte=now - timedelta(seconds=2)
+            ).first()),
+            ("billing", lambda: bill_active_chats(now=now, check_only=True)),
+            ("low balance", lambda: check_low_balance(chat.id, now)),
+            ("inactive chats", lambda: list(Chat.objects.filter(
+                status=Chat.STATUS_ACTIVE, last_user_activity__lt=now - timedelta(minutes=5)
+            ).exclude(last_user_activity__isnull=True))),
+            ("archival", lambda: list(archivable_chats(now).values_list("id", flat=True))),
+            ("unread counts", lambda: unread_counts(counsellor)),
+        ]
+
+        statements = []
+        for label, view, actor, path, kwargs in views:
+            request = factory.get(path)
+            force_authenticate(request, user=actor)
+            with CaptureQueriesContext(connection) as context:
+                response = view.as_view()(request, **kwargs)
+                response.render()
+            statements.extend((label, query["sql"]) for query in context.captured_queries)
+        for label, job in jobs:
+            with CaptureQueriesContext(connection) as context:
+                job()
+            statements.extend((label, query["sql"]) for query in context.captured_queries)
+        return statements
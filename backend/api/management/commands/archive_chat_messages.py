@@ -0,0 +1,74 @@
+"""
+Management command to move messages of long-completed chats into compressed archives.
+Usage: python manage.py archive_chat_messages [--days 90] [--batch-size 200] [--dry-run]
+
+Each chat is archived in its own transaction (see api.utils.chat_archive), so
+the command can be interrupted and re-run at any time.  History endpoints read
+archived messages transparently.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+from api.utils.chat_archive import (
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    archivable_chats,
+    archive_chat,
+)
+
+
+class Command(BaseCommand):
+    help = 'Archive messages of chats completed more than N days ago'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=ARCHIVE_AFTER_DAYS,
+            help=f'Archive chats that ended more than this many days ago (default: {ARCHIVE_AFTER_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help=f'Number of chat ids fetched per query (default: {ARCHIVE_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be archived'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        chats = archivable_chats(cutoff).order_by('id')
+
+        if options['dry_run']:
+            summary = chats.aggregate(chats=Count('id', distinct=True), messages=Count('messages'))
+            self.stdout.write(
+                f"Would archive {summary['messages']} messages from {summary['chats']} chats "
+                f"completed before {cutoff:%Y-%m-%d}"
+            )
+            return
+
+        archived_chats = 0
+        archived_messages = 0
+        last_id = 0
+        while True:
+            chat_ids = list(chats.filter(id__gt=last_id).values_list('id', flat=True)[:options['batch_size']])
+            if not chat_ids:
+                break
+            for chat_id in chat_ids:
+                moved = archive_chat(chat_id)
+                if moved:
+                    archived_chats += 1
+                    archived_messages += moved
+            last_id = chat_ids[-1]
+            self.stdout.write(f"  Archived {archived_messages} messages from {archived_chats} chats (last chat id {last_id})")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {archived_messages} messages from {archived_chats} chats")
+        )
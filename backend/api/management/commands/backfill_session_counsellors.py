@@ -0,0 +1,46 @@
+"""
+Management command to link legacy sessions to their counselor.
+Usage: python manage.py backfill_session_counsellors [--batch-size 5000] [--dry-run]
+
+Older UpcomingSession rows name their counselor in ``counsellor_name`` only.
+The counselor views now look sessions up by the ``counsellor`` foreign key,
+so run this once after deploying: every session whose name matches exactly
+one counselor's full name or username gets that counselor (see
+api.utils.session_counsellors). Names that match no counselor or several are
+listed for manual assignment.
+"""
+from django.core.management.base import BaseCommand
+
+from api.utils.session_counsellors import BACKFILL_BATCH_SIZE, backfill_session_counsellors
+
+# Unresolved names listed in the report
+MAX_REPORTED_NAMES = 20
+
+
+class Command(BaseCommand):
+    help = 'Set the counsellor of sessions that only carry a counsellor name'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BACKFILL_BATCH_SIZE,
+            help=f'Number of sessions resolved per transaction (default: {BACKFILL_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be linked'
+        )
+
+    def handle(self, *args, **options):
+        stats, unresolved = backfill_session_counsellors(options['batch_size'], dry_run=options['dry_run'])
+        verb = "Would link" if options['dry_run'] else "Linked"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['linked']} sessions; "
+            f"{stats['unmatched']} match no counsellor, {stats['ambiguous']} match several"
+        ))
+        for name, count in unresolved.most_common(MAX_REPORTED_NAMES):
+            self.stdout.write(f"  {count:>8}  {name!r}")
+        if len(unresolved) > MAX_REPORTED_NAMES:
+            self.stdout.write(f"  ... and {len(unresolved) - MAX_REPORTED_NAMES} more names")
@@ -0,0 +1,158 @@
+"""
+Django management command to benchmark the reports analytics endpoint.
+
+Seeds a fixture user with a large mood history (100k logs by default), then
+times ReportsAnalyticsView and reports the number of queries per request.
+
+Usage:
+    python manage.py benchmark_analytics
+    python manage.py benchmark_analytics --mood-logs 100000 --iterations 20
+    python manage.py benchmark_analytics --cleanup
+"""
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import MoodLog, UpcomingSession, UserProfile, WellnessTask
+from api.views import ReportsAnalyticsView
+
+BENCHMARK_USERNAME = "analytics_benchmark_user"
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the reports analytics endpoint against a user with a large mood history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mood-logs',
+            type=int,
+            default=100_000,
+            help='Number of mood logs to seed for the fixture user (default: 100000)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Number of days the mood logs are spread over (default: 90)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=10,
+            help='Number of timed requests (default: 10)',
+        )
+        parser.add_argument(
+            '--cleanup',
+            action='store_true',
+            help='Delete the fixture user and its data, then exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted, _ = User.objects.filter(username=BENCHMARK_USERNAME).delete()
+            self.stdout.write(self.style.SUCCESS(f"Removed benchmark fixture ({deleted} rows)"))
+            return
+
+        user = self.seed_fixture(options['mood_logs'], options['days'])
+
+        factory = APIRequestFactory()
+        view = ReportsAnalyticsView.as_view()
+
+        def call():
+            request = factory.get("/api/reports/analytics/")
+            force_authenticate(request, user=user)
+            response = view(request)
+            response.render()
+            return response
+
+        # Warm-up request, also used to count queries
+        with CaptureQueriesContext(connection) as ctx:
+            call()
+        query_count = len(ctx.captured_queries)
+
+        timings = []
+        for _ in range(options['iterations']):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        self.stdout.write("=" * 80)
+        self.stdout.write(f"Mood logs for fixture user: {MoodLog.objects.filter(user=user).count()}")
+        self.stdout.write(f"Queries per request: {query_count}")
+        self.stdout.write(
+            f"Latency over {len(timings)} requests: "
+            f"min={timings[0]:.1f}ms, "
+            f"median={timings[len(timings) // 2]:.1f}ms, "
+            f"max={timings[-1]:.1f}ms"
+        )
+        self.stdout.write("=" * 80)
+
+    def seed_fixture(self, mood_logs: int, days: int) -> User:
+        """Create (or reuse) the fixture user with the requested amount of history."""
+        user, _ = User.objects.get_or_create(
+            username=BENCHMARK_USERNAME,
+            defaults={"email": f"{BENCHMARK_USERNAME}@example.com"},
+        )
+        UserProfile.objects.get_or_create(user=user)
+
+        existing = MoodLog.objects.filter(user=user).count()
+        if existing >= mood_logs:
+            self.stdout.write(f"Reusing fixture user with {existing} mood logs")
+            return user
+
+        self.stdout.write(f"Seeding {mood_logs - existing} mood logs over {days} days...")
+        now = timezone.now()
+        remaining = mood_logs - existing
+        per_day = max(1, remaining // days)
+        day = 0
+        while remaining > 0:
+            batch_size = min(per_day, remaining)
+            batch_started = timezone.now()
+            MoodLog.objects.bulk_create(
+                [MoodLog(user=user, value=random.randint(1, 5)) for _ in range(batch_size)],
+                batch_size=1000,
+            )
+            # recorded_at is auto_now_add, so move the fresh batch back to its day
+            recorded_at = now - timedelta(days=day % days, minutes=random.randint(0, 600))
+            MoodLog.objects.filter(user=user, recorded_at__gte=batch_started).update(
+                recorded_at=recorded_at,
+                created_at=recorded_at,
+            )
+            remaining -= batch_size
+            day += 1
+
+        if not WellnessTask.objects.filter(user=user).exists():
+            WellnessTask.objects.bulk_create(
+                [
+                    WellnessTask(
+                        user=user,
+                        title=f"Benchmark task {index}",
+                        category=WellnessTask.CATEGORY_DAILY if index % 2 else WellnessTask.CATEGORY_EVENING,
+                        is_completed=index % 3 == 0,
+                        order=index,
+                    )
+                    for index in range(20)
+                ]
+            )
+        if not UpcomingSession.objects.filter(user=user).exists():
+            UpcomingSession.objects.bulk_create(
+                [
+                    UpcomingSession(
+                        user=user,
+                        title=f"Benchmark session {index}",
+                        session_type=UpcomingSession.SESSION_TYPE_ONE_ON_ONE,
+                        start_time=now + timedelta(days=index - 10),
+                        counsellor_name="Benchmark Counsellor",
+                    )
+                    for index in range(20)
+                ]
+            )
+        return user
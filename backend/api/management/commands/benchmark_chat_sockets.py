@@ -0,0 +1,277 @@
+"""
+Django management command load-testing chat delivery over real WebSockets.
+
+Starts Daphne in-process on a free local port (in a background thread),
+seeds one active chat per user/counselor pair and opens two WebSocket
+clients per chat: the user and the counselor. Every user then sends
+messages; the harness times each one from the moment the user sends it to
+the moment the counselor's socket receives the broadcast, and reports
+p50/p95/p99 send-to-deliver latency. Seeded users, chats and messages are
+purged afterwards.
+
+Usage:
+    python manage.py benchmark_chat_sockets
+    python manage.py benchmark_chat_sockets --clients 1000 --messages 5 --interval 1.0
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+import statistics
+import struct
+import threading
+import time
+
+from daphne.server import Server
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from twisted.internet import reactor
+
+from api.models import Chat, CounsellorProfile, UserProfile
+from api.utils.purge import purge_users
+
+BENCHMARK_USER_PREFIX = "chat_socket_bench_"
+# Simultaneous WebSocket handshakes while the clients connect
+CONNECT_CONCURRENCY = 100
+DELIVERY_TIMEOUT_SECONDS = 60
+
+
+class BenchmarkClient:
+    """
+    Bare-bones RFC 6455 client on asyncio streams (text frames only).
+
+    Autobahn's asyncio client cannot share a process with Daphne, which runs
+    autobahn on Twisted.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.frames = asyncio.Queue()
+        self.reader_task = asyncio.create_task(self._read_frames())
+
+    @classmethod
+    async def connect(cls, host, port, path):
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        status = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        if b" 101 " not in status:
+            writer.close()
+            raise ConnectionError(status.decode().strip() or "connection closed during handshake")
+        return cls(reader, writer)
+
+    def _send_frame(self, opcode, payload=b""):
+        # Client frames must be masked
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+        masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        self.writer.write(header + mask + masked)
+
+    def send_json(self, data):
+        self._send_frame(0x1, json.dumps(data).encode("utf-8"))
+
+    async def _read_frames(self):
+        try:
+            while True:
+                first, second = await self.reader.readexactly(2)
+                length = second & 0x7F
+                if length == 126:
+                    (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+                elif length == 127:
+                    (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+                payload = await self.reader.readexactly(length)
+                opcode = first & 0x0F
+                if opcode == 0x1:
+                    self.frames.put_nowait((time.perf_counter(), json.loads(payload)))
+                elif opcode == 0x9:
+                    self._send_frame(0xA, payload)
+                elif opcode == 0x8:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    async def close(self):
+        if not self.writer.is_closing():
+            self._send_frame(0x8)
+            self.writer.close()
+        self.reader_task.cancel()
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Open many concurrent chat WebSockets against in-process Daphne and report delivery latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients',
+            type=int,
+            default=1000,
+            help='Total WebSocket clients; half users, half counselors (default: 1000)',
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=5,
+            help='Messages sent by each user (default: 5)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Average seconds between messages of one user (default: 1.0)',
+        )
+
+    def handle(self, *args, **options):
+        chats = max(1, options['clients'] // 2)
+        pairs = self._seed(chats)
+        server = self._start_daphne()
+        # The consumers log every frame at INFO; keep the run quiet
+        logging.disable(logging.INFO)
+        try:
+            host, port = server.listening_addresses[0]
+            self.stdout.write(
+                f"Daphne listening on {host}:{port}; {chats * 2} clients, "
+                f"{options['messages']} messages per user"
+            )
+            result = asyncio.run(self._run(host, port, pairs, options['messages'], options['interval']))
+        finally:
+            logging.disable(logging.NOTSET)
+            reactor.callFromThread(reactor.stop)
+            self._cleanup()
+
+        latencies, connect_failures, lost, elapsed = result
+        self.stdout.write(f"  Connect failures: {connect_failures}")
+        self.stdout.write(f"  Delivered:        {len(latencies)}/{len(latencies) + lost} messages in {elapsed:.2f}s")
+        if latencies:
+            self.stdout.write(
+                f"  Send-to-deliver:  p50={statistics.median(latencies) * 1000:.1f}ms "
+                f"p95={_percentile(latencies, 0.95) * 1000:.1f}ms "
+                f"p99={_percentile(latencies, 0.99) * 1000:.1f}ms "
+                f"max={max(latencies) * 1000:.1f}ms"
+            )
+        style = self.style.ERROR if (lost or connect_failures) else self.style.SUCCESS
+        self.stdout.write(style(f"  Lost:             {lost}"))
+
+    def _start_daphne(self):
+        server = Server(
+            application=self._application(),
+            endpoints=["tcp:port=0:interface=127.0.0.1"],
+            signal_handlers=False,
+            verbosity=0,
+        )
+        thread = threading.Thread(target=server.run, name="daphne", daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.listening_addresses:
+            if time.monotonic() > deadline or not thread.is_alive():
+                raise CommandError("Daphne did not start listening")
+            time.sleep(0.05)
+        return server
+
+    def _application(self):
+        from core.asgi import application
+        return application
+
+    async def _run(self, host, port, pairs, messages, interval):
+        gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+        async def connect(chat_id, token):
+            async with gate:
+                return await BenchmarkClient.connect(host, port, f"/ws/chat/{chat_id}/?token={token}")
+
+        connections = await asyncio.gather(
+            *(
+                asyncio.gather(connect(chat_id, user_token), connect(chat_id, counsellor_token))
+                for chat_id, user_token, counsellor_token in pairs
+            ),
+            return_exceptions=True,
+        )
+        live = [
+            (chat_id, *sockets)
+            for (chat_id, _, _), sockets in zip(pairs, connections)
+            if not isinstance(sockets, BaseException)
+        ]
+        connect_failures = (len(pairs) - len(live)) * 2
+
+        async def converse(chat_id, user, counsellor):
+            sent_at = {}
+            latencies = []
+            for n in range(messages):
+                await asyncio.sleep(random.uniform(0, 2 * interval))
+                client_message_id = f"bench-{chat_id}-{n}"
+                sent_at[client_message_id] = time.perf_counter()
+                user.send_json({"message": f"benchmark message {n}", "client_message_id": client_message_id})
+            deadline = time.perf_counter() + DELIVERY_TIMEOUT_SECONDS
+            while sent_at and time.perf_counter() < deadline:
+                try:
+                    received_at, frame = await asyncio.wait_for(
+                        counsellor.frames.get(), timeout=deadline - time.perf_counter()
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if frame.get("type") != "message":
+                    continue
+                started = sent_at.pop(frame.get("client_message_id"), None)
+                if started is not None:
+                    latencies.append(received_at - started)
+            return latencies, len(sent_at)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(converse(*sockets) for sockets in live))
+        elapsed = time.perf_counter() - started
+
+        for _, user, counsellor in live:
+            await user.close()
+            await counsellor.close()
+        # Let Daphne run the consumers' disconnect handlers
+        await asyncio.sleep(0.5)
+
+        latencies = [latency for result, _ in results for latency in result]
+        lost = sum(missing for _, missing in results)
+        return latencies, connect_failures, lost, elapsed
+
+    def _seed(self, count):
+        self._cleanup()
+        now = timezone.now()
+        counsellor = User.objects.create(username=f"{BENCHMARK_USER_PREFIX}counsellor")
+        CounsellorProfile.objects.create(user=counsellor)
+        User.objects.bulk_create(User(username=f"{BENCHMARK_USER_PREFIX}{n}") for n in range(count))
+        users = list(
+            User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX)
+            .exclude(id=counsellor.id)
+            .order_by("id")
+        )
+        UserProfile.objects.bulk_create(UserProfile(user=user, wallet_minutes=10000) for user in users)
+        Chat.objects.bulk_create(
+            Chat(user=user, counsellor=counsellor, status=Chat.STATUS_ACTIVE, started_at=now)
+            for user in users
+        )
+        chat_ids = Chat.objects.filter(user__in=users).order_by("user_id").values_list("id", flat=True)
+        counsellor_token = str(AccessToken.for_user(counsellor))
+        return [
+            (chat_id, str(AccessToken.for_user(user)), counsellor_token)
+            for chat_id, user in zip(chat_ids, users)
+        ]
+
+    def _cleanup(self):
+        purge_users(User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX))
@@ -0,0 +1,178 @@
+"""
+Django management command benchmarking concurrent chat writers over WebSocket.
+
+Seeds one active chat per writer, then starts several worker processes (like
+several Daphne workers sharing one database). Each process opens WebSocket
+connections to ChatConsumer through the real ASGI application and every
+writer sends messages one after another, timing each message until its ACK
+(i.e. until it is committed). Seeded users, chats and messages are purged
+afterwards.
+
+Run it once per database profile to compare them:
+
+Usage:
+    python manage.py benchmark_chat_writes
+    python manage.py benchmark_chat_writes --processes 4 --writers 10 --messages 50
+    DB_ENGINE=postgres python manage.py benchmark_chat_writes
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+# Models and the ASGI application are imported inside functions: spawned
+# worker processes import this module before django.setup() has run.
+
+BENCHMARK_USER_PREFIX = "chat_write_bench_"
+ACK_TIMEOUT_SECONDS = 60
+
+
+def _run_writers(settings_module, writers, messages):
+    """Worker process entry point: drive ``writers`` [(chat_id, token)] over WebSocket."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+    logging.disable(logging.WARNING)
+    return asyncio.run(_drive_writers(writers, messages))
+
+
+async def _drive_writers(writers, messages):
+    from channels.testing import WebsocketCommunicator
+    from core.asgi import application
+
+    async def write(chat_id, token):
+        communicator = WebsocketCommunicator(application, f"/ws/chat/{chat_id}/?token={token}")
+        connected, _ = await communicator.connect()
+        if not connected:
+            return [], messages
+        latencies = []
+        errors = 0
+        for n in range(messages):
+            client_message_id = f"bench-{chat_id}-{n}"
+            started = time.perf_counter()
+            await communicator.send_json_to({
+                "message": f"benchmark message {n}",
+                "client_message_id": client_message_id,
+            })
+            while True:
+                frame = await communicator.receive_json_from(timeout=ACK_TIMEOUT_SECONDS)
+                if "error" in frame:
+                    errors += 1
+                    break
+                if frame.get("type") == "ack" and frame.get("client_message_id") == client_message_id:
+                    latencies.append(time.perf_counter() - started)
+                    break
+        await communicator.disconnect()
+        return latencies, errors
+
+    results = await asyncio.gather(*(write(chat_id, token) for chat_id, token in writers))
+    latencies = [latency for result, _ in results for latency in result]
+    return latencies, sum(errors for _, errors in results)
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Measure chat message throughput and latency under concurrent WebSocket writers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=4,
+            help='Worker processes, each with its own database connections (default: 4)',
+        )
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=10,
+            help='Concurrent WebSocket writers per process (default: 10)',
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=20,
+            help='Messages sent by each writer (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        from django.db import connection, connections
+
+        processes = options['processes']
+        per_process = options['writers']
+        messages = options['messages']
+
+        writers = self._seed(processes * per_process)
+        # Worker processes must not inherit open connections
+        connections.close_all()
+        groups = [writers[i::processes] for i in range(processes)]
+        settings_module = os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings")
+
+        self.stdout.write(
+            f"Benchmarking {connection.vendor}: {processes} processes x {per_process} writers x "
+            f"{messages} messages"
+        )
+        try:
+            started = time.perf_counter()
+            with multiprocessing.get_context("spawn").Pool(processes) as pool:
+                results = pool.starmap(
+                    _run_writers,
+                    [(settings_module, group, messages) for group in groups],
+                )
+            elapsed = time.perf_counter() - started
+        finally:
+            self._cleanup()
+
+        latencies = [latency for result, _ in results for latency in result]
+        errors = sum(errors for _, errors in results)
+        self.stdout.write(f"  Committed:  {len(latencies)} messages in {elapsed:.2f}s")
+        self.stdout.write(f"  Throughput: {len(latencies) / elapsed:.1f} messages/s")
+        if latencies:
+            self.stdout.write(
+                f"  Latency:    p50={statistics.median(latencies) * 1000:.1f}ms "
+                f"p95={_percentile(latencies, 0.95) * 1000:.1f}ms "
+                f"p99={_percentile(latencies, 0.99) * 1000:.1f}ms "
+                f"max={max(latencies) * 1000:.1f}ms"
+            )
+        style = self.style.ERROR if errors else self.style.SUCCESS
+        self.stdout.write(style(f"  Errors:     {errors}"))
+
+    def _seed(self, count):
+        from django.contrib.auth.models import User
+        from django.utils import timezone
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.models import Chat, CounsellorProfile, UserProfile
+
+        self._cleanup()
+        now = timezone.now()
+        counsellor = User.objects.create(username=f"{BENCHMARK_USER_PREFIX}counsellor")
+        CounsellorProfile.objects.create(user=counsellor)
+        users = User.objects.bulk_create(
+            User(username=f"{BENCHMARK_USER_PREFIX}{n}") for n in range(count)
+        )
+        users = list(User.objects.filter(username__in=[user.username for user in users]).order_by("id"))
+        UserProfile.objects.bulk_create(UserProfile(user=user, wallet_minutes=10000) for user in users)
+        Chat.objects.bulk_create(
+            Chat(user=user, counsellor=counsellor, status=Chat.STATUS_ACTIVE, started_at=now)
+            for user in users
+        )
+        chat_ids = Chat.objects.filter(user__in=users).order_by("user_id").values_list("id", flat=True)
+        return [
+            (chat_id, str(AccessToken.for_user(user)))
+            for chat_id, user in zip(chat_ids, users)
+        ]
+
+    def _cleanup(self):
+        from django.contrib.auth.models import User
+
+        from api.utils.purge import purge_users
+
+        purge_users(User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX))
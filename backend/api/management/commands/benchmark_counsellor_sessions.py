@@ -0,0 +1,194 @@
+"""
+Django management command benchmarking the counselor appointment and stats lookups.
+
+Seeds a large session table (1M sessions by default) spread over many
+counselors and clients, with about a quarter of the sessions scheduled
+ahead, and times for one counselor:
+
+- the legacy lookups, ``counsellor_name__icontains`` (appointments list and
+  the five separate stats counts), against the ``counsellor`` index lookups
+  the views use now (one page, one aggregate);
+- keyset pages deep into the counselor's history against the OFFSET query
+  the same page would need.
+
+The query plan of each lookup is printed, so the index use is visible. The
+fixture is kept for further runs; remove it with --cleanup.
+
+Usage:
+    python manage.py benchmark_counsellor_sessions
+    python manage.py benchmark_counsellor_sessions --sessions 1000000 --counsellors 500 --iterations 5
+    python manage.py benchmark_counsellor_sessions --cleanup
+"""
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.models import CounsellorProfile, UpcomingSession
+from api.utils.purge import purge_users
+from api.utils.session_counsellors import APPOINTMENTS_PAGE_SIZE, counsellor_sessions_page
+
+BENCHMARK_USER_PREFIX = "session_lookup_bench_"
+CLIENTS = 2000
+SEED_BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark counselor session lookups by name substring against the indexed counsellor lookups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=1_000_000, help='Sessions to seed (default: 1000000)')
+        parser.add_argument('--counsellors', type=int, default=500, help='Counselors to spread them over (default: 500)')
+        parser.add_argument('--iterations', type=int, default=5, help='Timed runs per lookup (default: 5)')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the fixture, then exit')
+
+    def handle(self, *args, **options):
+        fixture_users = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX)
+        if options['cleanup']:
+            deleted = purge_users(fixture_users)
+            self.stdout.write(self.style.SUCCESS(f"Removed benchmark fixture ({sum(deleted.values())} rows)"))
+            return
+
+        counsellors = self.seed_fixture(options['sessions'], options['counsellors'])
+        # "Counsellor 1" is a substring of "Counsellor 10".."Counsellor 19", ...
+        counsellor = counsellors[1]
+        name = counsellor.get_full_name()
+        iterations = options['iterations']
+        now = timezone.now()
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        month_start = today_start.replace(day=1)
+
+        legacy = UpcomingSession.objects.filter(counsellor_name__icontains=name)
+        indexed = UpcomingSession.objects.filter(counsellor=counsellor)
+        own_sessions = indexed.count()
+
+        def legacy_appointments():
+            return list(legacy.filter(start_time__gt=now).order_by('start_time'))
+
+        def indexed_appointments():
+            return counsellor_sessions_page(indexed.filter(start_time__gt=now))[0]
+
+        def legacy_stats():
+            return [
+                legacy.count(),
+                legacy.filter(start_time__gte=today_start, start_time__lt=today_start + timedelta(days=1)).count(),
+                legacy.filter(start_time__gt=now).count(),
+                legacy.filter(start_time__lt=now).count(),
+                legacy.values('user').distinct().count(),
+                legacy.filter(start_time__gte=month_start, start_time__lt=now).count(),
+            ]
+
+        def indexed_stats():
+            return indexed.aggregate(
+                total=Count('id'),
+                today=Count('id', filter=Q(
+                    start_time__gte=today_start, start_time__lt=today_start + timedelta(days=1)
+                )),
+                upcoming=Count('id', filter=Q(start_time__gt=now)),
+                completed=Count('id', filter=Q(start_time__lt=now)),
+                monthly=Count('id', filter=Q(start_time__gte=month_start, start_time__lt=now)),
+                clients=Count('user', distinct=True),
+            )
+
+        # Cursor of the deepest full page, walked once up front
+        pages = max(1, own_sessions // APPOINTMENTS_PAGE_SIZE - 1)
+        cursor = None
+        for _ in range(pages):
+            _, cursor = counsellor_sessions_page(indexed, cursor)
+        deep_offset = pages * APPOINTMENTS_PAGE_SIZE
+
+        def offset_page():
+            return list(indexed.order_by('start_time', 'id')[deep_offset:deep_offset + APPOINTMENTS_PAGE_SIZE])
+
+        def keyset_page():
+            return counsellor_sessions_page(indexed, cursor)[0]
+
+        self.stdout.write("=" * 80)
+        self.stdout.write(
+            f"Sessions: {UpcomingSession.objects.count()}, counsellor {name!r}: {own_sessions} own sessions, "
+            f"{legacy.count()} matched by name substring"
+        )
+        self.stdout.write(self.style.SUCCESS("\nUpcoming appointments"))
+        self.timed("icontains (legacy, whole list)", legacy_appointments, iterations)
+        self.timed(f"counsellor index (page of {APPOINTMENTS_PAGE_SIZE})", indexed_appointments, iterations)
+        self.stdout.write(self.style.SUCCESS("\nStats"))
+        self.timed("icontains (legacy, 6 queries)", legacy_stats, iterations)
+        self.timed("counsellor index (1 aggregate)", indexed_stats, iterations)
+        self.stdout.write(self.style.SUCCESS(f"\nPage at offset {deep_offset}"))
+        self.timed("OFFSET", offset_page, iterations)
+        self.timed("keyset cursor", keyset_page, iterations)
+
+        self.stdout.write(self.style.SUCCESS("\nQuery plans"))
+        for label, queryset in (
+            ("icontains", legacy.filter(start_time__gt=now).order_by('start_time')),
+            ("counsellor index", indexed.filter(start_time__gt=now).order_by('start_time', 'id')[:APPOINTMENTS_PAGE_SIZE]),
+        ):
+            self.stdout.write(f"  {label}:")
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
+        self.stdout.write("=" * 80)
+
+    def timed(self, label, lookup, iterations):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            lookup()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"  {label:<40} median={timings[len(timings) // 2]:8.1f}ms  min={timings[0]:8.1f}ms"
+        )
+
+    def seed_fixture(self, sessions: int, counsellor_count: int) -> list:
+        """Create (or reuse) the counselors, clients and sessions; returns the counselors by number."""
+        counsellors = list(
+            User.objects.filter(username__startswith=f"{BENCHMARK_USER_PREFIX}counsellor_").order_by("id")
+        )
+        existing = UpcomingSession.objects.filter(
+            counsellor__username__startswith=BENCHMARK_USER_PREFIX
+        ).count()
+        if len(counsellors) >= 2 and existing >= sessions:
+            self.stdout.write(f"Reusing fixture with {existing} sessions")
+            return counsellors
+
+        purge_users(User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX))
+        self.stdout.write(f"Seeding {sessions} sessions over {counsellor_count} counsellors...")
+        with transaction.atomic():
+            counsellors = User.objects.bulk_create([
+                User(
+                    username=f"{BENCHMARK_USER_PREFIX}counsellor_{n}",
+                    first_name="Counsellor",
+                    last_name=str(n),
+                )
+                for n in range(counsellor_count)
+            ])
+            CounsellorProfile.objects.bulk_create([CounsellorProfile(user=user) for user in counsellors])
+            clients = User.objects.bulk_create([
+                User(username=f"{BENCHMARK_USER_PREFIX}client_{n}") for n in range(CLIENTS)
+            ])
+
+        # Three quarters in the past year, a quarter in the next three months
+        now = timezone.now()
+        seeded = 0
+        while seeded < sessions:
+            batch = []
+            for _ in range(min(SEED_BATCH_SIZE, sessions - seeded)):
+                counsellor = random.choice(counsellors)
+                offset = random.randint(-365 * 24 * 60, 90 * 24 * 60)
+                batch.append(UpcomingSession(
+                    user=random.choice(clients),
+                    counsellor=counsellor,
+                    title="Benchmark session",
+                    session_type=UpcomingSession.SESSION_TYPE_ONE_ON_ONE,
+                    start_time=now + timedelta(minutes=offset),
+                    counsellor_name=counsellor.get_full_name(),
+                ))
+            with transaction.atomic():
+                UpcomingSession.objects.bulk_create(batch)
+            seeded += len(batch)
+        return counsellors
@@ -0,0 +1,132 @@
+"""
+Django management command benchmarking case-insensitive email lookups at scale.
+
+Seeds a large user table (1M users by default, every tenth with a mixed-case
+email as older accounts have) and times, for emails spread over the table:
+
+- the login lookup (email -> username) and the registration "email already
+  in use" check, with ``email__iexact`` (before) and through the
+  LOWER(email) index (api.utils.emails);
+- the full registration email validation (SendOTPSerializer) and a full
+  login by email through the token endpoint.
+
+The query plan of both lookups is printed. Seeded users share one password
+hash. The fixture is kept for further runs; remove it with --cleanup.
+
+Usage:
+    python manage.py benchmark_email_lookups
+    python manage.py benchmark_email_lookups --users 1000000 --lookups 200
+    python manage.py benchmark_email_lookups --cleanup
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import SendOTPSerializer
+from api.utils.emails import users_by_email
+from api.utils.purge import purge_users
+from api.views import EmailOrUsernameTokenObtainPairView
+
+BENCHMARK_USER_PREFIX = "email_lookup_bench_"
+PASSWORD = "benchmark-email-password"
+SEED_BATCH_SIZE = 10000
+# Full logins hash a password each; a few are enough next to the lookups
+FULL_LOGINS = 5
+
+
+class Command(BaseCommand):
+    help = 'Benchmark login and registration email lookups against a large user table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000, help='Users to seed (default: 1000000)')
+        parser.add_argument('--lookups', type=int, default=100, help='Timed lookups per variant (default: 100)')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the fixture, then exit')
+
+    def handle(self, *args, **options):
+        fixture_users = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX)
+        if options['cleanup']:
+            deleted = purge_users(fixture_users)
+            self.stdout.write(self.style.SUCCESS(f"Removed benchmark fixture ({sum(deleted.values())} rows)"))
+            return
+
+        total = self.seed_fixture(options['users'])
+        samples = [random.randrange(total) for _ in range(options['lookups'])]
+        # Users log in and register with whatever case they type
+        emails = [self.email(n).upper() if n % 2 else self.email(n) for n in samples]
+        missing = [f"new_{n}@EXAMPLE.com" for n in samples]
+
+        self.stdout.write("=" * 80)
+        self.stdout.write(f"Users: {User.objects.count()}")
+        self.stdout.write(self.style.SUCCESS("\nLogin lookup (email -> username)"))
+        self.timed("email__iexact (before)", emails, lambda email: User.objects.filter(
+            email__iexact=email.strip()
+        ).values_list("username", flat=True).first())
+        self.timed("LOWER(email) index", emails, lambda email: users_by_email(email).order_by("id").values_list(
+            "username", flat=True
+        ).first())
+
+        self.stdout.write(self.style.SUCCESS("\nRegistration check (email already in use)"))
+        self.timed("email__iexact (before)", missing, lambda email: User.objects.filter(
+            email__iexact=email.strip().lower()
+        ).exists())
+        self.timed("LOWER(email) index", missing, lambda email: users_by_email(email).exists())
+
+        self.stdout.write(self.style.SUCCESS("\nEndpoints"))
+        self.timed("registration email validation", missing, lambda email: SendOTPSerializer(
+            data={"email": email}
+        ).is_valid())
+        factory = APIRequestFactory()
+        view = EmailOrUsernameTokenObtainPairView.as_view()
+        self.timed(f"login by email ({FULL_LOGINS} logins, incl. password hash)", emails[:FULL_LOGINS], lambda email: view(
+            factory.post("/api/auth/token/", {"username": email, "password": PASSWORD}, format="json")
+        ))
+
+        self.stdout.write(self.style.SUCCESS("\nQuery plans"))
+        for label, queryset in (
+            ("email__iexact", User.objects.filter(email__iexact=emails[0])),
+            ("LOWER(email) index", users_by_email(emails[0])),
+        ):
+            self.stdout.write(f"  {label}:")
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
+        self.stdout.write("=" * 80)
+
+    def timed(self, label, emails, lookup):
+        timings = []
+        for email in emails:
+            started = time.perf_counter()
+            lookup(email)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"  {label:<58} p50={statistics.median(timings):8.2f}ms  "
+            f"p95={timings[max(0, int(len(timings) * 0.95) - 1)]:8.2f}ms"
+        )
+
+    @staticmethod
+    def email(n):
+        # Every tenth account predates normalization and kept its mixed case
+        return f"{BENCHMARK_USER_PREFIX}{n}@Example.com" if n % 10 == 0 else f"{BENCHMARK_USER_PREFIX}{n}@example.com"
+
+    def seed_fixture(self, users: int) -> int:
+        """Create users up to ``users`` (reusing earlier runs); returns how many exist."""
+        existing = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).count()
+        if existing >= users:
+            self.stdout.write(f"Reusing fixture with {existing} users")
+            return existing
+
+        self.stdout.write(f"Seeding {users - existing} users...")
+        encoded = make_password(PASSWORD)
+        for start in range(existing, users, SEED_BATCH_SIZE):
+            with transaction.atomic():
+                User.objects.bulk_create([
+                    User(username=f"{BENCHMARK_USER_PREFIX}{n}", email=self.email(n), password=encoded)
+                    for n in range(start, min(start + SEED_BATCH_SIZE, users))
+                ])
+        return users
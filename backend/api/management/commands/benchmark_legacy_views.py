@@ -0,0 +1,87 @@
+"""
+Django management command to compare throughput of the legacy content endpoints.
+
+Runs the same payload through a regular DRF APIView (content negotiation, JWT
+authentication with user lookup, JSON rendering) and through the pre-encoded
+PrecomputedJSONView path, and reports requests/sec for each.
+
+Usage:
+    python manage.py benchmark_legacy_views
+    python manage.py benchmark_legacy_views --requests 5000
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.views import (
+    LEGACY_GUIDELINES,
+    LegacyGuidelinesView,
+)
+
+BENCHMARK_USERNAME = "legacy_benchmark_user"
+
+
+class DRFGuidelinesView(APIView):
+    """Baseline: the pre-optimisation implementation of LegacyGuidelinesView."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"sections": LEGACY_GUIDELINES})
+
+
+class Command(BaseCommand):
+    help = 'Compare requests/sec of DRF-rendered vs pre-encoded legacy content responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Number of requests per variant (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        user, _ = User.objects.get_or_create(
+            username=BENCHMARK_USERNAME,
+            defaults={"email": f"{BENCHMARK_USERNAME}@example.com"},
+        )
+        token = str(AccessToken.for_user(user))
+        factory = APIRequestFactory()
+
+        variants = [
+            ("DRF APIView", DRFGuidelinesView.as_view()),
+            ("Pre-encoded", LegacyGuidelinesView.as_view()),
+        ]
+
+        self.stdout.write("=" * 80)
+        results = {}
+        for label, view in variants:
+            def call():
+                request = factory.get(
+                    "/api/legacy/guidelines/",
+                    HTTP_AUTHORIZATION=f"Bearer {token}",
+                )
+                response = view(request)
+                if hasattr(response, "render"):
+                    response.render()
+                assert response.status_code == 200, response.status_code
+                return response
+
+            call()  # warm-up
+            started = time.perf_counter()
+            for _ in range(total):
+                call()
+            elapsed = time.perf_counter() - started
+            results[label] = total / elapsed
+            self.stdout.write(f"{label:<15} {results[label]:>10.0f} req/s ({elapsed * 1000 / total:.3f} ms/request)")
+
+        baseline, optimised = results["DRF APIView"], results["Pre-encoded"]
+        self.stdout.write(f"Speed-up: {optimised / baseline:.1f}x")
+        self.stdout.write("=" * 80)
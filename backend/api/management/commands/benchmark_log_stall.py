@@ -0,0 +1,124 @@
+"""
+Django management command measuring event-loop stalls caused by logging.
+
+Runs an asyncio loop that floods a logger with ChatConsumer-style records
+(``WS RECEIVE`` / ``WS DELIVER`` / ``WS BROADCAST``, as a burst of socket
+messages would) while a monitor task sleeps in short ticks and records how
+late each tick wakes up. The flood runs twice against a stream that takes
+``--write-delay`` milliseconds per write, standing in for a slow stdout
+pipe: once through a plain StreamHandler (the previous console handler) and
+once through the pipeline from api.utils.logging_pipeline (background
+writer, sampling, JSON). Reports p50/p99/max tick lag, total stall time and
+records written or dropped for each.
+
+Usage:
+    python manage.py benchmark_log_stall
+    python manage.py benchmark_log_stall --messages 20000 --write-delay 0.2
+"""
+import asyncio
+import logging
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.utils.logging_pipeline import BackgroundQueueHandler, JSONFormatter, SamplingFilter
+
+TICK_SECONDS = 0.001
+# Log calls between yields to the loop, like the records of one socket message
+RECORDS_PER_MESSAGE = 4
+
+
+class SlowStream:
+    """Write sink that blocks ``delay`` seconds per write, like a backed-up pipe."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Measure event-loop stalls from logging a message flood, with and without the async pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000, help='Socket messages to simulate (default 5000)')
+        parser.add_argument(
+            '--write-delay', type=float, default=0.05, help='Milliseconds each stdout write takes (default 0.05)'
+        )
+
+    def handle(self, *args, **options):
+        messages = options['messages']
+        delay = options['write_delay'] / 1000
+
+        self.stdout.write(
+            f"Flooding {messages} messages x {RECORDS_PER_MESSAGE} records, {options['write_delay']} ms per write"
+        )
+        for label in ("sync StreamHandler", "async pipeline"):
+            stream = SlowStream(delay)
+            if label == "sync StreamHandler":
+                handler = logging.StreamHandler(stream)
+                handler.setFormatter(logging.Formatter("{levelname} {asctime} {module} {message}", style="{"))
+            else:
+                handler = BackgroundQueueHandler(stream)
+                handler.setFormatter(JSONFormatter())
+                handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+
+            log = logging.getLogger("api.consumers.benchmark")
+            log.handlers = [handler]
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            # Sampling keys name api.consumers; the benchmark logger is its child
+            try:
+                lags, elapsed = asyncio.run(self._flood(log, messages))
+            finally:
+                if isinstance(handler, BackgroundQueueHandler):
+                    handler.stop()
+                log.handlers = []
+            dropped = getattr(handler, "dropped", 0)
+            self._report(label, lags, elapsed, stream.writes, dropped)
+
+    async def _flood(self, log, messages):
+        lags = []
+        done = asyncio.Event()
+
+        async def monitor():
+            while not done.is_set():
+                expected = time.perf_counter() + TICK_SECONDS
+                await asyncio.sleep(TICK_SECONDS)
+                lags.append(max(0.0, time.perf_counter() - expected))
+
+        monitor_task = asyncio.create_task(monitor())
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        for n in range(messages):
+            log.info("WS RECEIVE: chat_id=%s, channel=%s, user=%s, raw_text=%s", n % 50, "specific.abc", n, "hello")
+            log.info("WS BROADCAST: chat_id=%s, group=%s, sender=%s, is_user=%s, text=%s",
+                     n % 50, f"chat_{n % 50}", n, True, "hello")
+            log.info("WS DELIVER: chat_id=%s, channel=%s, user=%s, is_user=%s, message=%s",
+                     n % 50, "specific.def", n, False, "hello")
+            log.info("Chat %s saved: user=%s, counsellor=%s", n % 50, n, n + 1)
+            # Hand the loop back, as a consumer does between frames
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - started
+        done.set()
+        await monitor_task
+        return lags, elapsed
+
+    def _report(self, label, lags, elapsed, writes, dropped):
+        lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+        p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+        self.stdout.write(self.style.SUCCESS(f"\n{label}:"))
+        self.stdout.write(f"  flood took:   {elapsed * 1000:.1f} ms")
+        self.stdout.write(
+            f"  tick lag:     p50 {statistics.median(lags_ms):.2f} ms, p99 {p99:.2f} ms, max {lags_ms[-1]:.2f} ms"
+        )
+        self.stdout.write(f"  stalled:      {sum(lags_ms):.1f} ms over {len(lags)} ticks")
+        self.stdout.write(f"  records:      {writes} written, {dropped} dropped")
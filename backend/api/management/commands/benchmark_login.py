@@ -0,0 +1,145 @@
+"""
+Django management command measuring login throughput.
+
+Seeds users with a known password and logs them in through the token
+endpoint (alternating username and email) from several threads, reporting
+logins per second, latency percentiles, and queries and password hash
+verifications per login, for:
+
+- "double validation": the previous endpoint, which validated the
+  credentials a second time after minting the tokens;
+- "single pass": the current endpoint;
+- with --iterations N, the single pass after opting in to
+  ConfigurablePBKDF2PasswordHasher with N iterations (the first round
+  rehashes each user's password on login, as in production; only the
+  following round is timed).
+
+Seeded users are purged afterwards.
+
+Usage:
+    python manage.py benchmark_login
+    python manage.py benchmark_login --logins 200 --threads 8 --iterations 100000
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.models import UserProfile
+from api.serializers import EmailOrUsernameTokenObtainPairSerializer
+from api.utils.purge import purge_users
+from api.views import EmailOrUsernameTokenObtainPairView
+
+BENCHMARK_USER_PREFIX = "login_bench_"
+PASSWORD = "benchmark-login-password"
+CONFIGURABLE_HASHER = "api.utils.hashers.ConfigurablePBKDF2PasswordHasher"
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput of the token endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Users to seed (default: 20)')
+        parser.add_argument('--logins', type=int, default=100, help='Logins per scenario (default: 100)')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent login threads (default: 4)')
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            help='Also measure ConfigurablePBKDF2PasswordHasher with this many iterations',
+        )
+
+    def handle(self, *args, **options):
+        fixture_users = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX)
+        purge_users(fixture_users)
+        # One hash for everyone: seeding with the full work factor per user would dominate the run
+        encoded = make_password(PASSWORD)
+        users = User.objects.bulk_create([
+            User(
+                username=f"{BENCHMARK_USER_PREFIX}{n}",
+                email=f"{BENCHMARK_USER_PREFIX}{n}@example.com",
+                password=encoded,
+            )
+            for n in range(options['users'])
+        ])
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        credentials = [
+            user.email if n % 2 else user.username for n, user in enumerate(users)
+        ]
+
+        self.stdout.write(
+            f"{options['logins']} logins per scenario, {options['threads']} threads, "
+            f"password hash: {encoded.split('$')[0]} x {encoded.split('$')[1]}"
+        )
+        try:
+            self.run("double validation (before)", credentials, options, double=True)
+            self.run("single pass", credentials, options)
+            if options['iterations']:
+                with override_settings(
+                    PASSWORD_PBKDF2_ITERATIONS=options['iterations'],
+                    PASSWORD_HASHERS=[CONFIGURABLE_HASHER],
+                ):
+                    # First pass rehashes every user to the new work factor
+                    self.login_all(credentials, len(credentials), 1, double=False)
+                    rehashed = User.objects.filter(
+                        username__startswith=BENCHMARK_USER_PREFIX,
+                        password__startswith=f"pbkdf2_sha256${options['iterations']}$",
+                    ).count()
+                    self.stdout.write(f"\nRehashed {rehashed} of {len(credentials)} users on login")
+                    self.run(f"single pass, {options['iterations']} iterations", credentials, options)
+        finally:
+            purge_users(fixture_users)
+
+    def run(self, label, credentials, options, double=False):
+        started = time.perf_counter()
+        timings, queries, verifications = self.login_all(credentials, options['logins'], options['threads'], double)
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        self.stdout.write(self.style.SUCCESS(f"\n{label}:"))
+        self.stdout.write(f"  throughput:    {len(timings) / elapsed:.1f} logins/s")
+        self.stdout.write(
+            f"  latency:       p50 {statistics.median(timings):.1f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms"
+        )
+        self.stdout.write(f"  per login:     {queries} queries, {verifications} password verifications")
+
+    def login_all(self, credentials, logins, threads, double):
+        factory = APIRequestFactory()
+        view = EmailOrUsernameTokenObtainPairView.as_view()
+        verifications = 0
+        lock = threading.Lock()
+        verify = PBKDF2PasswordHasher.verify
+
+        def counting_verify(hasher, password, encoded):
+            nonlocal verifications
+            with lock:
+                verifications += 1
+            return verify(hasher, password, encoded)
+
+        def login(n):
+            data = {"username": credentials[n % len(credentials)], "password": PASSWORD}
+            started = time.perf_counter()
+            response = view(factory.post("/api/auth/token/", data, format="json"))
+            if response.status_code != 200:
+                raise CommandError(f"Login failed with {response.status_code}: {response.data}")
+            if double:
+                # What the endpoint did before: validate again to recover the user
+                serializer = EmailOrUsernameTokenObtainPairSerializer(data=data)
+                serializer.is_valid(raise_exception=False)
+            return (time.perf_counter() - started) * 1000
+
+        with mock.patch.object(PBKDF2PasswordHasher, "verify", counting_verify):
+            # One login on this thread's connection for the per-login counts
+            with CaptureQueriesContext(connection) as context:
+                login(0)
+            verifications_per_login = verifications
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                timings = list(pool.map(login, range(logins)))
+        return timings, len(context.captured_queries), verifications_per_login
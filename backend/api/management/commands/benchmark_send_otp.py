@@ -0,0 +1,135 @@
+"""
+Django management command measuring the registration send-OTP endpoint.
+
+Starts a local SMTP stand-in (api.utils.smtp_sink) with provider-like
+latencies, points Django's SMTP backend at it, and sends OTPs to fresh
+addresses through the endpoint from several threads, reporting requests per
+second and p50/p99 request latency for:
+
+- "inline send_mail": the previous endpoint, which sent the email inside
+  the request over a new SMTP connection;
+- "outbox": the current endpoint, which only queues the email.
+
+For the outbox it then drains the queue with the worker (drain_outbox) and
+reports delivery throughput and SMTP connections used.  --fail-rate makes the
+stand-in reject that share of messages so the retry path shows up in the
+worker's counts.  Fixture OTPs and emails are removed afterwards.
+
+Usage:
+    python manage.py benchmark_send_otp
+    python manage.py benchmark_send_otp --requests 200 --threads 8 --connect-latency 300 --message-latency 20
+    python manage.py benchmark_send_otp --fail-rate 0.05
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.models import EmailOTP, OutboundEmail
+from api.utils.email_outbox import drain_outbox
+from api.utils.smtp_sink import SMTPSink
+from api.views import RegistrationSendOTPView
+
+BENCHMARK_EMAIL_PREFIX = "otp_bench_"
+
+
+class Command(BaseCommand):
+    help = 'Measure send-OTP throughput and latency against a local SMTP stand-in'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Requests per scenario (default: 100)')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent request threads (default: 4)')
+        parser.add_argument(
+            '--connect-latency',
+            type=float,
+            default=300,
+            help='SMTP connection setup time in ms, TLS and AUTH included (default: 300)',
+        )
+        parser.add_argument(
+            '--message-latency',
+            type=float,
+            default=20,
+            help='SMTP time per message in ms (default: 20)',
+        )
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of messages the SMTP stand-in rejects')
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(
+            connect_latency=options['connect_latency'] / 1000,
+            message_latency=options['message_latency'] / 1000,
+            fail_rate=options['fail_rate'],
+        )
+        self.cleanup()
+        self.stdout.write(
+            f"{options['requests']} requests per scenario, {options['threads']} threads, SMTP stand-in: "
+            f"{options['connect_latency']:.0f} ms per connection, {options['message_latency']:.0f} ms per message"
+        )
+        try:
+            with sink, override_settings(**sink.email_settings()):
+                before = dict(sink.counts)
+                self.run("inline send_mail (before)", "inline", options, inline=True)
+                self.report_smtp(sink, before)
+
+                before = dict(sink.counts)
+                self.run("outbox", "outbox", options)
+                queued = OutboundEmail.objects.filter(to_email__startswith=BENCHMARK_EMAIL_PREFIX).count()
+                started = time.perf_counter()
+                stats = drain_outbox()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.SUCCESS("\noutbox worker:"))
+                self.stdout.write(f"  queued:        {queued} emails")
+                self.stdout.write(
+                    f"  drained:       {stats['sent']} sent, {stats['retried']} retried, "
+                    f"{stats['failed']} failed in {elapsed:.2f} s ({stats['sent'] / elapsed:.1f} emails/s)"
+                )
+                self.report_smtp(sink, before)
+        finally:
+            self.cleanup()
+
+    def run(self, label, tag, options, inline=False):
+        factory = APIRequestFactory()
+        view = RegistrationSendOTPView.as_view()
+
+        def request(n):
+            email = f"{BENCHMARK_EMAIL_PREFIX}{tag}_{n}@example.com"
+            started = time.perf_counter()
+            response = view(factory.post("/api/auth/send-otp/", {"email": email}, format="json"))
+            if response.status_code != 200:
+                raise CommandError(f"Send OTP failed with {response.status_code}: {response.data}")
+            if inline:
+                # What the endpoint did before: send the queued email before responding
+                message = OutboundEmail.objects.filter(to_email=email).get()
+                message.delete()
+                try:
+                    send_mail(message.subject, message.body, None, [email], fail_silently=False)
+                except Exception:
+                    # Logged and swallowed by the old endpoint
+                    pass
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            timings = list(pool.map(request, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        self.stdout.write(self.style.SUCCESS(f"\n{label}:"))
+        self.stdout.write(f"  throughput:    {len(timings) / elapsed:.1f} requests/s")
+        self.stdout.write(
+            f"  latency:       p50 {statistics.median(timings):.1f} ms, "
+            f"p99 {timings[max(0, int(len(timings) * 0.99) - 1)]:.1f} ms"
+        )
+
+    def report_smtp(self, sink, before):
+        delta = {key: sink.counts[key] - before[key] for key in sink.counts}
+        self.stdout.write(
+            f"  SMTP:          {delta['connections']} connections, {delta['messages']} messages accepted, "
+            f"{delta['rejected']} rejected"
+        )
+
+    def cleanup(self):
+        EmailOTP.objects.filter(email__startswith=BENCHMARK_EMAIL_PREFIX).delete()
+        OutboundEmail.objects.filter(to_email__startswith=BENCHMARK_EMAIL_PREFIX).delete()
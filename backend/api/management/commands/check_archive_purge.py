@@ -0,0 +1,90 @@
+"""
+Django management command checking archived chat history after a user purge.
+
+Inside a transaction that is rolled back afterwards, seeds completed chats
+with messages from the client and the counsellor, archives them, then
+removes the counsellor - once through the purge engine and once with a plain
+``delete()`` that bypasses it - and fetches each chat's history through
+ChatMessageListView as the client.  Fails unless the history loads, the
+purged counsellor's messages are gone from the archive blob, and messages of
+the deleted counsellor show up as "Deleted user".
+
+Usage:
+    python manage.py check_archive_purge
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Chat, ChatArchive, CounsellorProfile, UserProfile
+from api.serializers import DELETED_USER_NAME
+from api.utils.chat_archive import archive_chat, decode_messages
+from api.utils.chat_summary import create_message
+from api.utils.purge import purge_user_batch
+from api.views import ChatMessageListView
+
+CHECK_USER_PREFIX = "archive_purge_check_"
+
+
+class Command(BaseCommand):
+    help = 'Fail if archived chat history breaks or keeps messages after a user purge'
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            for label, purge in (("purged counsellor", True), ("deleted counsellor", False)):
+                user, counsellor, chat = self._seed(label)
+                archive_chat(chat.id)
+                if purge:
+                    purge_user_batch([counsellor.id])
+                else:
+                    counsellor.delete()
+
+                response = self._history(user, chat)
+                self.stdout.write(f"{label:<20} status={response.status_code}")
+                if response.status_code != 200:
+                    failures.append(f"{label}: history returned {response.status_code}")
+                    continue
+                senders = [(row["sender"], row["sender_name"]) for row in response.data]
+                archived = decode_messages(
+                    ChatArchive.objects.filter(chat_id=chat.id).values_list("messages_blob", flat=True).first()
+                )
+                if purge:
+                    if any(row["sender_id"] == counsellor.id for row in archived):
+                        failures.append(f"{label}: counsellor messages left in the archive")
+                    if len(response.data) != 2:
+                        failures.append(f"{label}: expected the client's 2 messages, got {len(response.data)}")
+                elif (None, DELETED_USER_NAME) not in senders:
+                    failures.append(f"{label}: no '{DELETED_USER_NAME}' message in {senders}")
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Archived history survives user purges"))
+
+    def _seed(self, label):
+        suffix = label.replace(" ", "_")
+        now = timezone.now()
+        user = User.objects.create(username=f"{CHECK_USER_PREFIX}user_{suffix}")
+        UserProfile.objects.create(user=user, wallet_minutes=100)
+        counsellor = User.objects.create(username=f"{CHECK_USER_PREFIX}counsellor_{suffix}")
+        CounsellorProfile.objects.create(user=counsellor)
+        chat = Chat.objects.create(
+            user=user,
+            counsellor=counsellor,
+            status=Chat.STATUS_ACTIVE,
+            started_at=now - timedelta(days=100),
+        )
+        for n, sender in enumerate((user, counsellor, user, counsellor)):
+            create_message(chat, sender=sender, text=f"message {n}")
+        Chat.objects.filter(id=chat.id).update(status=Chat.STATUS_COMPLETED, ended_at=now - timedelta(days=99))
+        return user, counsellor, chat
+
+    def _history(self, user, chat):
+        request = APIRequestFactory().get(f"/api/chats/{chat.id}/messages/")
+        force_authenticate(request, user=user)
+        return ChatMessageListView.as_view()(request, chat_id=chat.id)
@@ -0,0 +1,117 @@
+"""
+Django management command asserting the exact number of queries of the chat list views.
+
+Seeds a user, a counselor, an active chat with messages and a queued chat
+inside a transaction, calls each view with the api loggers at INFO and a
+principal built from a login token's claims (both as in production) and
+compares the captured query count with its budget. Debug
+diagnostics must not add queries at INFO; their cost with DEBUG enabled is
+reported alongside. All changes are rolled back afterwards.
+
+Usage:
+    python manage.py check_query_counts
+"""
+import logging
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.authentication import ClaimsUser
+from api.models import Chat, CounsellorProfile, UserProfile
+from api.serializers import EmailOrUsernameTokenObtainPairSerializer
+from api.utils.chat_summary import create_message
+from api.views import ChatListView, ChatMessageListView, QueuedChatsView
+
+# Queries each view may issue for its response, and why
+QUERY_BUDGETS = {
+    # chat list (the counselor check reads the token's role claim)
+    "chat list (user)": 1,
+    "chat list (counselor)": 1,
+    # queued chats
+    "queued chats": 1,
+    # chat + previous status + last_user_activity update + messages + archive
+    "chat messages (user)": 5,
+    # chat + messages + archive
+    "chat messages (counselor)": 3,
+}
+
+
+@contextmanager
+def _log_level(level):
+    log = logging.getLogger("api.views")
+    previous = log.level
+    log.setLevel(level)
+    try:
+        yield
+    finally:
+        log.setLevel(previous)
+
+
+class Command(BaseCommand):
+    help = 'Check that the chat list views issue exactly their budgeted number of queries'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            results = self._measure()
+            transaction.set_rollback(True)
+
+        failures = []
+        for label, production, debug in results:
+            budget = QUERY_BUDGETS[label]
+            ok = production == budget
+            if not ok:
+                failures.append(label)
+            style = self.style.SUCCESS if ok else self.style.ERROR
+            self.stdout.write(style(
+                f"  {label:<28} {production:>3} queries (budget {budget}); with DEBUG diagnostics: {debug}"
+            ))
+
+        if failures:
+            raise CommandError(f"Query budget exceeded or changed: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All views within their query budgets"))
+
+    def _measure(self):
+        now = timezone.now()
+        user = User.objects.create(username="query_budget_user")
+        UserProfile.objects.create(user=user, wallet_minutes=100)
+        counsellor = User.objects.create(username="query_budget_counsellor")
+        CounsellorProfile.objects.create(user=counsellor)
+        chat = Chat.objects.create(user=user, counsellor=counsellor, status=Chat.STATUS_ACTIVE, started_at=now)
+        Chat.objects.create(user=user, status=Chat.STATUS_QUEUED)
+        for n in range(5):
+            create_message(chat, sender=user if n % 2 else counsellor, text=f"message {n}")
+
+        messages_path = f"/api/chats/{chat.id}/messages/"
+        views = [
+            ("chat list (user)", ChatListView, user, "/api/chats/list/", {}),
+            ("chat list (counselor)", ChatListView, counsellor, "/api/chats/list/", {}),
+            ("queued chats", QueuedChatsView, counsellor, "/api/counselor/queued-chats/", {}),
+            ("chat messages (user)", ChatMessageListView, user, messages_path, {"chat_id": chat.id}),
+            ("chat messages (counselor)", ChatMessageListView, counsellor, messages_path, {"chat_id": chat.id}),
+        ]
+
+        tokens = {
+            actor.pk: EmailOrUsernameTokenObtainPairSerializer.get_token(actor).access_token
+            for actor in (user, counsellor)
+        }
+        factory = APIRequestFactory()
+        results = []
+        for label, view, actor, path, kwargs in views:
+            counts = []
+            for level in (logging.INFO, logging.DEBUG):
+                # A fresh principal per call: a loaded user would hide queries
+                request = factory.get(path)
+                force_authenticate(request, user=ClaimsUser(tokens[actor.pk]))
+                with _log_level(level), CaptureQueriesContext(connection) as context:
+                    response = view.as_view()(request, **kwargs)
+                    response.render()
+                if response.status_code != 200:
+                    raise CommandError(f"{label}: unexpected status {response.status_code}")
+                counts.append(len(context.captured_queries))
+            results.append((label, *counts))
+        return results
@@ -0,0 +1,94 @@
+"""
+Django management command asserting the query budget of the end-session path.
+
+Seeds a user, a counselor, a linked chat and session inside a transaction,
+ends them through SessionEndView (by session id and by chat id) and fails if
+any request issues more than the allowed number of SQL statements. All
+changes are rolled back afterwards.
+
+Usage:
+    python manage.py check_session_end_queries
+    python manage.py check_session_end_queries --max-queries 8
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Chat, ChatSession, CounsellorProfile, UpcomingSession, UserProfile
+from api.views import SessionEndView
+
+# Lookup (1) + savepoint pair (2) + session, chat, wallet and billing UPDATEs (4)
+SESSION_END_QUERY_BUDGET = 7
+
+
+class Command(BaseCommand):
+    help = 'Fail if ending a session issues more SQL statements than the query budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-queries',
+            type=int,
+            default=SESSION_END_QUERY_BUDGET,
+            help=f'Maximum statements allowed per request (default: {SESSION_END_QUERY_BUDGET})',
+        )
+
+    def handle(self, *args, **options):
+        budget = options['max_queries']
+        failures = []
+
+        with transaction.atomic():
+            for label, use_chat_id in (("by session id", False), ("by chat id", True)):
+                user, chat, session = self._seed(label)
+                identifier = chat.id if use_chat_id else session.id
+                queries, response = self._end(user, identifier)
+
+                self.stdout.write(f"{label:<15} status={response.status_code} queries={len(queries)}")
+                if response.status_code != 200 or not response.data.get("billing"):
+                    failures.append(f"{label}: unexpected response {response.status_code} {response.data}")
+                if len(queries) > budget:
+                    failures.append(f"{label}: {len(queries)} queries (budget {budget})")
+                    for query in queries:
+                        self.stdout.write(f"    {query['sql']}")
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("; ".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"End-session path stays within {budget} queries"))
+
+    def _seed(self, label):
+        suffix = label.replace(" ", "_")
+        now = timezone.now()
+        user = User.objects.create(username=f"session_end_check_user_{suffix}")
+        UserProfile.objects.create(user=user, wallet_minutes=100)
+        counsellor = User.objects.create(username=f"session_end_check_counsellor_{suffix}")
+        CounsellorProfile.objects.create(user=counsellor)
+        chat = Chat.objects.create(
+            user=user,
+            counsellor=counsellor,
+            status=Chat.STATUS_ACTIVE,
+            started_at=now - timedelta(minutes=12),
+        )
+        session = UpcomingSession.objects.create(
+            user=user,
+            counsellor=counsellor,
+            title="Query budget check",
+            session_type=UpcomingSession.SESSION_TYPE_ONE_ON_ONE,
+            start_time=now - timedelta(minutes=12),
+            counsellor_name=counsellor.username,
+            actual_start_time=now - timedelta(minutes=12),
+            session_status='in_progress',
+        )
+        ChatSession.objects.create(chat=chat, session=session)
+        return user, chat, session
+
+    def _end(self, user, identifier):
+        request = APIRequestFactory().post(f"/api/sessions/{identifier}/end/")
+        force_authenticate(request, user=user)
+        with CaptureQueriesContext(connection) as context:
+            response = SessionEndView.as_view()(request, session_id=identifier)
+        return context.captured_queries, response
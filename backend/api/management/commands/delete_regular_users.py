@@ -1,15 +1,16 @@
 """
 Django management command to delete all regular users (non-counselors, non-doctors).
-Usage: python manage.py delete_regular_users [--confirm]
+Usage: python manage.py delete_regular_users [--confirm] [--batch-size 500]
+
+Users are purged in id-ordered batches with set-based DELETEs (see
+api.utils.purge); each batch commits on its own, so an interrupted run can
+simply be re-run to finish the remaining users.
 """
 
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
-from api.models import (
-    Chat, ChatMessage, UserProfile, CounsellorProfile, DoctorProfile,
-    WellnessTask, WellnessJournalEntry, SupportGroupMembership,
-    UpcomingSession, MoodLog, EmailOTP
-)
+from api.models import CounsellorProfile, DoctorProfile
+from api.utils.purge import PURGE_BATCH_SIZE, purge_users
 
 
 class Command(BaseCommand):
@@ -21,6 +22,12 @@ class Command(BaseCommand):
             action='store_true',
             help='Confirm deletion (required to actually delete)'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PURGE_BATCH_SIZE,
+            help=f'Number of users purged per transaction (default: {PURGE_BATCH_SIZE})'
+        )
 
     def handle(self, *args, **options):
         if not options['confirm']:
@@ -29,13 +36,11 @@ class Command(BaseCommand):
                 'Example: python manage.py delete_regular_users --confirm'
             )
         
-        # Get counselor and doctor user IDs
-        counselor_ids = list(CounsellorProfile.objects.values_list('user_id', flat=True))
-        doctor_ids = list(DoctorProfile.objects.values_list('user_id', flat=True))
-        protected_ids = set(counselor_ids + doctor_ids)
-        
-        # Get all regular users (not counselors or doctors)
-        regular_users = User.objects.exclude(id__in=protected_ids)
+        # All regular users (not counselors or doctors)
+        regular_users = (
+            User.objects.exclude(id__in=CounsellorProfile.objects.values('user_id'))
+            .exclude(id__in=DoctorProfile.objects.values('user_id'))
+        )
         user_count = regular_users.count()
         
         if user_count == 0:
@@ -45,62 +50,22 @@ class Command(BaseCommand):
         self.stdout.write(self.style.WARNING(f"\n{'='*80}"))
         self.stdout.write(self.style.WARNING(f"WARNING: This will delete {user_count} regular users!"))
         self.stdout.write(self.style.WARNING(f"{'='*80}\n"))
-        
-        deleted_count = 0
-        for user in regular_users:
-            try:
-                username = user.username
-                email = user.email
-                user_id = user.id
-                
-                # Delete related data
-                # Chats and messages
-                chats = Chat.objects.filter(user=user)
-                for chat in chats:
-                    ChatMessage.objects.filter(chat=chat).delete()
-                chats.delete()
-                
-                # Assigned chats (if user was a counselor - shouldn't happen for regular users)
-                assigned_chats = Chat.objects.filter(counsellor=user)
-                for chat in assigned_chats:
-                    ChatMessage.objects.filter(chat=chat).delete()
-                assigned_chats.delete()
-                
-                # User profile
-                if hasattr(user, 'profile'):
-                    user.profile.delete()
-                
-                # Wellness tasks
-                WellnessTask.objects.filter(user=user).delete()
-                
-                # Wellness journal entries
-                WellnessJournalEntry.objects.filter(user=user).delete()
-                
-                # Support group memberships
-                SupportGroupMembership.objects.filter(user=user).delete()
-                
-                # Upcoming sessions
-                UpcomingSession.objects.filter(user=user).delete()
-                
-                # Mood logs
-                MoodLog.objects.filter(user=user).delete()
-                
-                # Email OTPs
-                EmailOTP.objects.filter(email=email).delete()
-                
-                # Delete user
-                user.delete()
-                deleted_count += 1
-                
-                self.stdout.write(
-                    self.style.SUCCESS(f"  [OK] Deleted user: {username} ({email})")
-                )
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"  [ERROR] Failed to delete user {user.username}: {e}")
-                )
-        
+
+        def report(done, total, counts):
+            self.stdout.write(f"  Deleted {done}/{total} users")
+
+        try:
+            counts = purge_users(regular_users, batch_size=options['batch_size'], progress=report)
+        except Exception as e:
+            raise CommandError(
+                f"Purge stopped: {e}\n"
+                f"Completed batches are committed; re-run the command to delete the remaining users."
+            )
+
+        self.stdout.write("\nRows removed per table:")
+        for table, count in sorted(counts.items()):
+            self.stdout.write(f"  {table}: {count}")
+
         self.stdout.write(self.style.SUCCESS(f"\n{'='*80}"))
-        self.stdout.write(self.style.SUCCESS(f"Successfully deleted {deleted_count} regular users"))
+        self.stdout.write(self.style.SUCCESS(f"Successfully deleted {counts['auth_user']} regular users"))
         self.stdout.write(self.style.SUCCESS(f"{'='*80}\n"))
-
@@ -3,12 +3,12 @@ Django management command to list all users.
 Usage: python manage.py list_users
 """
 
-from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from api.models import CounsellorProfile, DoctorProfile
+from api.utils.replica import ReplicaReportCommand
 
 
-class Command(BaseCommand):
+class Command(ReplicaReportCommand):
     help = 'List all users in the database'
 
     def add_arguments(self, parser):
@@ -1,13 +1,13 @@
 """
 Django management command to manually check database for saved messages
 """
-from django.core.management.base import BaseCommand
+from api.utils.replica import ReplicaReportCommand
 from django.db import connection
 from api.models import Chat, ChatMessage
 from django.contrib.auth.models import User
 
 
-class Command(BaseCommand):
+class Command(ReplicaReportCommand):
     help = 'Manually check database to see what is actually saved'
 
     def handle(self, *args, **options):
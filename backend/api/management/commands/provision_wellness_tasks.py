@@ -0,0 +1,73 @@
+"""
+Django management command to create default wellness tasks for existing users.
+
+New users get their default tasks when their profile is created; this
+backfills users whose profile predates that.
+Counselors and doctors are skipped.
+
+Usage:
+    python manage.py provision_wellness_tasks
+    python manage.py provision_wellness_tasks --dry-run
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from api.models import CounsellorProfile, DoctorProfile, UserProfile, WellnessTask
+from api.utils.wellness import build_default_tasks, default_task_orders
+
+
+class Command(BaseCommand):
+    help = 'Create default wellness tasks for regular users who have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of users provisioned per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many users would be provisioned',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        pending = (
+            User.objects.exclude(id__in=CounsellorProfile.objects.values('user_id'))
+            .exclude(id__in=DoctorProfile.objects.values('user_id'))
+            .filter(~Exists(WellnessTask.objects.filter(user=OuterRef('pk'))))
+            .order_by('id')
+        )
+        total = pending.count()
+        self.stdout.write(f"Found {total} user(s) without wellness tasks")
+        if options['dry_run'] or total == 0:
+            return
+
+        counters = default_task_orders()
+        provisioned = 0
+        last_id = 0
+        while True:
+            users = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not users:
+                break
+            last_id = users[-1].id
+            user_ids = [user.id for user in users]
+
+            with transaction.atomic():
+                tasks = []
+                for user in users:
+                    tasks.extend(build_default_tasks(user))
+                WellnessTask.objects.bulk_create(tasks, ignore_conflicts=True)
+
+                # Users without a profile get counters seeded on their first insert
+                UserProfile.objects.filter(user_id__in=user_ids).update(**counters)
+
+            provisioned += len(users)
+            self.stdout.write(f"  Provisioned {provisioned}/{total} users")
+
+        self.stdout.write(self.style.SUCCESS(f"Created default wellness tasks for {provisioned} user(s)"))
@@ -0,0 +1,35 @@
+"""
+Management command to recompute the message summary columns of every chat.
+Usage: python manage.py repair_chat_summaries [--batch-size 500] [--dry-run]
+
+The summary (message count, last message time, preview and sender) is kept
+up to date on every message insert (see api.utils.chat_summary); run this
+after deleting or editing messages by hand, or after restoring a backup.
+"""
+from django.core.management.base import BaseCommand
+
+from api.utils.chat_summary import REPAIR_BATCH_SIZE, repair_chat_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute message count and last message of every chat in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=REPAIR_BATCH_SIZE,
+            help=f'Number of chats recomputed per transaction (default: {REPAIR_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many chats have drifted'
+        )
+
+    def handle(self, *args, **options):
+        checked, drifted = repair_chat_summaries(options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"{drifted} of {checked} chats have a stale message summary")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Repaired {drifted} of {checked} chats"))
@@ -0,0 +1,85 @@
+"""
+Django management command delivering queued emails (the email outbox).
+
+Request handlers queue mail with api.utils.email_outbox.enqueue_email; this
+command sends it in batches over one SMTP connection, retrying failures with
+backoff, then deletes sent and failed messages older than --retention-hours
+(they contain OTP codes).  Run it once (e.g. every minute from cron) or keep
+it running with --loop, which polls every --interval seconds; several
+workers can run side by side.
+
+Usage:
+    python manage.py send_outbox_emails
+    python manage.py send_outbox_emails --loop --interval 1
+    python manage.py send_outbox_emails --batch-size 200 --retention-hours 6
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.utils.email_outbox import OUTBOX_BATCH_SIZE, OUTBOX_RETENTION, drain_outbox, purge_outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help=f'Messages claimed per batch (default: {OUTBOX_BATCH_SIZE})',
+        )
+        retention_hours = OUTBOX_RETENTION.total_seconds() / 3600
+        parser.add_argument(
+            '--retention-hours',
+            type=float,
+            default=retention_hours,
+            help=f'Delete sent and failed messages after this many hours (default: {retention_hours:g})',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the outbox',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds between polls with --loop (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        retention = timedelta(hours=options['retention_hours'])
+        if not options['loop']:
+            self.report(self.run_once(options['batch_size'], retention))
+            return
+
+        self.stdout.write(f"Polling the email outbox every {options['interval']}s (Ctrl+C to stop)")
+        try:
+            while True:
+                close_old_connections()
+                stats = self.run_once(options['batch_size'], retention)
+                if stats:
+                    self.report(stats)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
+
+    def run_once(self, batch_size, retention):
+        stats = drain_outbox(batch_size=batch_size)
+        stats["deleted"] += purge_outbox(retention)
+        # Counter keeps zero entries; drop them so an idle poll stays quiet
+        return +stats
+
+    def report(self, stats):
+        message = ", ".join(
+            f"{stats[key]} {key}" for key in ("sent", "retried", "failed", "expired", "deleted") if stats[key]
+        )
+        logger.info("Email outbox: %s", message or "nothing due")
+        self.stdout.write(f"Email outbox: {message or 'nothing due'}")
@@ -1,13 +1,13 @@
 """
 Django management command to show Chat and ChatMessage table structure and data
 """
-from django.core.management.base import BaseCommand
+from api.utils.replica import ReplicaReportCommand
 from django.db import connection
 from api.models import Chat, ChatMessage
 from django.contrib.auth.models import User
 
 
-class Command(BaseCommand):
+class Command(ReplicaReportCommand):
     help = 'Show Chat and ChatMessage table structure and data'
 
     def handle(self, *args, **options):
@@ -0,0 +1,37 @@
+"""
+Django management command copying the SQLite primary into the replica file.
+Usage: python manage.py sync_sqlite_replica
+
+Stands in for replication when trying read-replica routing locally with two
+SQLite files (DB_NAME and DB_REPLICA_NAME). Uses SQLite's online backup API,
+so it is safe to run while the server is writing.
+"""
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.utils.replica import REPLICA_DB_ALIAS, replica_configured
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary database into the SQLite replica file'
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('No replica database configured. Set DB_REPLICA_NAME to a SQLite file path.')
+        primary = connections.databases[DEFAULT_DB_ALIAS]
+        replica = connections.databases[REPLICA_DB_ALIAS]
+        if not (primary['ENGINE'].endswith('sqlite3') and replica['ENGINE'].endswith('sqlite3')):
+            raise CommandError('sync_sqlite_replica only works when both databases are SQLite files.')
+
+        # Drop the replica's own connection so it does not hold the old file open
+        connections[REPLICA_DB_ALIAS].close()
+        source = sqlite3.connect(str(primary['NAME']))
+        target = sqlite3.connect(str(replica['NAME']))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f"Copied {primary['NAME']} to {replica['NAME']}"))
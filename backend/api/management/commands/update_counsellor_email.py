@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from api.models import CounsellorProfile
+from api.utils.emails import users_by_email
 
 
 class Command(BaseCommand):
@@ -28,7 +29,7 @@ class Command(BaseCommand):
             user = User.objects.get(username=username)
             
             # Check if email is already taken
-            if User.objects.filter(email__iexact=new_email).exclude(username=username).exists():
+            if users_by_email(new_email).exclude(username=username).exists():
                 self.stdout.write(
                     self.style.ERROR(f'Email "{new_email}" is already in use by another user.')
                 )
@@ -9,6 +9,8 @@ from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
+from .authentication import token_role
+
 User = get_user_model()
 
 
@@ -31,6 +33,8 @@ class JWTAuthMiddleware(BaseMiddleware):
                 user_id = access_token.get("user_id")
                 user = await self.get_user(user_id)
                 scope["user"] = user
+                # Role claim (None for tokens issued without claims)
+                scope["role"] = token_role(access_token)
             except (TokenError, InvalidToken, User.DoesNotExist):
                 scope["user"] = AnonymousUser()
         else:
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+
+DEFAULT_SUPPORT_GROUPS = [
+    {
+        "slug": "anxiety-support",
+        "name": "Anxiety Support",
+        "description": "Discuss and manage anxiety together.",
+        "icon": "people_alt_rounded",
+    },
+    {
+        "slug": "career-stress",
+        "name": "Career Stress",
+        "description": "Talk about workplace pressure and burnout.",
+        "icon": "work_outline_rounded",
+    },
+    {
+        "slug": "relationships",
+        "name": "Relationships",
+        "description": "Express emotions and build healthy connections.",
+        "icon": "favorite_outline_rounded",
+    },
+    {
+        "slug": "general-awareness",
+        "name": "General Awareness",
+        "description": "Learn self-care and mental health awareness.",
+        "icon": "self_improvement_rounded",
+    },
+]
+
+
+def seed_support_groups(apps, schema_editor):
+    SupportGroup = apps.get_model("api", "SupportGroup")
+    existing_slugs = set(SupportGroup.objects.values_list("slug", flat=True))
+    SupportGroup.objects.bulk_create(
+        [
+            SupportGroup(**item)
+            for item in DEFAULT_SUPPORT_GROUPS
+            if item["slug"] not in existing_slugs
+        ]
+    )
+
+
+def remove_support_groups(apps, schema_editor):
+    # Groups may have members by now; leave them in place on rollback
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0026_chat_billed_amount_chat_billing_processed_at_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_support_groups, reverse_code=remove_support_groups),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:04
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+ORDER_FIELDS = {
+    "daily": "daily_task_order",
+    "evening": "evening_task_order",
+}
+
+
+def backfill_task_orders(apps, schema_editor):
+    """Seed the counters from existing tasks with one grouped aggregate."""
+    UserProfile = apps.get_model("api", "UserProfile")
+    WellnessTask = apps.get_model("api", "WellnessTask")
+
+    counters = {}
+    rows = (
+        WellnessTask.objects.values("user_id", "category")
+        .annotate(max_order=Max("order"))
+        .order_by()
+    )
+    for row in rows:
+        field = ORDER_FIELDS.get(row["category"])
+        if field:
+            counters.setdefault(row["user_id"], {})[field] = row["max_order"] or 0
+
+    profiles = list(UserProfile.objects.filter(user_id__in=list(counters)))
+    for profile in profiles:
+        for field, value in counters[profile.user_id].items():
+            setattr(profile, field, value)
+    UserProfile.objects.bulk_update(profiles, list(ORDER_FIELDS.values()), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_seed_default_support_groups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='daily_task_order',
+            field=models.PositiveIntegerField(default=0, help_text='Last display order assigned to a daily wellness task'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='evening_task_order',
+            field=models.PositiveIntegerField(default=0, help_text='Last display order assigned to an evening wellness task'),
+        ),
+        migrations.RunPython(backfill_task_orders, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_userprofile_wellness_task_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the chat and session were linked')),
+                ('chat', models.OneToOneField(help_text='Chat conducted in this session', on_delete=django.db.models.deletion.CASCADE, related_name='session_link', to='api.chat')),
+                ('session', models.OneToOneField(help_text='Session this chat belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='chat_link', to='api.upcomingsession')),
+            ],
+            options={
+                'verbose_name': 'Chat Session',
+                'verbose_name_plural': 'Chat Sessions',
+            },
+        ),
+    ]
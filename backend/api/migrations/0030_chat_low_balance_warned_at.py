@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_chatsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='low_balance_warned_at',
+            field=models.DateTimeField(blank=True, help_text='When the user was warned that the running cost will exceed their wallet balance', null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:11
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_billed_through(apps, schema_editor):
+    """Active chats already billed incrementally: 1 rupee == 1 billed minute."""
+    Chat = apps.get_model("api", "Chat")
+    chats = list(
+        Chat.objects.filter(status="active", started_at__isnull=False, billed_amount__gt=0)
+        .only("id", "started_at", "billed_amount")
+    )
+    for chat in chats:
+        chat.billed_through = chat.started_at + timedelta(minutes=int(chat.billed_amount))
+    Chat.objects.bulk_update(chats, ["billed_through"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_chat_low_balance_warned_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='billed_through',
+            field=models.DateTimeField(blank=True, help_text='Checkpoint up to which an active chat has been billed incrementally', null=True),
+        ),
+        migrations.RunPython(backfill_billed_through, reverse_code=migrations.RunPython.noop),
+    ]
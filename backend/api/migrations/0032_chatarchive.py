@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0031_chat_billed_through'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('messages_blob', models.BinaryField(help_text='Archived messages as gzip-compressed JSON lines')),
+                ('message_count', models.PositiveIntegerField(default=0, help_text='Number of messages in the archive')),
+                ('first_message_at', models.DateTimeField(blank=True, help_text='Creation time of the oldest archived message', null=True)),
+                ('last_message_at', models.DateTimeField(blank=True, help_text='Creation time of the newest archived message', null=True)),
+                ('archived_at', models.DateTimeField(auto_now=True, help_text='When messages were last moved into the archive')),
+                ('chat', models.OneToOneField(help_text='Chat whose messages are archived', on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='api.chat')),
+            ],
+            options={
+                'verbose_name': 'Chat Archive',
+                'verbose_name_plural': 'Chat Archives',
+            },
+        ),
+    ]
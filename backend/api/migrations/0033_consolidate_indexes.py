@@ -0,0 +1,121 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:19
+#
+# Drops indexes reported by `manage.py advise_indexes`: single-column indexes
+# (mostly foreign keys) that are the leading column of a composite index,
+# mirrored and unused deduplication indexes on ChatMessage, the counsellor /
+# status index the queued-chat index already serves, and indexes repeating a
+# unique constraint.
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0032_chatarchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chat',
+            name='api_chat_counsel_b6e460_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='api_chatmes_chat_id_c99b7e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='chat_client_msg_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='sender_client_msg_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='emailotp',
+            name='api_emailot_token_79673b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='userprofile',
+            name='api_userpro_user_id_ea9cd5_idx',
+        ),
+        migrations.AlterField(
+            model_name='call',
+            name='counsellor',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Counselor for this call', limit_choices_to={'counsellorprofile__isnull': False}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='counsellor_calls', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='call',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='User who initiated the call', on_delete=django.db.models.deletion.CASCADE, related_name='user_calls', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='chat',
+            name='counsellor',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Counselor assigned to this chat (null for queued chats)', limit_choices_to={'counsellorprofile__isnull': False}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_chats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='chat',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('active', 'Active'), ('inactive', 'Inactive'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='queued', help_text='Current status of the chat', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='chat',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='User who initiated this chat', on_delete=django.db.models.deletion.CASCADE, related_name='chats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='chat',
+            field=models.ForeignKey(db_index=False, help_text='Chat this message belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='api.chat'),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='client_message_id',
+            field=models.CharField(blank=True, help_text='Client-generated UUID for deduplication', max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='sender',
+            field=models.ForeignKey(db_index=False, help_text='User who sent this message', on_delete=django.db.models.deletion.CASCADE, related_name='sent_messages', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='moodlog',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='User who recorded this mood', on_delete=django.db.models.deletion.CASCADE, related_name='mood_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='supportgroupmembership',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='User who is a member', on_delete=django.db.models.deletion.CASCADE, related_name='support_group_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='upcomingsession',
+            name='counsellor',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Counselor assigned to this session', limit_choices_to={'counsellorprofile__isnull': False}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='counsellor_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='upcomingsession',
+            name='session_status',
+            field=models.CharField(choices=[('scheduled', 'Scheduled'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('no_show', 'No Show')], default='scheduled', help_text='Current status of the session', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='upcomingsession',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='User who scheduled this session', on_delete=django.db.models.deletion.CASCADE, related_name='upcoming_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='wellnessjournalentry',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='User who owns this journal entry', on_delete=django.db.models.deletion.CASCADE, related_name='wellness_journal_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='wellnesstask',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='User who owns this task', on_delete=django.db.models.deletion.CASCADE, related_name='wellness_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+
+def backfill_message_summary(apps, schema_editor):
+    """
+    Fill the summary from live messages plus archive counts in one UPDATE.
+
+    Chats whose newest message is archived keep an empty last message until
+    ``manage.py repair_chat_summaries`` runs.
+    """
+    Chat = apps.get_model('api', 'Chat')
+    ChatMessage = apps.get_model('api', 'ChatMessage')
+    ChatArchive = apps.get_model('api', 'ChatArchive')
+    messages = ChatMessage.objects.filter(chat=OuterRef('pk'))
+    latest = messages.order_by('-created_at', '-id')
+    live_count = messages.order_by().values('chat').annotate(count=Count('id')).values('count')
+    archived_count = ChatArchive.objects.filter(chat=OuterRef('pk')).values('message_count')
+    Chat.objects.update(
+        message_count=Coalesce(Subquery(live_count), 0) + Coalesce(Subquery(archived_count), 0),
+        last_message_at=Subquery(latest.values('created_at')[:1]),
+        last_message_preview=Coalesce(Substr(Subquery(latest.values('text')[:1]), 1, 120), Value('')),
+        last_sender_id=Subquery(latest.values('sender_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_consolidate_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, help_text='Creation time of the latest message', null=True),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_preview',
+            field=models.CharField(blank=True, help_text="Start of the latest message's text", max_length=120),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_sender',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Sender of the latest message', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='last_message_chats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of messages in this chat, including archived ones'),
+        ),
+        migrations.RunPython(backfill_message_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_sequences(apps, schema_editor):
+    """
+    Number existing live messages per chat (after any archived ones) and
+    start every participant with everything read, so existing chats do not
+    light up with unread badges.
+    """
+    Chat = apps.get_model('api', 'Chat')
+    ChatMessage = apps.get_model('api', 'ChatMessage')
+    ChatArchive = apps.get_model('api', 'ChatArchive')
+    ChatReadState = apps.get_model('api', 'ChatReadState')
+
+    archived = dict(ChatArchive.objects.values_list('chat_id', 'message_count'))
+    pending = []
+    current_chat, seq = None, 0
+    for message in ChatMessage.objects.order_by('chat_id', 'created_at', 'id').only('id', 'chat_id').iterator(BATCH_SIZE):
+        if message.chat_id != current_chat:
+            current_chat, seq = message.chat_id, archived.get(message.chat_id, 0)
+        seq += 1
+        message.seq = seq
+        pending.append(message)
+        if len(pending) >= BATCH_SIZE:
+            ChatMessage.objects.bulk_update(pending, ['seq'])
+            pending = []
+    if pending:
+        ChatMessage.objects.bulk_update(pending, ['seq'])
+
+    states = []
+    for chat_id, user_id, counsellor_id, message_count in Chat.objects.values_list(
+        'id', 'user_id', 'counsellor_id', 'message_count'
+    ).iterator(BATCH_SIZE):
+        for participant in {user_id, counsellor_id} - {None}:
+            states.append(ChatReadState(chat_id=chat_id, user_id=participant, last_read_seq=message_count))
+        if len(states) >= BATCH_SIZE:
+            ChatReadState.objects.bulk_create(states, ignore_conflicts=True)
+            states = []
+    ChatReadState.objects.bulk_create(states, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0034_chat_message_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='seq',
+            field=models.PositiveIntegerField(blank=True, help_text='Position of the message in its chat, assigned from Chat.message_count', null=True),
+        ),
+        migrations.CreateModel(
+            name='ChatReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_seq', models.PositiveIntegerField(default=0, help_text='Sequence number of the newest message read')),
+                ('last_read_message_id', models.PositiveBigIntegerField(blank=True, help_text='Id of the newest message read (not a foreign key: archival deletes message rows)', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='When the watermark last moved')),
+                ('chat', models.ForeignKey(db_index=False, help_text='Chat being read', on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='api.chat')),
+                ('user', models.ForeignKey(help_text='Participant who read the chat', on_delete=django.db.models.deletion.CASCADE, related_name='chat_read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Chat Read State',
+                'verbose_name_plural': 'Chat Read States',
+                'constraints': [models.UniqueConstraint(fields=('chat', 'user'), name='unique_chat_read_state')],
+            },
+        ),
+        migrations.RunPython(backfill_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+INDEX_NAME = "auth_user_email_lower"
+
+
+def create_index(apps, schema_editor):
+    """
+    Expression index on LOWER(email) for case-insensitive email lookups.
+
+    auth_user belongs to django.contrib.auth, so the index cannot be declared
+    in a model's Meta.  PostgreSQL builds it concurrently so a large user
+    table stays writable; SQLite supports the same expression index directly.
+    """
+    concurrently = "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    schema_editor.execute(f"CREATE INDEX {concurrently}IF NOT EXISTS {INDEX_NAME} ON auth_user (LOWER(email))")
+
+
+def drop_index(apps, schema_editor):
+    concurrently = "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    schema_editor.execute(f"DROP INDEX {concurrently}IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0035_chat_read_state'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
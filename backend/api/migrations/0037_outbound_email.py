@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_auth_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to_email', models.EmailField(help_text='Recipient address', max_length=254)),
+                ('from_email', models.CharField(blank=True, help_text='Sender address (DEFAULT_FROM_EMAIL when blank)', max_length=255)),
+                ('subject', models.CharField(help_text='Subject line', max_length=255)),
+                ('body', models.TextField(help_text='Plain text body')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', help_text='Delivery status', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Number of delivery attempts')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the worker may next pick the message up (retry backoff or claim lease)')),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Give up delivering after this time (e.g. when the OTP inside expires)', null=True)),
+                ('last_error', models.TextField(blank=True, help_text='Error from the last failed attempt')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the message was queued')),
+                ('sent_at', models.DateTimeField(blank=True, help_text='When the message was delivered', null=True)),
+            ],
+            options={
+                'verbose_name': 'Outbound email',
+                'verbose_name_plural': 'Outbound emails',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='api_outboun_status_d67332_idx')],
+            },
+        ),
+    ]
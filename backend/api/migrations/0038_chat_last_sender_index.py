@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 23:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0037_outbound_email'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chat',
+            name='last_sender',
+            field=models.ForeignKey(blank=True, help_text='Sender of the latest message', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='last_message_chats', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
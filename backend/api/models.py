@@ -81,6 +81,16 @@ class UserProfile(models.Model):
         help_text="Preferred language"
     )
     
+    # Wellness task ordering counters (last order assigned per category)
+    daily_task_order = models.PositiveIntegerField(
+        default=0,
+        help_text="Last display order assigned to a daily wellness task"
+    )
+    evening_task_order = models.PositiveIntegerField(
+        default=0,
+        help_text="Last display order assigned to an evening wellness task"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -93,7 +103,6 @@ class UserProfile(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=["user"]),
             models.Index(fields=["wallet_minutes"]),
         ]
         verbose_name = "User Profile"
@@ -105,7 +114,7 @@ class UserProfile(models.Model):
     def save(self, *args, **kwargs):
         """Ensure profile is always saved with timestamps."""
         super().save(*args, **kwargs)
-        logger.debug(f"UserProfile saved: user={self.user_id}, wallet={self.wallet_minutes}")
+        logger.debug("UserProfile saved: user=%s, wallet=%s", self.user_id, self.wallet_minutes)
 
 
 class CounsellorProfile(models.Model):
@@ -269,6 +278,7 @@ class Chat(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="chats",
+        db_index=False,
         help_text="User who initiated this chat"
     )
     
@@ -279,6 +289,7 @@ class Chat(models.Model):
         blank=True,
         related_name="assigned_chats",
         limit_choices_to={"counsellorprofile__isnull": False},
+        db_index=False,
         help_text="Counselor assigned to this chat (null for queued chats)"
     )
     
@@ -287,7 +298,6 @@ class Chat(models.Model):
         max_length=20,
         choices=STATUS_CHOICES,
         default=STATUS_QUEUED,
-        db_index=True,
         help_text="Current status of the chat"
     )
     
@@ -346,6 +356,44 @@ class Chat(models.Model):
         blank=True,
         help_text="When billing was processed"
     )
+    billed_through = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Checkpoint up to which an active chat has been billed incrementally"
+    )
+    low_balance_warned_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the user was warned that the running cost will exceed their wallet balance"
+    )
+
+    # Message summary (maintained by utils.chat_summary.create_message in the
+    # message insert's transaction, so the inbox never reads ChatMessage)
+    message_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of messages in this chat, including archived ones"
+    )
+    last_message_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Creation time of the latest message"
+    )
+    last_message_preview = models.CharField(
+        max_length=120,
+        blank=True,
+        help_text="Start of the latest message's text"
+    )
+    # Indexed (the FK default): the user purge nulls it out by sender
+    last_sender = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="last_message_chats",
+        help_text="Sender of the latest message"
+    )
+
+    MESSAGE_SUMMARY_FIELDS = ("message_count", "last_message_at", "last_message_preview", "last_sender")
 
     class Meta:
         ordering = ("-created_at", "-id")
@@ -356,9 +404,8 @@ class Chat(models.Model):
             models.Index(fields=["counsellor", "-created_at"]),
             # Status queries
             models.Index(fields=["status", "-created_at"]),
-            # Counselor status queries (for dashboard)
-            models.Index(fields=["counsellor", "status"]),
-            # Queued chats (counsellor is null, status is queued)
+            # Queued chats (counsellor is null, status is queued) and
+            # counselor status queries
             models.Index(fields=["status", "counsellor"], name="chat_queued_idx"),
         ]
         verbose_name = "Chat"
@@ -391,7 +438,7 @@ class Chat(models.Model):
         if self.status == self.STATUS_ACTIVE and not self.started_at:
             self.started_at = timezone.now()
             fields_to_update.add('started_at')
-            logger.info(f"Chat {self.id} started at {self.started_at}")
+            logger.info("Chat %s started at %s", self.id, self.started_at)
 
         # Auto-set ended_at when chat is inactive, completed, or cancelled
         ending_chat = False
@@ -401,7 +448,7 @@ class Chat(models.Model):
         if self.status in [self.STATUS_INACTIVE, self.STATUS_COMPLETED, self.STATUS_CANCELLED]:
             if old_status != self.status:
                 status_changed_to_ending = True
-                logger.info(f"Chat {self.id} status changed to {self.status} (was {old_status})")
+                logger.info("Chat %s status changed to %s (was %s)", self.id, self.status, old_status)
             
             if not self.ended_at:
                 ending_chat = True
@@ -413,17 +460,25 @@ class Chat(models.Model):
                     # For completed/cancelled or no last_user_activity, set ended_at to now
                     self.ended_at = timezone.now()
                 fields_to_update.add('ended_at')
-                logger.info(f"Chat {self.id} ended at {self.ended_at} with status {self.status}")
+                logger.info("Chat %s ended at %s with status %s", self.id, self.ended_at, self.status)
             elif status_changed_to_ending:
                 # Status changed but ended_at already set - still need to process billing
                 ending_chat = True
-                logger.info(f"Chat {self.id} status changed to {self.status}, ended_at already set: {self.ended_at}")
+                logger.info("Chat %s status changed to %s, ended_at already set: %s", self.id, self.status, self.ended_at)
 
         # updated_at is auto-managed by Django (auto_now=True) so no need to set it here,
         # but keep the safe fallback if needed:
         if not getattr(self, "updated_at", None):
             self.updated_at = timezone.now()
 
+        # The message summary is maintained with atomic UPDATEs; a full save of
+        # a stale instance must not roll it back
+        if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MESSAGE_SUMMARY_FIELDS
+            ]
+
         # If update_fields is specified, ensure we include any fields we modified
         if 'update_fields' in kwargs and kwargs['update_fields'] is not None:
             # Convert to list if it's a tuple
@@ -452,10 +507,13 @@ class Chat(models.Model):
         
         if should_process_billing:
             logger.info(
-                f"Chat {self.id} ended - triggering billing: "
-                f"status={self.status}, started_at={self.started_at}, ended_at={self.ended_at}, "
-                f"user={self.user.username if self.user else None}, is_billed={self.is_billed}, "
-                f"ending_chat={ending_chat}, status_changed={status_changed_to_ending}"
+                "Chat %s ended - triggering billing: "
+                "status=%s, started_at=%s, ended_at=%s, "
+                "user=%s, is_billed=%s, "
+                "ending_chat=%s, status_changed=%s",
+                self.id, self.status, self.started_at, self.ended_at,
+                self.user.username if self.user else None, self.is_billed, ending_chat,
+                status_changed_to_ending
             )
             # Mark to prevent recursion
             self._billing_processing = True
@@ -468,42 +526,41 @@ class Chat(models.Model):
                 # Double-check that started_at is set (it should have been saved above)
                 if not self.started_at:
                     logger.warning(
-                        f"⚠️ Chat {self.id} ended but started_at is None after refresh. "
-                        f"This may prevent billing. Old status was {old_status}, new status is {self.status}."
+                        "⚠️ Chat %s ended but started_at is None after refresh. "
+                        "This may prevent billing. Old status was %s, new status is %s.",
+                        self.id, old_status, self.status
                     )
                 
                 # Calculate billing and deduct from wallet
                 success = calculate_and_deduct_chat_billing(self)
                 if success:
-                    logger.info(f"✅ Billing processed successfully for chat {self.id}")
+                    logger.info("✅ Billing processed successfully for chat %s", self.id)
                 else:
                     logger.error(
-                        f"❌ Billing processing failed for chat {self.id}. "
-                        f"This may be due to insufficient wallet balance or an error during deduction."
+                        "❌ Billing processing failed for chat %s. "
+                        "This may be due to insufficient wallet balance or an error during deduction.",
+                        self.id
                     )
             except Exception as e:
-                logger.error(f"❌ Error processing billing for chat {self.id}: {e}", exc_info=True)
+                logger.error("❌ Error processing billing for chat %s: %s", self.id, e, exc_info=True)
             finally:
                 # Clear flag
                 self._billing_processing = False
         elif (ending_chat or status_changed_to_ending) and self.is_billed:
-            logger.debug(f"Chat {self.id} already billed, skipping billing calculation")
+            logger.debug("Chat %s already billed, skipping billing calculation", self.id)
         elif ending_chat or status_changed_to_ending:
             logger.debug(
-                f"Chat {self.id} ended but billing skipped: "
-                f"is_billed={self.is_billed}, started_at={self.started_at}, ended_at={self.ended_at}"
+                "Chat %s ended but billing skipped: "
+                "is_billed=%s, started_at=%s, ended_at=%s",
+                self.id, self.is_billed, self.started_at, self.ended_at
             )
 
         logger.debug(
-            f"Chat {self.id} saved: user={self.user_id}, counsellor={self.counsellor_id}, "
-            f"status={self.status}, created_at={self.created_at}, updated_at={self.updated_at}"
+            "Chat %s saved: user=%s, counsellor=%s, "
+            "status=%s, created_at=%s, updated_at=%s",
+            self.id, self.user_id, self.counsellor_id, self.status, self.created_at, self.updated_at
         )
     
-    @property
-    def message_count(self) -> int:
-        """Get the number of messages in this chat."""
-        return self.messages.count()
-    
     @property
     def current_duration_minutes(self) -> int:
         """Calculate current duration in minutes (for active chats)."""
@@ -574,7 +631,7 @@ class Chat(models.Model):
         self.save(update_fields=['counsellor', 'status', 'started_at', 'updated_at'])
         
         logger.info(
-            f"Chat {self.id} assigned to counselor {counsellor.username} (ID: {counsellor.id})"
+            "Chat %s assigned to counselor %s (ID: %s)", self.id, counsellor.username, counsellor.id
         )
     
     def complete(self) -> None:
@@ -588,7 +645,7 @@ class Chat(models.Model):
         
         self.save(update_fields=['status', 'ended_at', 'started_at', 'updated_at'])
         
-        logger.info(f"Chat {self.id} completed at {self.ended_at}")
+        logger.info("Chat %s completed at %s", self.id, self.ended_at)
     
     def cancel(self) -> None:
         """Cancel the chat and set ended_at timestamp."""
@@ -601,7 +658,7 @@ class Chat(models.Model):
         
         self.save(update_fields=['status', 'ended_at', 'started_at', 'updated_at'])
         
-        logger.info(f"Chat {self.id} cancelled at {self.ended_at}")
+        logger.info("Chat %s cancelled at %s", self.id, self.ended_at)
     
     def reopen(self) -> None:
         """
@@ -610,7 +667,7 @@ class Chat(models.Model):
         Updates last_user_activity to current time.
         """
         if self.status not in [self.STATUS_COMPLETED, self.STATUS_INACTIVE, self.STATUS_CANCELLED]:
-            logger.warning(f"Chat {self.id} is already active (status: {self.status}), no need to reopen")
+            logger.warning("Chat %s is already active (status: %s), no need to reopen", self.id, self.status)
             return
         
         old_status = self.status
@@ -623,7 +680,7 @@ class Chat(models.Model):
         
         self.save(update_fields=['status', 'ended_at', 'started_at', 'last_user_activity', 'updated_at'])
         
-        logger.info(f"Chat {self.id} reopened from {old_status} to active status")
+        logger.info("Chat %s reopened from %s to active status", self.id, old_status)
     
     def mark_inactive(self) -> None:
         """
@@ -631,7 +688,7 @@ class Chat(models.Model):
         Sets ended_at timestamp to when inactivity occurred.
         """
         if self.status != self.STATUS_ACTIVE:
-            logger.warning(f"Chat {self.id} cannot be marked inactive (current status: {self.status})")
+            logger.warning("Chat %s cannot be marked inactive (current status: %s)", self.id, self.status)
             return
         
         old_status = self.status
@@ -642,7 +699,7 @@ class Chat(models.Model):
             self.ended_at = self.last_user_activity + timedelta(minutes=5)
         
         self.save(update_fields=['status', 'ended_at', 'updated_at'])
-        logger.info(f"Chat {self.id} marked as inactive (user inactive for 5+ minutes)")
+        logger.info("Chat %s marked as inactive (user inactive for 5+ minutes)", self.id)
 
 
 class ChatMessage(models.Model):
@@ -657,6 +714,7 @@ class ChatMessage(models.Model):
     - sender: ForeignKey to User (CASCADE delete)
     - text: Message content
     - client_message_id: UUID from client for deduplication
+    - seq: Position of the message in its chat (1, 2, ...), for unread counts
     - created_at: When message was created (auto-set)
     - updated_at: Last update (auto-managed)
     """
@@ -664,12 +722,14 @@ class ChatMessage(models.Model):
         Chat,
         on_delete=models.CASCADE,
         related_name="messages",
+        db_index=False,
         help_text="Chat this message belongs to"
     )
     sender = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name="sent_messages",
+        db_index=False,
         help_text="User who sent this message"
     )
     text = models.TextField(
@@ -679,9 +739,13 @@ class ChatMessage(models.Model):
         max_length=64,
         null=True,
         blank=True,
-        db_index=True,
         help_text="Client-generated UUID for deduplication"
     )
+    seq = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Position of the message in its chat, assigned from Chat.message_count"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         db_index=True,
@@ -695,18 +759,14 @@ class ChatMessage(models.Model):
     class Meta:
         ordering = ("created_at", "id")
         indexes = [
-            # Messages ordered by time
+            # Messages ordered by time (scanned backwards for newest first)
             models.Index(fields=["chat", "created_at"]),
             # Sender's messages
             models.Index(fields=["sender", "-created_at"]),
-            # Chat messages reverse order
-            models.Index(fields=["chat", "-created_at"]),
-            # Deduplication lookups
-            models.Index(fields=["chat", "client_message_id"], name="chat_client_msg_idx"),
-            models.Index(fields=["sender", "client_message_id"], name="sender_client_msg_idx"),
         ]
         constraints = [
             # Prevent duplicate messages from same sender with same client_message_id
+            # (also the index behind deduplication lookups)
             models.UniqueConstraint(
                 fields=['sender', 'client_message_id'],
                 condition=Q(client_message_id__isnull=False),
@@ -730,11 +790,105 @@ class ChatMessage(models.Model):
         super().save(*args, **kwargs)
         
         logger.debug(
-            f"ChatMessage {self.id} saved: chat={self.chat_id}, sender={self.sender_id}, "
-            f"text_length={len(self.text)}, created_at={self.created_at}"
+            "ChatMessage %s saved: chat=%s, sender=%s, "
+            "text_length=%s, created_at=%s",
+            self.id, self.chat_id, self.sender_id, len(self.text), self.created_at
         )
 
 
+class ChatArchive(models.Model):
+    """
+    Compressed archive of a finished chat's messages.
+
+    Messages of chats completed long ago are moved out of ChatMessage into a
+    single gzip-compressed JSONL blob per chat (see api.utils.chat_archive),
+    keeping the hot message table and its indexes small.  History reads
+    merge archived and live messages transparently.
+    """
+    chat = models.OneToOneField(
+        Chat,
+        on_delete=models.CASCADE,
+        related_name="archive",
+        help_text="Chat whose messages are archived"
+    )
+    messages_blob = models.BinaryField(
+        help_text="Archived messages as gzip-compressed JSON lines"
+    )
+    message_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of messages in the archive"
+    )
+    first_message_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Creation time of the oldest archived message"
+    )
+    last_message_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Creation time of the newest archived message"
+    )
+    archived_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When messages were last moved into the archive"
+    )
+
+    class Meta:
+        verbose_name = "Chat Archive"
+        verbose_name_plural = "Chat Archives"
+
+    def __str__(self) -> str:
+        return f"Archive of chat {self.chat_id} ({self.message_count} messages)"
+
+
+class ChatReadState(models.Model):
+    """
+    Read watermark of one participant in one chat.
+
+    ``last_read_seq`` is the ``ChatMessage.seq`` of the newest message the
+    participant has read, so their unread count is
+    ``Chat.message_count - last_read_seq`` without counting messages (see
+    api.utils.read_state).
+    """
+    chat = models.ForeignKey(
+        Chat,
+        on_delete=models.CASCADE,
+        related_name="read_states",
+        db_index=False,
+        help_text="Chat being read"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="chat_read_states",
+        help_text="Participant who read the chat"
+    )
+    last_read_seq = models.PositiveIntegerField(
+        default=0,
+        help_text="Sequence number of the newest message read"
+    )
+    last_read_message_id = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Id of the newest message read (not a foreign key: archival deletes message rows)"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the watermark last moved"
+    )
+
+    class Meta:
+        constraints = [
+            # One watermark per participant (also the index behind unread lookups)
+            models.UniqueConstraint(fields=["chat", "user"], name="unique_chat_read_state"),
+        ]
+        verbose_name = "Chat Read State"
+        verbose_name_plural = "Chat Read States"
+
+    def __str__(self) -> str:
+        return f"Chat {self.chat_id} read by {self.user_id} up to #{self.last_read_seq}"
+
+
 # ============================================================================
 # SESSION MODELS
 # ============================================================================
@@ -762,6 +916,7 @@ class UpcomingSession(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="upcoming_sessions",
+        db_index=False,
         help_text="User who scheduled this session"
     )
     counsellor = models.ForeignKey(
@@ -771,6 +926,7 @@ class UpcomingSession(models.Model):
         blank=True,
         related_name="counsellor_sessions",
         limit_choices_to={"counsellorprofile__isnull": False},
+        db_index=False,
         help_text="Counselor assigned to this session"
     )
     title = models.CharField(
@@ -821,7 +977,6 @@ class UpcomingSession(models.Model):
             ('no_show', 'No Show'),
         ],
         default='scheduled',
-        db_index=True,
         help_text="Current status of the session"
     )
     
@@ -887,6 +1042,38 @@ class UpcomingSession(models.Model):
         return f"{self.user.username} -> {self.title} @ {self.start_time}"
 
 
+class ChatSession(models.Model):
+    """
+    Explicit link between a Chat and the UpcomingSession it is conducted in.
+
+    Created when a session is started from a chat, so ending either side can
+    reach the other directly instead of guessing by user and counselor.
+    """
+    chat = models.OneToOneField(
+        Chat,
+        on_delete=models.CASCADE,
+        related_name="session_link",
+        help_text="Chat conducted in this session"
+    )
+    session = models.OneToOneField(
+        UpcomingSession,
+        on_delete=models.CASCADE,
+        related_name="chat_link",
+        help_text="Session this chat belongs to"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the chat and session were linked"
+    )
+
+    class Meta:
+        verbose_name = "Chat Session"
+        verbose_name_plural = "Chat Sessions"
+
+    def __str__(self) -> str:
+        return f"Chat {self.chat_id} <-> Session {self.session_id}"
+
+
 class Call(models.Model):
     """
     Model for video/voice calls between users and counselors.
@@ -922,6 +1109,7 @@ class Call(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="user_calls",
+        db_index=False,
         help_text="User who initiated the call"
     )
     counsellor = models.ForeignKey(
@@ -931,6 +1119,7 @@ class Call(models.Model):
         blank=True,
         related_name="counsellor_calls",
         limit_choices_to={"counsellorprofile__isnull": False},
+        db_index=False,
         help_text="Counselor for this call"
     )
     call_type = models.CharField(
@@ -1041,6 +1230,7 @@ class WellnessTask(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="wellness_tasks",
+        db_index=False,
         help_text="User who owns this task"
     )
     title = models.CharField(
@@ -1103,6 +1293,7 @@ class WellnessJournalEntry(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="wellness_journal_entries",
+        db_index=False,
         help_text="User who owns this journal entry"
     )
     title = models.CharField(
@@ -1153,6 +1344,7 @@ class MoodLog(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="mood_logs",
+        db_index=False,
         help_text="User who recorded this mood"
     )
     value = models.PositiveSmallIntegerField(
@@ -1230,6 +1422,7 @@ class SupportGroupMembership(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="support_group_memberships",
+        db_index=False,
         help_text="User who is a member"
     )
     group = models.ForeignKey(
@@ -1597,7 +1790,6 @@ class EmailOTP(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["email", "purpose", "is_verified"]),
-            models.Index(fields=["token"]),
         ]
         ordering = ("-created_at",)
         verbose_name = "Email OTP"
@@ -1606,6 +1798,12 @@ class EmailOTP(models.Model):
     def __str__(self) -> str:
         return f"{self.email} -> {self.purpose}"
 
+    def save(self, *args, **kwargs):
+        # Stored normalized: lookups match by plain equality (see api.utils.emails)
+        from .utils.emails import normalize_email
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
+
     @property
     def is_expired(self) -> bool:
         """Check if OTP is expired."""
@@ -1616,3 +1814,81 @@ class EmailOTP(models.Model):
         self.is_verified = True
         self.verified_at = timezone.now()
         self.save(update_fields=["is_verified", "verified_at"])
+
+
+class OutboundEmail(models.Model):
+    """
+    Email outbox: messages are written here by request handlers and delivered
+    by the ``send_outbox_emails`` worker (see api.utils.email_outbox).
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    to_email = models.EmailField(
+        help_text="Recipient address"
+    )
+    from_email = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Sender address (DEFAULT_FROM_EMAIL when blank)"
+    )
+    subject = models.CharField(
+        max_length=255,
+        help_text="Subject line"
+    )
+    body = models.TextField(
+        help_text="Plain text body"
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        help_text="Delivery status"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Number of delivery attempts"
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the worker may next pick the message up (retry backoff or claim lease)"
+    )
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Give up delivering after this time (e.g. when the OTP inside expires)"
+    )
+    last_error = models.TextField(
+        blank=True,
+        help_text="Error from the last failed attempt"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the message was queued"
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the message was delivered"
+    )
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: due pending/sending messages by time
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+        ordering = ("-created_at",)
+        verbose_name = "Outbound email"
+        verbose_name_plural = "Outbound emails"
+
+    def __str__(self) -> str:
+        return f"{self.to_email} [{self.status}] {self.subject}"
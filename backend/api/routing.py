@@ -2,9 +2,9 @@
 WebSocket URL routing for chat functionality.
 """
 from django.urls import path
-from .consumers import ChatConsumer
+from .consumers import ChatConsumer, SessionConsumer
 
 websocket_urlpatterns = [
     path("ws/chat/<int:chat_id>/", ChatConsumer.as_asgi()),
+    path("ws/sessions/<int:session_id>/", SessionConsumer.as_asgi()),
 ]
-
@@ -1,8 +1,8 @@
-from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 from django.utils import timezone
 from rest_framework import serializers
 
+from .authentication import ROLE_CLAIM, role_claims
 from .models import (
     Chat,
     ChatMessage,
@@ -19,7 +19,13 @@ from .models import (
     WellnessJournalEntry,
     WellnessTask,
 )
+from .utils.emails import normalize_email, users_by_email
+from .utils.presence import presence
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Shown for messages whose sender account no longer exists
+DELETED_USER_NAME = "Deleted user"
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -57,8 +63,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         return normalized
 
     def validate_email(self, value: str) -> str:
-        normalized = value.strip().lower()
-        if User.objects.filter(email__iexact=normalized).exists():
+        normalized = normalize_email(value)
+        if users_by_email(normalized).exists():
             raise serializers.ValidationError("Email already in use")
         return normalized
 
@@ -70,7 +76,7 @@ class RegisterSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"email": "Email is required for registration."})
 
         otp = (
-            EmailOTP.objects.filter(token=token, purpose=EmailOTP.PURPOSE_REGISTRATION, email__iexact=email)
+            EmailOTP.objects.filter(token=token, purpose=EmailOTP.PURPOSE_REGISTRATION, email=normalize_email(email))
             .order_by("-created_at")
             .first()
         )
@@ -93,7 +99,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         validated_data.pop("otp_token", None)
         normalized_email = validated_data.get("email")
         if normalized_email:
-            normalized_email = normalized_email.strip().lower()
+            normalized_email = normalize_email(normalized_email)
 
         user = User.objects.create_user(
             username=validated_data["username"],
@@ -216,17 +222,26 @@ class WellnessJournalEntrySerializer(serializers.ModelSerializer):
 
 class SupportGroupSerializer(serializers.ModelSerializer):
     is_joined = serializers.SerializerMethodField()
+    member_count = serializers.SerializerMethodField()
 
     class Meta:
         model = SupportGroup
-        fields = ("slug", "name", "description", "icon", "is_joined")
+        fields = ("slug", "name", "description", "icon", "is_joined", "member_count")
 
     def get_is_joined(self, obj: SupportGroup) -> bool:
+        # Prefer the Exists() annotation from SupportGroupListView.get_queryset
+        if hasattr(obj, "is_joined"):
+            return bool(obj.is_joined)
         request = self.context.get("request")
         if request is None or not request.user.is_authenticated:
             return False
         return SupportGroupMembership.objects.filter(user=request.user, group=obj).exists()
 
+    def get_member_count(self, obj: SupportGroup) -> int:
+        if hasattr(obj, "member_count"):
+            return obj.member_count
+        return obj.memberships.count()
+
 
 class SupportGroupJoinSerializer(serializers.Serializer):
     slug = serializers.SlugField(max_length=80)
@@ -267,6 +282,8 @@ class ChatSerializer(serializers.ModelSerializer):
     counsellor_name = serializers.SerializerMethodField()
     current_duration_minutes = serializers.IntegerField(read_only=True)
     current_estimated_cost = serializers.FloatField(read_only=True)
+    last_sender_username = serializers.CharField(source="last_sender.username", read_only=True, allow_null=True)
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Chat
@@ -290,11 +307,18 @@ class ChatSerializer(serializers.ModelSerializer):
             "billing_processed_at",
             "current_duration_minutes",
             "current_estimated_cost",
+            "message_count",
+            "last_message_at",
+            "last_message_preview",
+            "last_sender",
+            "last_sender_username",
+            "unread_count",
         )
         read_only_fields = (
             "id", "user", "counsellor", "started_at", "ended_at", "created_at", "updated_at",
             "billed_amount", "duration_minutes", "is_billed", "billing_processed_at",
-            "current_duration_minutes", "current_estimated_cost"
+            "current_duration_minutes", "current_estimated_cost",
+            "message_count", "last_message_at", "last_message_preview", "last_sender"
         )
 
     def get_user_name(self, obj):
@@ -307,13 +331,18 @@ class ChatSerializer(serializers.ModelSerializer):
             return obj.counsellor.get_full_name() or obj.counsellor.username
         return None
 
+    def get_unread_count(self, obj):
+        # Annotated by utils.read_state.with_unread_counts on inbox queries
+        return getattr(obj, "unread_count", None)
+
 
 class ChatCreateSerializer(serializers.Serializer):
     initial_message = serializers.CharField(required=False, allow_blank=True)
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
-    sender_username = serializers.CharField(source="sender.username", read_only=True)
+    # Archived messages can outlive their sender (api.utils.chat_archive)
+    sender_username = serializers.CharField(source="sender.username", read_only=True, allow_null=True)
     sender_name = serializers.SerializerMethodField()
     is_user = serializers.SerializerMethodField()
 
@@ -327,18 +356,21 @@ class ChatMessageSerializer(serializers.ModelSerializer):
             "sender_name",
             "text",
             "is_user",
+            "seq",
             "created_at",
         )
-        read_only_fields = ("id", "sender", "created_at")
+        read_only_fields = ("id", "sender", "seq", "created_at")
 
     def get_sender_name(self, obj):
+        if obj.sender_id is None:
+            return DELETED_USER_NAME
         if hasattr(obj.sender, "profile"):
             return obj.sender.profile.full_name or obj.sender.username
         return obj.sender.username
 
     def get_is_user(self, obj):
         # Message is from user if sender is the chat's user (not the counsellor)
-        return obj.sender == obj.chat.user
+        return obj.sender_id is not None and obj.sender_id == obj.chat.user_id
 
 
 class ChatMessageCreateSerializer(serializers.Serializer):
@@ -349,8 +381,8 @@ class SendOTPSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
     def validate_email(self, value):
-        normalized = value.strip().lower()
-        if User.objects.filter(email__iexact=normalized).exists():
+        normalized = normalize_email(value)
+        if users_by_email(normalized).exists():
             raise serializers.ValidationError("Email is already associated with an account.")
         return normalized
 
@@ -360,9 +392,10 @@ class VerifyOTPSerializer(serializers.Serializer):
     code = serializers.CharField(min_length=6, max_length=6)
 
     def validate(self, attrs):
-        email = attrs["email"].strip().lower()
+        email = normalize_email(attrs["email"])
         code = attrs["code"].strip()
-        qs = EmailOTP.objects.filter(email__iexact=email, purpose=EmailOTP.PURPOSE_REGISTRATION).order_by("-created_at")
+        # OTP emails are stored normalized, so equality uses the (email, purpose, ...) index
+        qs = EmailOTP.objects.filter(email=email, purpose=EmailOTP.PURPOSE_REGISTRATION).order_by("-created_at")
         otp = qs.first()
         if not otp:
             raise serializers.ValidationError({"email": "No OTP request found for this email."})
@@ -382,20 +415,35 @@ class VerifyOTPSerializer(serializers.Serializer):
 class EmailOrUsernameTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Allow users to authenticate with either their username or email address.
+
+    The tokens carry the user's role and profile ids as claims (see
+    api.authentication), and the response repeats role, user id and username
+    for the client.  Validation is the whole login: the password is checked
+    once (PBKDF2 dominates login CPU) and the role is read back from the
+    minted token instead of being queried again.
     """
 
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for name, value in role_claims(user.id).items():
+            token[name] = value
+        return token
+
     def validate(self, attrs):
         username = attrs.get(self.username_field)
         if username:
             candidate = username.strip()
             if "@" in candidate:
-                user_model = get_user_model()
-                try:
-                    user = user_model.objects.get(email__iexact=candidate)
-                    attrs[self.username_field] = user.username
-                except user_model.DoesNotExist:
-                    pass  # fall back to default behaviour (will raise invalid credentials)
-        return super().validate(attrs)
+                username = users_by_email(candidate).order_by("id").values_list("username", flat=True).first()
+                if username is not None:
+                    attrs[self.username_field] = username
+                # otherwise fall back to default behaviour (will raise invalid credentials)
+        data = super().validate(attrs)
+        data["role"] = AccessToken(data["access"], verify=False)[ROLE_CLAIM]
+        data["user_id"] = self.user.id
+        data["username"] = self.user.username
+        return data
 
 
 class QuickSessionSerializer(serializers.Serializer):
@@ -482,6 +530,7 @@ class CounsellorProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
     full_name = serializers.SerializerMethodField()
+    is_online = serializers.SerializerMethodField()
     
     class Meta:
         model = CounsellorProfile
@@ -495,6 +544,7 @@ class CounsellorProfileSerializer(serializers.ModelSerializer):
             "languages",
             "rating",
             "is_available",
+            "is_online",
             "bio",
             "created_at",
             "updated_at",
@@ -506,6 +556,10 @@ class CounsellorProfileSerializer(serializers.ModelSerializer):
             return obj.user.profile.full_name or obj.user.username
         return obj.user.username
 
+    def get_is_online(self, obj):
+        # Live socket presence, not a DB flag
+        return presence.is_online(obj.user_id)
+
 
 class CounsellorAppointmentSerializer(serializers.ModelSerializer):
     client_username = serializers.CharField(source='user.username', read_only=True)
@@ -542,4 +596,5 @@ class CounsellorStatsSerializer(serializers.Serializer):
     monthly_earnings = serializers.DecimalField(max_digits=10, decimal_places=2)
     total_earnings = serializers.DecimalField(max_digits=10, decimal_places=2)
     queued_chats = serializers.IntegerField(default=0)
+    online_counselors = serializers.IntegerField(default=0)
 
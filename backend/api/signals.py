@@ -0,0 +1,72 @@
+"""
+Signal receivers for the api app.
+
+Registered from ``ApiConfig.ready()``.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import GuidanceResource, MeditationSession, MindCareBooster, MusicTrack, UserProfile
+from .utils.content_cache import (
+    CATALOG_BOOSTERS,
+    CATALOG_GUIDANCE,
+    CATALOG_MEDITATIONS,
+    CATALOG_MUSIC,
+    invalidate_catalog,
+)
+from .utils.wellness import provision_default_tasks
+
+CATALOG_MODELS = {
+    GuidanceResource: CATALOG_GUIDANCE,
+    MusicTrack: CATALOG_MUSIC,
+    MindCareBooster: CATALOG_BOOSTERS,
+    MeditationSession: CATALOG_MEDITATIONS,
+}
+
+
+@receiver([post_save, post_delete], sender=GuidanceResource)
+@receiver([post_save, post_delete], sender=MusicTrack)
+@receiver([post_save, post_delete], sender=MindCareBooster)
+@receiver([post_save, post_delete], sender=MeditationSession)
+def invalidate_content_catalog(sender, **kwargs):
+    """
+    Drop cached catalog payloads whenever an admin edits catalog content.
+
+    The stamp is bumped once the edit commits: bumped earlier, a request in
+    between would rebuild the payload from the old rows and cache it under
+    the new version.
+    """
+    catalog = CATALOG_MODELS[sender]
+    transaction.on_commit(lambda: invalidate_catalog(catalog))
+
+
+@receiver(post_save, sender=UserProfile)
+def provision_wellness_tasks(sender, instance, created, raw=False, **kwargs):
+    """
+    Give a new user their default wellness tasks when their profile is created.
+
+    Profiles are created at registration but also on first use by users made
+    in the admin or with createsuperuser, so provisioning hangs off the
+    profile rather than the registration serializer.
+    """
+    if created and not raw:
+        provision_default_tasks(instance)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """
+    Tune every new SQLite connection for concurrent use.
+
+    WAL lets readers run alongside the single writer, synchronous=NORMAL is
+    safe under WAL, and busy_timeout makes writers wait for the lock instead
+    of failing immediately with "database is locked".
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
@@ -3,9 +3,11 @@ from django.urls import path
 
 from .views import (
     ChatAcceptView,
+    ChatCostView,
     ChatCreateView,
     ChatListView,
     ChatMessageListView,
+    ChatUnreadCountsView,
     CounsellorAppointmentsView,
     CounsellorProfileView,
     CounsellorStatsView,
@@ -95,7 +97,9 @@ urlpatterns = [
     # Chat endpoints
     path("chats/", ChatCreateView.as_view()),
     path("chats/list/", ChatListView.as_view()),
+    path("chats/unread/", ChatUnreadCountsView.as_view()),
     path("chats/<int:chat_id>/accept/", ChatAcceptView.as_view()),
+    path("chats/<int:chat_id>/cost/", ChatCostView.as_view()),
     path("chats/<int:chat_id>/messages/", ChatMessageListView.as_view()),
 ]
 
@@ -0,0 +1,99 @@
+"""
+Analytics query helpers for the reports endpoint.
+
+Each helper collapses what used to be several ``count()`` round-trips into a
+single conditional aggregate so the analytics view issues a small, fixed
+number of queries regardless of how much history a user has.
+"""
+from datetime import datetime, time
+
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..models import MoodLog, UpcomingSession, WellnessTask
+
+
+def _start_of_day(value: datetime) -> datetime:
+    """Return the aware datetime at midnight (current timezone) for ``value``'s date."""
+    local_date = timezone.localtime(value).date()
+    return timezone.make_aware(datetime.combine(local_date, time.min))
+
+
+def get_task_counters(user) -> dict:
+    """
+    Compute all wellness task counters for a user in one query.
+
+    Args:
+        user: Django User instance
+
+    Returns:
+        dict: {"total", "completed", "daily", "evening"} counts
+    """
+    return WellnessTask.objects.filter(user=user).aggregate(
+        total=Count("id"),
+        completed=Count("id", filter=Q(is_completed=True)),
+        daily=Count("id", filter=Q(category=WellnessTask.CATEGORY_DAILY)),
+        evening=Count("id", filter=Q(category=WellnessTask.CATEGORY_EVENING)),
+    )
+
+
+def get_session_counters(user, now: datetime) -> dict:
+    """
+    Compute total and upcoming session counts for a user in one query.
+
+    Args:
+        user: Django User instance
+        now: Reference time separating upcoming from past sessions
+
+    Returns:
+        dict: {"total", "upcoming"} counts
+    """
+    return UpcomingSession.objects.filter(user=user).aggregate(
+        total=Count("id"),
+        upcoming=Count("id", filter=Q(start_time__gte=now)),
+    )
+
+
+def get_mood_windows(user, now: datetime, weekly_days: int = 7, monthly_days: int = 30) -> dict:
+    """
+    Compute daily mood averages for the weekly and monthly windows in one pass.
+
+    Only the monthly window is queried; because buckets are per day, the weekly
+    series is simply the trailing subset of the monthly one.  The lower bound is
+    expressed as a datetime rather than a ``__date`` lookup so the
+    ``(user, -recorded_at)`` index can serve the range scan.
+
+    Args:
+        user: Django User instance
+        now: Reference time for the end of both windows
+        weekly_days: Number of days (including today) in the weekly window
+        monthly_days: Number of days (including today) in the monthly window
+
+    Returns:
+        dict: {"weekly": [...], "monthly": [...]} with date/average/count entries
+    """
+    monthly_start = _start_of_day(now - timezone.timedelta(days=monthly_days - 1))
+    weekly_start_date = timezone.localtime(now - timezone.timedelta(days=weekly_days - 1)).date()
+
+    rows = (
+        MoodLog.objects.filter(user=user, recorded_at__gte=monthly_start)
+        .annotate(day=TruncDate("recorded_at"))
+        .values("day")
+        .annotate(average=Avg("value"), count=Count("id"))
+        .order_by("day")
+    )
+
+    monthly = []
+    weekly = []
+    for entry in rows:
+        item = {
+            "date": entry["day"].isoformat(),
+            "average": round(entry["average"], 2),
+            "count": entry["count"],
+        }
+        monthly.append(item)
+        if entry["day"] >= weekly_start_date:
+            weekly.append(item)
+
+    return {"weekly": weekly, "monthly": monthly}
@@ -2,11 +2,17 @@
 Billing utilities for chat sessions.
 Implements time-based billing: 1 rupee per minute of active chat time.
 """
+from collections import defaultdict
 from decimal import Decimal
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
 from django.db import transaction
+from django.db.models import Case, DateTimeField, DecimalField, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
-from ..models import Chat, UserProfile
+from ..models import Chat, UpcomingSession, UserProfile
+from .session_events import SESSION_EVENT_END, broadcast_session_event
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +20,9 @@ logger = logging.getLogger(__name__)
 # Billing rate: 1 rupee per minute
 CHAT_RATE_PER_MINUTE = Decimal('1.00')
 
+# Chats per set-based UPDATE in incremental billing
+BILLING_BATCH_SIZE = 500
+
 
 def calculate_chat_duration_minutes(chat: Chat) -> int:
     """
@@ -80,14 +89,14 @@ def deduct_chat_billing(chat: Chat, billing_amount: Decimal) -> bool:
     """
     try:
         if not chat.user:
-            logger.error(f"Chat {chat.id} has no user assigned")
+            logger.error("Chat %s has no user assigned", chat.id)
             return False
         
         # Convert billing_amount to int for wallet_minutes (which is an integer field)
         billing_amount_int = int(billing_amount)
         
         if billing_amount_int <= 0:
-            logger.info(f"Billing amount is {billing_amount_int}, no deduction needed for chat {chat.id}")
+            logger.info("Billing amount is %s, no deduction needed for chat %s", billing_amount_int, chat.id)
             return True
         
         with transaction.atomic():
@@ -96,22 +105,24 @@ def deduct_chat_billing(chat: Chat, billing_amount: Decimal) -> bool:
                 profile = UserProfile.objects.select_for_update().get(user=chat.user)
             except UserProfile.DoesNotExist:
                 # Create profile if it doesn't exist
-                logger.warning(f"UserProfile not found for user {chat.user.username}, creating one")
+                logger.warning("UserProfile not found for user %s, creating one", chat.user.username)
                 profile = UserProfile.objects.create(user=chat.user, wallet_minutes=0)
             
             old_balance = profile.wallet_minutes
             
             logger.info(
-                f"Attempting to deduct billing for chat {chat.id}: "
-                f"amount=₹{billing_amount_int}, current_balance=₹{old_balance}, user={chat.user.username}"
+                "Attempting to deduct billing for chat %s: "
+                "amount=₹%s, current_balance=₹%s, user=%s",
+                chat.id, billing_amount_int, old_balance, chat.user.username
             )
             
             # Check if user has sufficient balance
             if profile.wallet_minutes < billing_amount_int:
                 logger.warning(
-                    f"❌ Insufficient wallet balance for chat {chat.id}: "
-                    f"user has ₹{profile.wallet_minutes}, needs ₹{billing_amount_int}. "
-                    f"User: {chat.user.username}"
+                    "❌ Insufficient wallet balance for chat %s: "
+                    "user has ₹%s, needs ₹%s. "
+                    "User: %s",
+                    chat.id, profile.wallet_minutes, billing_amount_int, chat.user.username
                 )
                 return False
             
@@ -123,18 +134,260 @@ def deduct_chat_billing(chat: Chat, billing_amount: Decimal) -> bool:
             profile.refresh_from_db()
             
             logger.info(
-                f"✅ Billing deducted successfully for chat {chat.id}: "
-                f"amount=₹{billing_amount_int}, balance: ₹{old_balance} -> ₹{profile.wallet_minutes}, "
-                f"user={chat.user.username}"
+                "✅ Billing deducted successfully for chat %s: "
+                "amount=₹%s, balance: ₹%s -> ₹%s, "
+                "user=%s",
+                chat.id, billing_amount_int, old_balance, profile.wallet_minutes, chat.user.username
             )
             
             return True
             
     except Exception as e:
-        logger.error(f"❌ Error deducting billing for chat {chat.id}: {e}", exc_info=True)
+        logger.error("❌ Error deducting billing for chat %s: %s", chat.id, e, exc_info=True)
         return False
 
 
+def deduct_wallet_balance(user_id: int, amount: Decimal) -> bool:
+    """
+    Deduct ``amount`` from a user's wallet in a single conditional UPDATE.
+
+    The balance check and the deduction happen in the same statement, so no
+    row lock or re-read is needed.
+
+    Args:
+        user_id: ID of the user whose wallet is charged
+        amount: Amount to deduct (in rupees)
+
+    Returns:
+        bool: True if deducted (or nothing to deduct), False if the balance is insufficient
+    """
+    amount_int = int(amount)
+    if amount_int <= 0:
+        return True
+    updated = UserProfile.objects.filter(
+        user_id=user_id,
+        wallet_minutes__gte=amount_int,
+    ).update(wallet_minutes=F('wallet_minutes') - amount_int)
+    return updated == 1
+
+
+def bill_active_chats(now=None, min_minutes: int = 1, check_only: bool = False) -> dict:
+    """
+    Incrementally bill every active chat up to ``now``.
+
+    Each chat keeps a ``billed_through`` checkpoint (``started_at`` until the
+    first tick).  Only whole minutes elapsed since the checkpoint are charged,
+    and the checkpoint advances by exactly those minutes, so per-tick work
+    depends on the number of active chats, not on how long they have run.
+    Wallets and chats are updated with set-based ``UPDATE ... CASE``
+    statements per batch instead of one save per chat.
+
+    When a wallet cannot cover the minutes since the last checkpoint, the
+    minutes it still covers are charged and the chat is completed at the new
+    checkpoint within the same tick.
+
+    Args:
+        now: Billing time (defaults to the current time)
+        min_minutes: Minimum unbilled minutes before a chat is charged
+        check_only: Compute charges without writing anything
+
+    Returns:
+        dict: ``{"chats", "billed_chats", "amount", "exhausted_chat_ids"}``
+    """
+    now = now or timezone.now()
+    summary = {
+        "chats": 0,
+        "billed_chats": 0,
+        "amount": Decimal('0.00'),
+        "exhausted_chat_ids": [],
+    }
+
+    with transaction.atomic():
+        chats = list(
+            Chat.objects.select_for_update()
+            .filter(status=Chat.STATUS_ACTIVE, started_at__isnull=False)
+            .annotate(checkpoint=Coalesce('billed_through', 'started_at'))
+            .values('id', 'user_id', 'started_at', 'checkpoint', 'billed_amount')
+        )
+        summary["chats"] = len(chats)
+
+        due = []
+        for chat in chats:
+            minutes = int((now - chat['checkpoint']).total_seconds() // 60)
+            if minutes < min_minutes:
+                continue
+            chat['minutes'] = minutes
+            chat['charge'] = Decimal(minutes) * CHAT_RATE_PER_MINUTE
+            due.append(chat)
+
+        for start in range(0, len(due), BILLING_BATCH_SIZE):
+            batch = due[start:start + BILLING_BATCH_SIZE]
+            chats_by_user = defaultdict(list)
+            for chat in batch:
+                chats_by_user[chat['user_id']].append(chat)
+            balances = dict(
+                UserProfile.objects.select_for_update()
+                .filter(user_id__in=chats_by_user)
+                .values_list('user_id', 'wallet_minutes')
+            )
+
+            paid, exhausted = [], []
+            charges_by_user = {}
+            for user_id, user_chats in chats_by_user.items():
+                remaining = balances.get(user_id, 0)
+                for chat in user_chats:
+                    if remaining < int(chat['charge']):
+                        # Charge the minutes the wallet still covers, then end the chat
+                        chat['minutes'] = int(remaining / CHAT_RATE_PER_MINUTE)
+                        chat['charge'] = Decimal(chat['minutes']) * CHAT_RATE_PER_MINUTE
+                        exhausted.append(chat['id'])
+                    if chat['minutes']:
+                        remaining -= int(chat['charge'])
+                        paid.append(chat)
+                if remaining != balances.get(user_id, 0):
+                    charges_by_user[user_id] = balances[user_id] - remaining
+
+            summary["billed_chats"] += len(paid)
+            summary["amount"] += sum((chat['charge'] for chat in paid), Decimal('0.00'))
+            summary["exhausted_chat_ids"].extend(exhausted)
+            if check_only or not paid:
+                continue
+
+            UserProfile.objects.filter(user_id__in=charges_by_user).update(
+                wallet_minutes=F('wallet_minutes') - Case(
+                    *[When(user_id=user_id, then=Value(charge)) for user_id, charge in charges_by_user.items()],
+                    output_field=IntegerField(),
+                )
+            )
+            Chat.objects.filter(id__in=[chat['id'] for chat in paid]).update(
+                billed_through=Case(
+                    *[
+                        When(id=chat['id'], then=Value(chat['checkpoint'] + timedelta(minutes=chat['minutes'])))
+                        for chat in paid
+                    ],
+                    output_field=DateTimeField(),
+                ),
+                billed_amount=F('billed_amount') + Case(
+                    *[When(id=chat['id'], then=Value(chat['charge'])) for chat in paid],
+                    output_field=DecimalField(max_digits=10, decimal_places=2),
+                ),
+                duration_minutes=Case(
+                    *[
+                        When(id=chat['id'], then=Value(
+                            int((chat['checkpoint'] - chat['started_at']).total_seconds() // 60) + chat['minutes']
+                        ))
+                        for chat in paid
+                    ],
+                    output_field=IntegerField(),
+                ),
+            )
+
+        if summary["exhausted_chat_ids"] and not check_only:
+            end_exhausted_chats(summary["exhausted_chat_ids"], now)
+
+    return summary
+
+
+def bill_completed_chats(now=None, check_only: bool = False) -> dict:
+    """
+    Charge completed chats whose final bill could not be deducted.
+
+    Ending a chat charges what incremental billing has not covered yet; when
+    the wallet cannot pay that remainder the chat is completed unbilled.
+    Each tick retries those chats (e.g. after a top-up): a chat is marked
+    billed once its remainder is deducted.
+
+    Returns:
+        dict: ``{"chats", "billed_chats", "amount"}``
+    """
+    now = now or timezone.now()
+    summary = {"chats": 0, "billed_chats": 0, "amount": Decimal('0.00')}
+    chat_ids = list(
+        Chat.objects.filter(
+            status=Chat.STATUS_COMPLETED,
+            is_billed=False,
+            started_at__isnull=False,
+            ended_at__isnull=False,
+        ).values_list('id', flat=True)
+    )
+    summary["chats"] = len(chat_ids)
+    for chat_id in chat_ids:
+        with transaction.atomic():
+            chat = (
+                Chat.objects.select_for_update()
+                .filter(id=chat_id, status=Chat.STATUS_COMPLETED, is_billed=False)
+                .only('id', 'user_id', 'started_at', 'ended_at', 'billed_amount')
+                .first()
+            )
+            if chat is None:
+                continue
+            total = calculate_chat_billing(chat)
+            outstanding = max(total - chat.billed_amount, Decimal('0.00'))
+            if check_only:
+                summary["amount"] += outstanding
+                continue
+            if not deduct_wallet_balance(chat.user_id, outstanding):
+                continue
+            Chat.objects.filter(id=chat_id).update(
+                billed_amount=max(total, chat.billed_amount),
+                is_billed=True,
+                billing_processed_at=now,
+            )
+        summary["billed_chats"] += 1
+        summary["amount"] += outstanding
+        logger.info("Billed completed chat %s: remaining ₹%s", chat_id, outstanding)
+    return summary
+
+
+def end_exhausted_chats(chat_ids: list[int], now) -> None:
+    """
+    Complete chats whose wallet ran out, at their last paid checkpoint.
+    Must run in the same transaction as the checkpoint UPDATE.
+
+    Everything up to the checkpoint has been charged, so the chats are marked
+    billed; their linked sessions are completed too.  Chat sockets get a
+    ``chat.status_change`` push and session timers the ``end`` event; when
+    this runs from process_chat_billing those only reach the sockets if the
+    channel layer is shared between processes (CHANNEL_REDIS_URL).
+    """
+    Chat.objects.filter(id__in=chat_ids, status=Chat.STATUS_ACTIVE).update(
+        status=Chat.STATUS_COMPLETED,
+        ended_at=Coalesce('billed_through', 'started_at'),
+        is_billed=True,
+        billing_processed_at=now,
+        updated_at=now,
+    )
+    sessions = list(
+        UpcomingSession.objects.filter(chat_link__chat_id__in=chat_ids, session_status='in_progress')
+        .select_for_update()
+        .annotate(linked_chat_id=F('chat_link__chat_id'))
+    )
+    UpcomingSession.objects.filter(id__in=[session.id for session in sessions]).update(
+        session_status='completed', actual_end_time=now, is_confirmed=False, updated_at=now
+    )
+    logger.warning("Ended %s chats with exhausted wallets: %s", len(chat_ids), chat_ids)
+    for session in sessions:
+        session.session_status = 'completed'
+        session.actual_end_time = now
+        broadcast_session_event(session, SESSION_EVENT_END, chat_id=session.linked_chat_id)
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    def notify():
+        for chat_id in chat_ids:
+            try:
+                async_to_sync(channel_layer.group_send)(
+                    f"chat_{chat_id}",
+                    {"type": "chat.status_change", "chat_id": chat_id, "new_status": Chat.STATUS_COMPLETED},
+                )
+            except Exception as e:
+                logger.error("Failed to notify chat %s of wallet exhaustion: %s", chat_id, e)
+
+    transaction.on_commit(notify)
+
+
 def calculate_and_deduct_chat_billing(chat: Chat) -> bool:
     """
     Calculate and deduct billing for a chat session.
@@ -150,17 +403,17 @@ def calculate_and_deduct_chat_billing(chat: Chat) -> bool:
     try:
         chat.refresh_from_db()
     except Chat.DoesNotExist:
-        logger.error(f"Chat {chat.id} does not exist in database")
+        logger.error("Chat %s does not exist in database", chat.id)
         return False
     
     # Skip if already billed
     if chat.is_billed:
-        logger.debug(f"Chat {chat.id} already billed, skipping")
+        logger.debug("Chat %s already billed, skipping", chat.id)
         return True
     
     # Skip if chat never started
     if not chat.started_at:
-        logger.debug(f"Chat {chat.id} never started, no billing required")
+        logger.debug("Chat %s never started, no billing required", chat.id)
         # Mark as billed with 0 amount to prevent retries
         Chat.objects.filter(id=chat.id).update(
             is_billed=True,
@@ -172,7 +425,7 @@ def calculate_and_deduct_chat_billing(chat: Chat) -> bool:
     
     # Ensure ended_at is set
     if not chat.ended_at:
-        logger.warning(f"Chat {chat.id} ended but ended_at not set, using current time")
+        logger.warning("Chat %s ended but ended_at not set, using current time", chat.id)
         chat.ended_at = timezone.now()
         # Use update to avoid recursion
         Chat.objects.filter(id=chat.id).update(ended_at=chat.ended_at)
@@ -181,36 +434,43 @@ def calculate_and_deduct_chat_billing(chat: Chat) -> bool:
     # Calculate billing
     duration_minutes = calculate_chat_duration_minutes(chat)
     billing_amount = calculate_chat_billing(chat)
+    # billed_amount holds what incremental billing (process_chat_billing) already charged
+    already_charged = chat.billed_amount or Decimal('0.00')
+    outstanding = max(billing_amount - already_charged, Decimal('0.00'))
     
     logger.info(
-        f"Calculating billing for chat {chat.id}: "
-        f"duration_minutes={duration_minutes}, billing_amount=₹{billing_amount}, "
-        f"started_at={chat.started_at}, ended_at={chat.ended_at}, user={chat.user.username if chat.user else None}"
+        "Calculating billing for chat %s: "
+        "duration_minutes=%s, billing_amount=₹%s, "
+        "already_charged=₹%s, outstanding=₹%s, "
+        "started_at=%s, ended_at=%s, user=%s",
+        chat.id, duration_minutes, billing_amount, already_charged, outstanding, chat.started_at,
+        chat.ended_at, chat.user.username if chat.user else None
     )
     
     # Deduct from wallet
     deduction_success = False
-    if billing_amount > 0:
-        deduction_success = deduct_chat_billing(chat, billing_amount)
+    if outstanding > 0:
+        deduction_success = deduct_chat_billing(chat, outstanding)
         if not deduction_success:
             logger.error(
-                f"❌ FAILED to deduct ₹{billing_amount} from wallet for chat {chat.id}. "
-                f"User: {chat.user.username if chat.user else None}, "
-                f"Insufficient balance or error occurred."
+                "❌ FAILED to deduct ₹%s from wallet for chat %s. "
+                "User: %s, "
+                "Insufficient balance or error occurred.",
+                outstanding, chat.id, chat.user.username if chat.user else None
             )
     else:
-        # No charge for 0 minutes
+        # Nothing left to charge
         deduction_success = True
-        logger.info(f"Chat {chat.id} has 0 minutes duration, no billing required")
+        logger.info("Chat %s has nothing outstanding, no deduction required", chat.id)
     
     # Update chat with billing information
     # Use update() to avoid triggering save() again (which would cause recursion)
     update_fields = {
         'duration_minutes': duration_minutes,
-        'billed_amount': billing_amount,
     }
     
-    if deduction_success or billing_amount == 0:
+    if deduction_success:
+        update_fields['billed_amount'] = max(billing_amount, already_charged)
         update_fields['is_billed'] = True
         update_fields['billing_processed_at'] = timezone.now()
         
@@ -219,20 +479,22 @@ def calculate_and_deduct_chat_billing(chat: Chat) -> bool:
         chat.refresh_from_db()
         
         logger.info(
-            f"✅ Billing processed for chat {chat.id}: "
-            f"duration={duration_minutes} minutes, amount=₹{billing_amount}, "
-            f"deduction_success={deduction_success}"
+            "✅ Billing processed for chat %s: "
+            "duration=%s minutes, amount=₹%s, "
+            "deduction_success=%s",
+            chat.id, duration_minutes, billing_amount, deduction_success
         )
         return True
     else:
         # Log error - don't mark as billed if deduction failed
         logger.error(
-            f"❌ Failed to deduct billing for chat {chat.id}: "
-            f"amount=₹{billing_amount}, user wallet may be insufficient. "
-            f"Billing will be retried on next save."
+            "❌ Failed to deduct billing for chat %s: "
+            "amount=₹%s, user wallet may be insufficient. "
+            "Billing will be retried on next save.",
+            chat.id, outstanding
         )
-        # Still save duration and billing amount for record keeping
-        # Don't mark as billed so it can be retried
+        # Still save duration for record keeping; billed_amount keeps what was
+        # actually charged. Don't mark as billed so it can be retried
         Chat.objects.filter(id=chat.id).update(**update_fields)
         chat.refresh_from_db()
         return False
@@ -289,6 +551,6 @@ def check_chat_wallet_balance(user) -> tuple[bool, str, int]:
         return (True, "", profile.wallet_minutes)
         
     except Exception as e:
-        logger.error(f"Error checking wallet balance for user {user.username}: {e}", exc_info=True)
+        logger.error("Error checking wallet balance for user %s: %s", user.username, e, exc_info=True)
         return (False, f"Error checking wallet balance: {str(e)}", 0)
 
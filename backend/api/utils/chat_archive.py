@@ -0,0 +1,210 @@
+"""
+Cold storage for the messages of long-finished chats.
+
+ChatMessage only ever grows, and every insert pays for the size of its table
+and indexes.  Chats completed more than N days ago are read rarely, so their
+messages are moved into one ``ChatArchive`` row per chat: a gzip-compressed
+JSON-lines blob holding every archived message.  The hot rows are then
+deleted.
+
+The user purge engine cannot reach into the blobs with a DELETE, so it calls
+``scrub_archived_senders`` to rewrite the archives of the chats a purged
+user took part in without their messages.  Senders deleted some other way
+come back from ``archived_messages`` with no sender ("Deleted user").
+
+Reads go through ``chat_history``, which merges the archive with whatever is
+still in ChatMessage (a reopened chat can gain new live messages after being
+archived), so callers never need to know where a message lives.  The chat's
+summary columns (``Chat.message_count`` etc.) already include archived
+messages and are left untouched.  Archived messages come back as unsaved ``ChatMessage``
+instances with their original ids, so serializers work unchanged.
+"""
+import gzip
+import json
+import logging
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, OuterRef
+from django.utils.dateparse import parse_datetime
+
+from ..models import Chat, ChatArchive, ChatMessage
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 200
+
+ARCHIVED_FIELDS = ("id", "sender_id", "text", "client_message_id", "seq", "created_at", "updated_at")
+
+
+def encode_messages(rows: list[dict]) -> bytes:
+    """Serialize message dicts as gzip-compressed JSON lines."""
+    lines = "\n".join(json.dumps(row, separators=(",", ":"), default=str) for row in rows)
+    return gzip.compress(lines.encode("utf-8"))
+
+
+def decode_messages(blob) -> list[dict]:
+    """Inverse of ``encode_messages``."""
+    if not blob:
+        return []
+    text = gzip.decompress(bytes(blob)).decode("utf-8")
+    return [json.loads(line) for line in text.splitlines() if line]
+
+
+def _message_row(values: dict) -> dict:
+    return {
+        "id": values["id"],
+        "sender_id": values["sender_id"],
+        "text": values["text"],
+        "client_message_id": values["client_message_id"],
+        "seq": values["seq"],
+        "created_at": values["created_at"].isoformat(),
+        "updated_at": values["updated_at"].isoformat() if values["updated_at"] else None,
+    }
+
+
+def archivable_chats(cutoff):
+    """Completed chats that ended before ``cutoff`` and still have live messages."""
+    return Chat.objects.filter(
+        Exists(ChatMessage.objects.filter(chat=OuterRef("pk"))),
+        status=Chat.STATUS_COMPLETED,
+        ended_at__lt=cutoff,
+    )
+
+
+def archive_chat(chat_id: int) -> int:
+    """
+    Move every live message of one chat into its archive blob.
+
+    Runs in a single transaction: the archive row is locked, merged with the
+    new messages and rewritten, then the hot rows are deleted with one
+    DELETE statement.  Safe to re-run; a chat with no live messages is a
+    no-op.
+
+    Returns:
+        int: Number of messages moved
+    """
+    with transaction.atomic():
+        rows = [
+            _message_row(values)
+            for values in ChatMessage.objects.filter(chat_id=chat_id)
+            .order_by("created_at", "id")
+            .values(*ARCHIVED_FIELDS)
+        ]
+        if not rows:
+            return 0
+
+        archive = ChatArchive.objects.select_for_update().filter(chat_id=chat_id).first()
+        if archive is None:
+            archive = ChatArchive(chat_id=chat_id)
+            merged = rows
+        else:
+            archived_ids = set()
+            merged = []
+            for row in decode_messages(archive.messages_blob) + rows:
+                if row["id"] not in archived_ids:
+                    archived_ids.add(row["id"])
+                    merged.append(row)
+            merged.sort(key=lambda row: (row["created_at"], row["id"]))
+
+        _write_archive(archive, merged)
+        archive.save()
+
+        ChatMessage.objects.filter(id__in=[row["id"] for row in rows])._raw_delete(ChatMessage.objects.db)
+
+    logger.info("Archived %s messages of chat %s (%s in archive)", len(rows), chat_id, archive.message_count)
+    return len(rows)
+
+
+def _write_archive(archive: ChatArchive, rows: list[dict]) -> None:
+    """Store ``rows`` (non-empty, in order) as ``archive``'s blob and summary; does not save."""
+    archive.messages_blob = encode_messages(rows)
+    archive.message_count = len(rows)
+    archive.first_message_at = parse_datetime(rows[0]["created_at"])
+    archive.last_message_at = parse_datetime(rows[-1]["created_at"])
+
+
+def scrub_archived_senders(user_ids, using=DEFAULT_DB_ALIAS) -> int:
+    """
+    Remove the archived messages sent by ``user_ids``, as the purge does for live ones.
+
+    Only archives of chats the users took part in as counsellor are read:
+    chats they are the client of are deleted with them.  An archive left
+    empty is deleted.  Run inside the purge transaction, before the chats'
+    counsellor is nulled out.
+
+    Returns:
+        int: Number of archives rewritten or deleted
+    """
+    user_ids = set(user_ids)
+    archives = (
+        ChatArchive.objects.using(using)
+        .select_for_update()
+        .filter(chat__counsellor_id__in=user_ids)
+        .exclude(chat__user_id__in=user_ids)
+    )
+    changed = 0
+    for archive in archives:
+        rows = decode_messages(archive.messages_blob)
+        kept = [row for row in rows if row["sender_id"] not in user_ids]
+        if len(kept) == len(rows):
+            continue
+        changed += 1
+        if not kept:
+            archive.delete(using=using)
+            continue
+        _write_archive(archive, kept)
+        archive.save(using=using)
+    return changed
+
+
+def archived_messages(chat: Chat) -> list[ChatMessage]:
+    """
+    Archived messages of ``chat`` as unsaved ChatMessage instances.
+
+    Senders (with profiles) are loaded in one query and attached, so
+    ``ChatMessageSerializer`` needs no further queries.  Messages whose
+    sender no longer exists come back with no sender.
+    """
+    try:
+        archive = chat.archive
+    except ChatArchive.DoesNotExist:
+        return []
+    rows = decode_messages(archive.messages_blob)
+    senders = User.objects.select_related("profile").in_bulk({row["sender_id"] for row in rows})
+    messages = []
+    for row in rows:
+        message = ChatMessage(
+            id=row["id"],
+            chat=chat,
+            sender_id=row["sender_id"],
+            text=row["text"],
+            client_message_id=row["client_message_id"],
+            # Archived before messages had sequence numbers
+            seq=row.get("seq"),
+            created_at=parse_datetime(row["created_at"]),
+            updated_at=parse_datetime(row["updated_at"]) if row["updated_at"] else None,
+        )
+        if row["sender_id"] in senders:
+            message.sender = senders[row["sender_id"]]
+        else:
+            message.sender = None
+        messages.append(message)
+    return messages
+
+
+def chat_history(chat: Chat) -> list[ChatMessage]:
+    """All messages of ``chat`` in (created_at, id) order, archived ones first."""
+    live = list(
+        ChatMessage.objects.filter(chat=chat)
+        .select_related("sender__profile")
+        .order_by("created_at", "id")
+    )
+    for message in live:
+        message.chat = chat
+    archived = archived_messages(chat)
+    if not archived:
+        return live
+    archived_ids = {message.id for message in archived}
+    return archived + [message for message in live if message.id not in archived_ids]
@@ -0,0 +1,170 @@
+"""
+Denormalized message summary on Chat: count, latest message time, preview
+and sender.
+
+The chat inbox lists chats with their latest message; reading that from
+ChatMessage costs a join or a prefetch of every message per chat.  Instead
+messages are inserted through ``create_message``, which locks the chat row,
+inserts the message and folds it into the chat row with a single UPDATE.
+``message_count`` doubles as the chat's message sequence: each message's
+``seq`` is the locked count plus one, written with the INSERT itself, which
+read watermarks build on (see api.utils.read_state).  The lock serializes
+inserts per chat (SELECT ... FOR UPDATE on PostgreSQL, IMMEDIATE
+transactions on SQLite), so no two messages share a ``seq``.  Archival moves messages out
+of ChatMessage but leaves the summary alone, since the count includes
+archived messages.
+
+``repair_chat_summaries`` recomputes every chat from ChatMessage and the
+archives, for drift after manual edits or deletes.  Because the count is the
+sequence, the repair only ever raises it: after a message row is deleted
+the live count falls below the highest ``seq`` handed out, and lowering the
+count would hand that ``seq`` out again.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+
+from ..models import Chat, ChatArchive, ChatMessage
+from .chat_archive import decode_messages
+from .read_state import advance_watermark
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_PREVIEW_LENGTH = Chat._meta.get_field("last_message_preview").max_length
+REPAIR_BATCH_SIZE = 500
+
+
+def message_preview(text: str) -> str:
+    """``text`` with whitespace collapsed, cut to ``MESSAGE_PREVIEW_LENGTH`` characters."""
+    text = " ".join((text or "").split())
+    if len(text) <= MESSAGE_PREVIEW_LENGTH:
+        return text
+    return text[:MESSAGE_PREVIEW_LENGTH - 1] + "…"
+
+
+def create_message(chat: Chat, locked: bool = False, **fields) -> ChatMessage:
+    """
+    Insert a message into ``chat`` and fold it into the chat's summary columns.
+
+    Runs in the caller's transaction (or its own).  Pass ``locked=True`` when
+    ``chat`` was loaded with ``select_for_update`` in that transaction, which
+    saves re-reading the count.  The latest-message columns only move
+    forward, so an insert with an older timestamp cannot overwrite a newer
+    one.  Also moves the sender's read watermark to their own message.
+
+    Returns:
+        ChatMessage: The saved message, with ``seq`` set
+    """
+    with transaction.atomic(savepoint=False):
+        if not locked:
+            chat.message_count = (
+                Chat.objects.select_for_update().filter(id=chat.id).values_list("message_count", flat=True).get()
+            )
+        message = ChatMessage.objects.create(chat=chat, seq=chat.message_count + 1, **fields)
+        is_latest = Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.created_at)
+        Chat.objects.filter(id=chat.id).update(
+            message_count=F("message_count") + 1,
+            last_message_at=Case(When(is_latest, then=Value(message.created_at)), default=F("last_message_at")),
+            last_message_preview=Case(
+                When(is_latest, then=Value(message_preview(message.text))), default=F("last_message_preview")
+            ),
+            last_sender_id=Case(
+                When(is_latest, then=Value(message.sender_id)), default=F("last_sender_id"), output_field=IntegerField()
+            ),
+        )
+        chat.message_count = message.seq
+        advance_watermark(chat.id, message.sender_id, message.seq, message.id)
+    return message
+
+
+def _summaries(chat_ids: list) -> dict:
+    """Recomputed summary values for ``chat_ids``: {chat_id: {field: value}}."""
+    summaries = {
+        chat_id: {"message_count": 0, "last_message_at": None, "last_message_preview": "", "last_sender_id": None}
+        for chat_id in chat_ids
+    }
+
+    latest_live = ChatMessage.objects.filter(chat=OuterRef("pk")).order_by("-created_at", "-id").values("id")[:1]
+    latest_ids = Chat.objects.filter(id__in=chat_ids).annotate(
+        latest_id=Subquery(latest_live)
+    ).exclude(latest_id__isnull=True).values_list("latest_id", flat=True)
+    counts = ChatMessage.objects.filter(chat_id__in=chat_ids).values("chat_id").annotate(
+        count=Count("id"), max_seq=Max("seq")
+    )
+    for row in counts:
+        summaries[row["chat_id"]]["message_count"] = row["count"]
+        summaries[row["chat_id"]]["max_seq"] = row["max_seq"] or 0
+    for message in ChatMessage.objects.filter(id__in=list(latest_ids)).only(
+        "chat_id", "sender_id", "text", "created_at"
+    ):
+        summaries[message.chat_id].update(
+            last_message_at=message.created_at,
+            last_message_preview=message_preview(message.text),
+            last_sender_id=message.sender_id,
+        )
+
+    # Archived messages count too (their seqs are below the live ones); the
+    # archive's newest message only matters when no live message is newer,
+    # which is the rare case worth a decompress
+    for archive in ChatArchive.objects.filter(chat_id__in=chat_ids).only(
+        "chat_id", "message_count", "last_message_at"
+    ):
+        summary = summaries[archive.chat_id]
+        summary["message_count"] += archive.message_count
+        live_latest = summary["last_message_at"]
+        if archive.last_message_at and (live_latest is None or archive.last_message_at > live_latest):
+            rows = decode_messages(
+                ChatArchive.objects.filter(id=archive.id).values_list("messages_blob", flat=True).first()
+            )
+            if rows:
+                row = rows[-1]
+                summary.update(
+                    last_message_at=archive.last_message_at,
+                    last_message_preview=message_preview(row["text"]),
+                    last_sender_id=row["sender_id"],
+                )
+    for summary in summaries.values():
+        summary["message_count"] = max(summary["message_count"], summary.pop("max_seq", 0))
+    return summaries
+
+
+def repair_chat_summaries(batch_size: int = REPAIR_BATCH_SIZE, dry_run: bool = False) -> tuple[int, int]:
+    """
+    Recompute the summary columns of every chat, ``batch_size`` chats at a time.
+
+    Each batch runs in its own transaction with the chat rows locked, so a
+    message inserted meanwhile is either counted or waits for the batch:
+    one grouped count, one latest-message lookup, one archive lookup and one
+    bulk UPDATE of the chats that drifted.  ``message_count`` is never
+    lowered (it is the chat's seq source, see the module docstring).
+
+    Returns:
+        tuple: (chats checked, chats repaired)
+    """
+    fields = ["message_count", "last_message_at", "last_message_preview", "last_sender_id"]
+    checked = repaired = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            chats = list(
+                Chat.objects.select_for_update().filter(id__gt=last_id).order_by("id").only("id", *fields)[:batch_size]
+            )
+            if not chats:
+                break
+            last_id = chats[-1].id
+            summaries = _summaries([chat.id for chat in chats])
+            drifted = []
+            for chat in chats:
+                summary = summaries[chat.id]
+                summary["message_count"] = max(summary["message_count"], chat.message_count)
+                if any(getattr(chat, field) != summary[field] for field in fields):
+                    for field in fields:
+                        setattr(chat, field, summary[field])
+                    drifted.append(chat)
+            if drifted and not dry_run:
+                Chat.objects.bulk_update(drifted, list(Chat.MESSAGE_SUMMARY_FIELDS))
+        checked += len(chats)
+        repaired += len(drifted)
+    logger.info("Chat summaries: checked %s chats, %s %s drifted", checked, "found" if dry_run else "repaired", repaired)
+    return checked, repaired
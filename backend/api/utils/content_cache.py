@@ -0,0 +1,136 @@
+"""
+Server-side cache and HTTP validators for the static content catalogs.
+
+Guidance resources, music tracks, mind care boosters and meditation sessions
+only change when an admin edits them, so their list payloads are built once
+per filter combination and kept in the Django cache.  Each catalog carries a
+version stamp (the time it was last invalidated); bumping the stamp from the
+post_save/post_delete signals in ``api.signals`` (on commit) makes every cached filter
+combination for that catalog stale at once.
+
+Responses carry an ETag and Last-Modified header so mobile clients can send
+``If-None-Match`` / ``If-Modified-Since`` and receive an empty 304.
+
+Invalidation only reaches the processes sharing the cache.  The local-memory
+backend is per process, so other workers would keep serving a stale catalog
+until the entries time out: with it, payloads and version stamps expire after
+``LOCAL_CATALOG_CACHE_TIMEOUT`` instead.  Set CACHE_REDIS_URL to share the cache
+between workers and keep entries until they are invalidated.
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Callable
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Catalog names used in cache keys and by the invalidation signals
+CATALOG_GUIDANCE = "guidance"
+CATALOG_MUSIC = "music"
+CATALOG_BOOSTERS = "boosters"
+CATALOG_MEDITATIONS = "meditations"
+
+# Entries are invalidated explicitly; the timeout only bounds memory use
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+# Bounds how long other workers serve a stale catalog with a per-process cache
+LOCAL_CATALOG_CACHE_TIMEOUT = 60
+
+
+def _timeouts() -> tuple[int, int | None]:
+    """(payload timeout, version stamp timeout) for the configured cache."""
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return LOCAL_CATALOG_CACHE_TIMEOUT, LOCAL_CATALOG_CACHE_TIMEOUT
+    return CATALOG_CACHE_TIMEOUT, None
+
+
+def _version_key(catalog: str) -> str:
+    return f"content_catalog:{catalog}:version"
+
+
+def get_catalog_version(catalog: str) -> int:
+    """
+    Return the catalog's version stamp (unix time of the last invalidation).
+
+    A stamp is created on first use so that a cold cache still produces a
+    stable Last-Modified value until the next edit.
+    """
+    version = cache.get(_version_key(catalog))
+    if version is None:
+        version = int(time.time())
+        # add() keeps the first writer's value if several requests race here
+        cache.add(_version_key(catalog), version, timeout=_timeouts()[1])
+        version = cache.get(_version_key(catalog), version)
+    return version
+
+
+def invalidate_catalog(catalog: str) -> None:
+    """Mark every cached payload of ``catalog`` as stale."""
+    previous = cache.get(_version_key(catalog)) or 0
+    # Guarantee a new stamp even if two edits land within the same second
+    version = max(int(time.time()), previous + 1)
+    cache.set(_version_key(catalog), version, timeout=_timeouts()[1])
+    logger.debug("Content catalog %s invalidated (version=%s)", catalog, version)
+
+
+def _payload_key(catalog: str, version: int, params: dict) -> str:
+    # JSON keeps keys and values apart: joining raw values with "&" let
+    # category="a&type=x" share the key of category="a", type="x"
+    normalized = json.dumps({key: value for key, value in params.items() if value}, sort_keys=True, default=str)
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return f"content_catalog:{catalog}:{version}:{digest}"
+
+
+def get_cached_catalog(catalog: str, params: dict, builder: Callable[[], dict]) -> tuple[dict, str, int]:
+    """
+    Fetch a catalog payload for one filter combination, building it on a miss.
+
+    Args:
+        catalog: Catalog name (one of the CATALOG_* constants)
+        params: Filter values that select this payload (empty values are ignored)
+        builder: Callable returning the JSON-serializable payload
+
+    Returns:
+        tuple: (payload, etag, version)
+    """
+    version = get_catalog_version(catalog)
+    key = _payload_key(catalog, version, params)
+    entry = cache.get(key)
+    if entry is None:
+        data = builder()
+        encoded = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode("utf-8")
+        entry = {
+            "data": data,
+            "etag": quote_etag(hashlib.sha1(encoded).hexdigest()),
+        }
+        cache.set(key, entry, timeout=_timeouts()[0])
+    return entry["data"], entry["etag"], version
+
+
+def catalog_response(request, catalog: str, params: dict, builder: Callable[[], dict]):
+    """
+    Build a cached catalog response, answering 304 when the client is current.
+
+    Args:
+        request: Incoming DRF request
+        catalog: Catalog name (one of the CATALOG_* constants)
+        params: Filter values that select this payload
+        builder: Callable returning the JSON-serializable payload
+
+    Returns:
+        Response, or HttpResponseNotModified if the client's validators match
+    """
+    data, etag, version = get_cached_catalog(catalog, params, builder)
+    response = Response(data)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(version)
+    # Clients must revalidate, but a revalidation costs no body when unchanged
+    response["Cache-Control"] = "private, no-cache"
+    return get_conditional_response(request, etag=etag, last_modified=version, response=response)
@@ -0,0 +1,185 @@
+"""
+Running-cost ticker for active chats.
+
+Instead of polling ``ChatListView`` for ``current_estimated_cost``, clients
+fetch the chat's cost state once (``chats/<id>/cost/``) and tick locally:
+cost = ceil(elapsed minutes) * rate, starting at ``started_at``.  The state
+includes what has already been charged and, for the chat's client only, the
+wallet balance and the moment the running cost will exceed what they can pay.
+
+The server warns once per chat, shortly before that moment, by pushing a
+``low_balance_warning`` frame to the client's chat sockets (never to the
+counsellor's).  The client's ChatConsumer waits for that moment and sends the
+warning from the socket process, so it is delivered with the in-memory
+channel layer too; process_chat_billing only warns when the channel layer is
+shared between processes (see ``channel_layer_is_shared``).
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import Chat
+from .billing import CHAT_RATE_PER_MINUTE, calculate_chat_billing, calculate_chat_duration_minutes
+from .presence import channel_layer_is_shared
+
+logger = logging.getLogger(__name__)
+
+# Warn this long before the running cost exceeds the wallet balance
+LOW_BALANCE_WARNING_MINUTES = 2
+# How often a client socket re-checks a chat that has not started yet
+LOW_BALANCE_RECHECK_SECONDS = 60
+
+
+def client_group_name(chat_id) -> str:
+    """Group of the chat's client sockets, for frames the counsellor must not see."""
+    return f"chat_{chat_id}_client"
+
+
+def with_wallet_balance(queryset):
+    """Annotate chats with the user's wallet balance (no extra query per chat)."""
+    return queryset.annotate(wallet_balance=F("user__profile__wallet_minutes"))
+
+
+def funds_exhausted_at(chat: Chat):
+    """
+    When the running cost of an active chat first exceeds what the user can
+    pay (the amount already charged plus the wallet balance), or None.
+    """
+    if chat.status != Chat.STATUS_ACTIVE or not chat.started_at:
+        return None
+    charged = chat.billed_amount or Decimal("0.00")
+    affordable_minutes = int((charged + (chat.wallet_balance or 0)) / CHAT_RATE_PER_MINUTE)
+    return chat.started_at + timedelta(minutes=affordable_minutes)
+
+
+def chat_cost_state(chat: Chat, now=None, include_wallet: bool = True) -> dict:
+    """
+    Cost state of a chat annotated by ``with_wallet_balance``.
+
+    The wallet fields are the client's private data: pass
+    ``include_wallet=False`` for anyone else (the counsellor).
+    """
+    now = now or timezone.now()
+    state = {
+        "chat_id": chat.id,
+        "status": chat.status,
+        "started_at": chat.started_at.isoformat() if chat.started_at else None,
+        "ended_at": chat.ended_at.isoformat() if chat.ended_at else None,
+        "rate_per_minute": float(CHAT_RATE_PER_MINUTE),
+        "duration_minutes": calculate_chat_duration_minutes(chat),
+        "estimated_cost": float(calculate_chat_billing(chat)),
+        "charged_amount": float(chat.billed_amount or 0),
+        "server_time": now.isoformat(),
+    }
+    if include_wallet:
+        exhausted_at = funds_exhausted_at(chat)
+        state.update({
+            "wallet_balance": chat.wallet_balance or 0,
+            "funds_exhausted_at": exhausted_at.isoformat() if exhausted_at else None,
+            "low_balance_warned": chat.low_balance_warned_at is not None,
+        })
+    return state
+
+
+def warn_low_balance(chat: Chat, now=None) -> bool:
+    """
+    Fire the low-balance warning for ``chat`` if it is due and not yet sent.
+
+    The warning is due ``LOW_BALANCE_WARNING_MINUTES`` before the funds run
+    out.  The ``low_balance_warned_at`` UPDATE is conditional, so concurrent
+    callers (the client's sockets and the periodic billing job) warn at most
+    once.  The warning is claimed before it is pushed, so only call this where
+    the push reaches the client's sockets.
+
+    Returns:
+        bool: True if this call sent the warning
+    """
+    now = now or timezone.now()
+    exhausted_at = funds_exhausted_at(chat)
+    if chat.low_balance_warned_at or exhausted_at is None:
+        return False
+    if now < exhausted_at - timedelta(minutes=LOW_BALANCE_WARNING_MINUTES):
+        return False
+    claimed = Chat.objects.filter(id=chat.id, low_balance_warned_at__isnull=True).update(
+        low_balance_warned_at=now
+    )
+    if not claimed:
+        return False
+    chat.low_balance_warned_at = now
+
+    logger.info(
+        "Low balance warning for chat %s: wallet=₹%s, funds exhausted at %s",
+        chat.id, chat.wallet_balance, exhausted_at,
+    )
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        message = {"type": "chat.low_balance", "state": chat_cost_state(chat, now)}
+
+        def send():
+            try:
+                async_to_sync(channel_layer.group_send)(client_group_name(chat.id), message)
+            except Exception as e:
+                logger.error("Failed to push low balance warning for chat %s: %s", chat.id, e)
+
+        transaction.on_commit(send)
+    return True
+
+
+def check_low_balance(chat_id, now=None):
+    """
+    Warn the client of ``chat_id`` if the warning is due; used by their socket.
+
+    Returns:
+        float | None: Seconds until the warning is due (check again then),
+        or None once there is nothing left to warn about
+    """
+    now = now or timezone.now()
+    chat = with_wallet_balance(Chat.objects.filter(id=chat_id)).first()
+    if chat is None or chat.low_balance_warned_at:
+        return None
+    if chat.status in (Chat.STATUS_COMPLETED, Chat.STATUS_CANCELLED):
+        return None
+    exhausted_at = funds_exhausted_at(chat)
+    if exhausted_at is None:
+        # Not started yet (or inactive): its clock has not begun
+        return LOW_BALANCE_RECHECK_SECONDS
+    due_at = exhausted_at - timedelta(minutes=LOW_BALANCE_WARNING_MINUTES)
+    if now < due_at:
+        # A top-up in the meantime only moves the moment later
+        return (due_at - now).total_seconds()
+    warn_low_balance(chat, now)
+    return None
+
+
+def warn_low_balance_chats(now=None) -> int:
+    """
+    Check every active, not-yet-warned chat and warn those running out of funds.
+
+    One query loads the candidates with their wallet balances.  Does nothing
+    unless the channel layer reaches the sockets from this process; the
+    client's sockets warn for themselves then.
+
+    Returns:
+        int: Number of warnings sent
+    """
+    if not channel_layer_is_shared():
+        return 0
+    now = now or timezone.now()
+    chats = with_wallet_balance(
+        Chat.objects.filter(
+            status=Chat.STATUS_ACTIVE,
+            started_at__isnull=False,
+            low_balance_warned_at__isnull=True,
+        )
+    )
+    warned = 0
+    for chat in chats:
+        if warn_low_balance(chat, now):
+            warned += 1
+    return warned
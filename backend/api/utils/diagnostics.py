@@ -0,0 +1,28 @@
+"""
+Gate for debug-only diagnostics in request paths.
+
+Several views log extra context for debugging (counts, samples of rows) that
+needs queries the response itself does not.  Those must not run in
+production, where the loggers sit at INFO: wrap them in
+
+    if debug_diagnostics(logger):
+        ...
+
+which is False unless the logger emits DEBUG.  When it does, only a sample
+of requests (``DIAGNOSTICS_SAMPLE_RATE``, 1.0 = all) pays for diagnostics,
+so DEBUG can be switched on under load without multiplying query volume.
+``manage.py check_query_counts`` keeps the production path honest.
+"""
+import logging
+import random
+
+from django.conf import settings
+
+DIAGNOSTICS_SAMPLE_RATE = getattr(settings, "DIAGNOSTICS_SAMPLE_RATE", 1.0)
+
+
+def debug_diagnostics(log: logging.Logger) -> bool:
+    """Whether to run debug-only diagnostic queries for this request."""
+    if not log.isEnabledFor(logging.DEBUG):
+        return False
+    return DIAGNOSTICS_SAMPLE_RATE >= 1 or random.random() < DIAGNOSTICS_SAMPLE_RATE
@@ -0,0 +1,179 @@
+"""
+Email outbox: queue mail in the database, deliver it from a worker.
+
+Sending inline made every OTP request open its own TLS connection to the
+SMTP server and hold the request worker for the whole exchange (seconds
+against smtp.gmail.com), and a slow or unreachable server surfaced as slow
+sign-ups.  Request handlers now only ``enqueue_email`` - one INSERT, in the
+same transaction as the data the message refers to - and return.
+
+``drain_outbox`` (run by ``manage.py send_outbox_emails``, once or with
+``--loop``) delivers due messages in batches over one SMTP connection that
+stays open for the whole drain:
+
+- a batch is claimed by moving its rows to ``sending`` with
+  ``next_attempt_at`` pushed ``OUTBOX_LEASE_SECONDS`` ahead
+  (``SELECT ... FOR UPDATE SKIP LOCKED`` where supported), so concurrent
+  workers never share a message and a worker that dies mid-batch only
+  delays its messages until the lease runs out;
+- a failed send reschedules the message with exponential backoff, until
+  ``OUTBOX_MAX_ATTEMPTS`` marks it failed; a message the server refused
+  leaves the connection in use, any other error closes it and the next
+  message reopens it;
+- messages past their ``expires_at`` (an OTP nobody can use any more) are
+  marked failed instead of sent.
+
+Delivery is at-least-once: a worker that dies after sending but before
+recording the batch leaves those messages to be sent again.
+
+Rows hold the recipient's address and, for OTP mail, the code in plain text,
+so ``purge_outbox`` (run by the worker after every drain) deletes sent and
+failed messages once they are ``OUTBOX_RETENTION`` old, and the user purge
+engine deletes a user's messages with the user (api.utils.purge).
+"""
+import logging
+import random
+import smtplib
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import OutboundEmail
+from .emails import normalize_email
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_RETRY_MAX_SECONDS = 3600
+# Longer than a batch can take to send; a claimed message is retried after it
+OUTBOX_LEASE_SECONDS = 300
+# Sent and failed messages are kept this long for troubleshooting
+OUTBOX_RETENTION = timedelta(days=1)
+# Replies refusing one message; smtplib resets the session and it stays usable
+SESSION_INTACT_ERRORS = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+
+def enqueue_email(to_email: str, subject: str, body: str, from_email: str = "", expires_at=None) -> OutboundEmail:
+    """Queue a plain text email for the outbox worker."""
+    return OutboundEmail.objects.create(
+        to_email=normalize_email(to_email),
+        from_email=from_email,
+        subject=subject,
+        body=body,
+        expires_at=expires_at,
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before attempt ``attempts + 1``: doubling from the base, capped, with jitter."""
+    seconds = min(OUTBOX_RETRY_MAX_SECONDS, OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def claim_batch(batch_size: int = OUTBOX_BATCH_SIZE) -> list:
+    """Lease up to ``batch_size`` due messages to this worker, oldest due first."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(
+            status__in=(OutboundEmail.STATUS_PENDING, OutboundEmail.STATUS_SENDING),
+            next_attempt_at__lte=now,
+        ).order_by("next_attempt_at")
+        if db_connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        OutboundEmail.objects.filter(id__in=[message.id for message in batch]).update(
+            status=OutboundEmail.STATUS_SENDING,
+            next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+        )
+    return batch
+
+
+def drain_outbox(batch_size: int = OUTBOX_BATCH_SIZE, max_batches=None, connection=None) -> Counter:
+    """
+    Deliver due messages until none are left (or ``max_batches`` ran).
+
+    All batches share one mail connection, opened on the first send.
+    Returns counts of sent, retried, failed and expired messages.
+    """
+    stats = Counter()
+    connection = connection or get_connection()
+    default_from = getattr(settings, "DEFAULT_FROM_EMAIL", None)
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            batch = claim_batch(batch_size)
+            if not batch:
+                break
+            batches += 1
+            sent_ids = []
+            now = timezone.now()
+            for message in batch:
+                if message.expires_at and message.expires_at <= now:
+                    message.status = OutboundEmail.STATUS_FAILED
+                    message.last_error = "expired before delivery"
+                    message.save(update_fields=["status", "last_error"])
+                    stats["expired"] += 1
+                    continue
+                try:
+                    # No-op while the connection is open; reopens after a failure
+                    connection.open()
+                    connection.send_messages([EmailMessage(
+                        subject=message.subject,
+                        body=message.body,
+                        from_email=message.from_email or default_from,
+                        to=[message.to_email],
+                    )])
+                except Exception as exc:
+                    if not isinstance(exc, SESSION_INTACT_ERRORS):
+                        connection.close()
+                    stats[reschedule(message, exc)] += 1
+                else:
+                    sent_ids.append(message.id)
+            if sent_ids:
+                OutboundEmail.objects.filter(id__in=sent_ids).update(
+                    status=OutboundEmail.STATUS_SENT,
+                    attempts=F("attempts") + 1,
+                    sent_at=timezone.now(),
+                    last_error="",
+                )
+                stats["sent"] += len(sent_ids)
+            if len(batch) < batch_size:
+                break
+    finally:
+        connection.close()
+    return stats
+
+
+def reschedule(message: OutboundEmail, exc: Exception) -> str:
+    """Record a failed attempt; retry with backoff or give up. Returns the stats key."""
+    message.attempts += 1
+    message.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboundEmail.STATUS_FAILED
+        outcome = "failed"
+        logger.error("Giving up on email %s to %s after %s attempts: %s",
+                     message.id, message.to_email, message.attempts, message.last_error)
+    else:
+        message.status = OutboundEmail.STATUS_PENDING
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+        outcome = "retried"
+        logger.warning("Email %s to %s failed (attempt %s), retrying at %s: %s",
+                       message.id, message.to_email, message.attempts, message.next_attempt_at, message.last_error)
+    message.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+    return outcome
+
+
+def purge_outbox(retention: timedelta = OUTBOX_RETENTION) -> int:
+    """Delete sent and failed messages queued more than ``retention`` ago; returns how many."""
+    deleted, _ = OutboundEmail.objects.filter(
+        status__in=(OutboundEmail.STATUS_SENT, OutboundEmail.STATUS_FAILED),
+        created_at__lt=timezone.now() - retention,
+    ).delete()
+    return deleted
@@ -0,0 +1,26 @@
+"""
+Case-insensitive email lookups that use an index.
+
+``email__iexact`` compiles to ``UPPER(email) = UPPER(...)`` on PostgreSQL and
+``LIKE ... ESCAPE`` on SQLite; neither can use an index on ``email``, so at
+scale every login by email and every registration check scans ``auth_user``.
+
+Emails are compared in lower case instead: the input is normalized with
+``normalize_email`` and matched against ``LOWER(email)``, which the
+``auth_user_email_lower`` expression index (migration 0036, on PostgreSQL
+and SQLite alike) turns into an index seek.  Registration already stores
+emails lower-cased; the index covers older and admin-created accounts with
+mixed case.  EmailOTP rows are always written normalized, so their lookups
+are plain equality on ``email``.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def users_by_email(email: str):
+    """Users whose email equals ``email`` ignoring case, via the LOWER(email) index."""
+    return get_user_model().objects.alias(email_lower=Lower("email")).filter(email_lower=normalize_email(email))
@@ -0,0 +1,29 @@
+"""
+Password hasher with a configurable PBKDF2 work factor.
+
+Every login verifies one PBKDF2 hash, and at Django's default iteration count
+that hash is most of the endpoint's CPU time.  Setting
+``PASSWORD_PBKDF2_ITERATIONS`` (env, see core.settings) puts this hasher
+first in ``PASSWORD_HASHERS`` with that count: existing hashes still verify,
+and Django rewrites each one to the new count on the user's next successful
+login (``check_password`` upgrades hashes whose work factor differs from the
+preferred hasher's).  Unset, Django's own hasher and count apply.
+
+Fewer iterations make stolen hashes cheaper to brute-force as well; this is
+an explicit trade-off for deployments where login throughput matters more,
+not a default.  ``manage.py benchmark_login`` measures the effect.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with ``settings.PASSWORD_PBKDF2_ITERATIONS`` iterations."""
+
+    # Same algorithm name: existing pbkdf2_sha256 hashes are verified by this
+    # hasher and only re-encoded when their iteration count differs
+    algorithm = "pbkdf2_sha256"
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", None) or PBKDF2PasswordHasher.iterations
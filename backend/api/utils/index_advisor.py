@@ -0,0 +1,176 @@
+"""
+Index advisor: find indexes that cost writes without serving reads.
+
+Two independent checks over the live schema (read through Django's
+introspection, so it reflects what migrations actually created):
+
+* Redundancy: a non-unique index whose columns are a leading prefix of
+  another index on the same table (same or fully reversed sort directions,
+  since a B-tree can be scanned backwards) never gives the planner anything
+  the wider index does not.  The same holds for two indexes that only
+  differ in the direction of the columns after an equality-matched leading
+  column.
+* Usage: statements captured from a workload are passed through
+  ``EXPLAIN QUERY PLAN`` (SQLite) or ``EXPLAIN`` (PostgreSQL) and the index
+  names in the plans are collected.  Indexes on the workload's tables that no
+  plan touches are reported as unused by that workload.
+
+Partial indexes and unique indexes are never flagged as redundant: they
+enforce or target something a plain index does not.
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.apps import apps
+
+EXPLAINABLE_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+SQLITE_INDEX_RE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+POSTGRES_INDEX_RE = re.compile(r"(?:Index(?: Only)? Scan(?: Backward)? using|Bitmap Index Scan on) (\w+)")
+TABLE_RE = re.compile(r'(?:FROM|JOIN|UPDATE|INTO)\s+"?(\w+)"?', re.IGNORECASE)
+
+
+@dataclass
+class IndexInfo:
+    table: str
+    name: str
+    columns: tuple
+    orders: tuple
+    unique: bool = False
+    partial: bool = False
+    used_by: set = field(default_factory=set)
+    covered_by: str | None = None
+
+    @property
+    def definition(self) -> str:
+        parts = [
+            f"{column} DESC" if order == "DESC" else column
+            for column, order in zip(self.columns, self.orders)
+        ]
+        return f"{self.table}({', '.join(parts)})"
+
+
+def _partial_index_names(model) -> set:
+    names = {index.name for index in model._meta.indexes if index.condition is not None}
+    names.update(
+        constraint.name for constraint in model._meta.constraints
+        if getattr(constraint, "condition", None) is not None
+    )
+    return names
+
+
+def collect_indexes(connection, app_label: str = "api") -> dict:
+    """All secondary indexes of ``app_label``'s tables, keyed by table name."""
+    indexes = {}
+    with connection.cursor() as cursor:
+        for model in apps.get_app_config(app_label).get_models():
+            table = model._meta.db_table
+            partial = _partial_index_names(model)
+            table_indexes = []
+            for name, info in connection.introspection.get_constraints(cursor, table).items():
+                # Unique constraints are backed by an index even when
+                # introspection does not report them as one
+                if not (info.get("index") or info.get("unique")) or info.get("primary_key"):
+                    continue
+                columns = tuple(info["columns"])
+                orders = tuple(info.get("orders") or ["ASC"] * len(columns))
+                table_indexes.append(IndexInfo(
+                    table=table,
+                    name=name,
+                    columns=columns,
+                    orders=orders,
+                    unique=bool(info.get("unique")),
+                    partial=name in partial,
+                ))
+            indexes[table] = sorted(table_indexes, key=lambda index: index.name)
+    return indexes
+
+
+def _reversed(orders) -> tuple:
+    return tuple("ASC" if order == "DESC" else "DESC" for order in orders)
+
+
+def _covers(wider: IndexInfo, index: IndexInfo) -> bool:
+    width = len(index.columns)
+    if wider is index or wider.partial or len(wider.columns) < width:
+        return False
+    if wider.columns[:width] != index.columns:
+        return False
+    prefix_orders = wider.orders[:width]
+    if prefix_orders not in (index.orders, _reversed(index.orders)):
+        # Mirrors that differ only after the leading column, e.g. (chat, created_at)
+        # and (chat, -created_at): with equality on the leading column, as for a
+        # foreign key, either one serves both sort directions
+        mirrored = (
+            len(wider.columns) == width > 1
+            and prefix_orders[0] == index.orders[0]
+            and prefix_orders[1:] == _reversed(index.orders[1:])
+        )
+        return mirrored and not wider.unique and "DESC" not in wider.orders[1:]
+    if len(wider.columns) > width or wider.unique:
+        return True
+    # Exact duplicates: keep the alphabetically first one
+    return wider.name < index.name
+
+
+def mark_redundant(indexes: dict) -> list[IndexInfo]:
+    """Flag (and return) indexes fully covered by another index on their table."""
+    redundant = []
+    for table_indexes in indexes.values():
+        for index in table_indexes:
+            if index.unique or index.partial:
+                continue
+            wider = next((other for other in table_indexes if _covers(other, index)), None)
+            if wider is not None:
+                index.covered_by = wider.name
+                redundant.append(index)
+    return redundant
+
+
+def explain(connection, sql: str) -> str:
+    """Query plan of ``sql`` as text."""
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+
+
+def plan_indexes(connection, plan: str) -> set:
+    pattern = SQLITE_INDEX_RE if connection.vendor == "sqlite" else POSTGRES_INDEX_RE
+    return set(pattern.findall(plan))
+
+
+def analyze_workload(connection, indexes: dict, statements) -> tuple[set, dict]:
+    """
+    EXPLAIN each ``(label, sql)`` statement and record which indexes it uses.
+
+    Returns:
+        tuple: (tables the workload touches, {sql: plan})
+    """
+    by_name = {index.name: index for table_indexes in indexes.values() for index in table_indexes}
+    tables = set()
+    plans = {}
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Empty or tiny tables always plan as sequential scans
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    for label, sql in statements:
+        if not sql.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS):
+            continue
+        tables.update(table for table in TABLE_RE.findall(sql) if table in indexes)
+        if sql not in plans:
+            plans[sql] = explain(connection, sql)
+        for name in plan_indexes(connection, plans[sql]):
+            if name in by_name:
+                by_name[name].used_by.add(label)
+    return tables, plans
+
+
+def unused_indexes(indexes: dict, tables) -> list[IndexInfo]:
+    """Non-unique indexes on ``tables`` that no workload plan used."""
+    return [
+        index
+        for table in sorted(tables)
+        for index in indexes[table]
+        if not index.used_by and not index.unique
+    ]
@@ -0,0 +1,135 @@
+"""
+Non-blocking, structured and sampled log output for the chat hot paths.
+
+A ``StreamHandler`` writes and flushes stdout in the thread that logs, so on
+the Daphne event loop every ``logger.info`` in ChatConsumer is a blocking
+write; a slow pipe (container log driver, terminal) stalls every socket in
+the process.  ``BackgroundQueueHandler`` instead puts the record on a bounded
+queue and returns; a single writer thread formats and writes it.  When the
+writer falls behind and the queue is full, records are dropped and counted
+rather than blocking the loop.
+
+Messages stay %-style (``logger.info("Chat %s saved", chat_id)``): the
+arguments are only interpolated for records that pass the level check and
+the sampling filter.  ``JSONFormatter`` emits one JSON object per line for
+log shippers, and ``SamplingFilter`` keeps a fraction of high-volume records
+(e.g. one ``WS RECEIVE`` in a hundred); warnings and errors always pass.
+
+All three are wired in ``LOGGING`` (core.settings) and switched by the
+``LOG_ASYNC`` and ``LOG_FORMAT`` environment variables.
+``manage.py benchmark_log_stall`` measures event-loop stalls with and without
+the pipeline.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_QUEUE_SIZE = 10000
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, message (and exc when set)."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of matching records at INFO and below.
+
+    ``rates`` maps a logger name, optionally followed by ``:`` and a message
+    prefix, to the fraction to keep: ``{"api.consumers:WS RECEIVE": 0.01}``
+    keeps 1% of the consumer's ``WS RECEIVE`` records, ``{"django.db": 0.1}``
+    10% of everything from ``django.db`` and its children.  The most specific
+    key wins; records matching no key always pass.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = []
+        for key, rate in (rates or {}).items():
+            name, _, prefix = key.partition(":")
+            self.rates.append((name, prefix, float(rate)))
+        # Longest logger name, then longest prefix first
+        self.rates.sort(key=lambda item: (len(item[0]), len(item[1])), reverse=True)
+
+    def _rate(self, record):
+        for name, prefix, rate in self.rates:
+            if record.name != name and not record.name.startswith(name + "."):
+                continue
+            if prefix and not (isinstance(record.msg, str) and record.msg.startswith(prefix)):
+                continue
+            return rate
+        return None
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        rate = self._rate(record)
+        return rate is None or rate >= 1 or random.random() < rate
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Hand records to a writer thread that formats and writes them to ``stream``.
+
+    Only the message is interpolated in the logging thread (its arguments may
+    change afterwards); formatting, JSON encoding and the write happen in the
+    writer thread.  ``dropped`` counts records lost to a full queue.
+    """
+
+    def __init__(self, stream=None, queue_size=LOG_QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        # dictConfig sets the formatter on this handler; it belongs to the writer
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Flush what is queued and stop the writer thread (idempotent)."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.flush()
+
+    def close(self):
+        self.stop()
+        super().close()
+
+
+def console_handler(stream=None, async_output=True):
+    """dictConfig factory for the console handler: queued when ``async_output``, else a plain StreamHandler."""
+    if async_output:
+        return BackgroundQueueHandler(stream)
+    return logging.StreamHandler(stream)
@@ -0,0 +1,78 @@
+"""
+Pre-encoded responses for static JSON payloads.
+
+The legacy content endpoints return module-level constants.  Rather than
+running them through DRF content negotiation, user loading and JSON rendering
+on every call, each payload is rendered to bytes once when the view class is
+defined (i.e. at startup) together with a strong ETag, and served from a plain
+Django view.
+
+Access still requires a valid JWT access token, but the token is only checked
+for signature and expiry; the user row is never loaded.
+"""
+import hashlib
+
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+# Payloads only change on deploy, so clients may keep them for a day
+PRECOMPUTED_MAX_AGE = 60 * 60 * 24
+
+
+class PrecomputedPayload:
+    """A JSON payload rendered to bytes once, with its strong ETag."""
+
+    def __init__(self, payload):
+        # Same renderer DRF uses, so the bytes match the previous responses
+        self.body = JSONRenderer().render(payload)
+        self.etag = quote_etag(hashlib.sha256(self.body).hexdigest())
+
+    def response(self) -> HttpResponse:
+        response = HttpResponse(self.body, content_type="application/json")
+        response["ETag"] = self.etag
+        response["Cache-Control"] = f"private, max-age={PRECOMPUTED_MAX_AGE}"
+        return response
+
+
+def has_valid_access_token(request) -> bool:
+    """Check the Authorization header for a valid access token without a DB lookup."""
+    parts = request.META.get("HTTP_AUTHORIZATION", "").split()
+    if len(parts) != 2 or parts[0] not in jwt_settings.AUTH_HEADER_TYPES:
+        return False
+    try:
+        AccessToken(parts[1])
+    except TokenError:
+        return False
+    return True
+
+
+class PrecomputedJSONView(View):
+    """
+    Serve a static payload from pre-encoded bytes.
+
+    Subclasses set ``payload``; it is rendered when the subclass is created.
+    """
+    payload = None
+    http_method_names = ["get", "head", "options"]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.payload is not None:
+            cls.precomputed = PrecomputedPayload(cls.payload)
+
+    def get(self, request, *args, **kwargs):
+        if not has_valid_access_token(request):
+            response = JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=401,
+            )
+            response["WWW-Authenticate"] = f'{jwt_settings.AUTH_HEADER_TYPES[0]} realm="api"'
+            return response
+        response = self.precomputed.response()
+        return get_conditional_response(request, etag=self.precomputed.etag, response=response)
@@ -0,0 +1,100 @@
+"""
+Live presence of chat participants and ephemeral chat signals.
+
+Presence is kept in memory, not in the database: ChatConsumer registers each
+socket on connect and unregisters it on disconnect, so "is this counselor
+online?" is a dict lookup instead of a query on a DB flag.  A user is online
+while at least one of their sockets is open; ``CounsellorProfile.is_available``
+stays the counselor's own "accepting chats" switch.
+
+Typing indicators are throttled here as well, to at most one broadcast per
+``TYPING_THROTTLE_SECONDS`` per user and chat.
+
+The registry is per process, like the in-memory channel layer: with several
+Daphne workers it must move to a shared store (e.g. Redis) together with
+CHANNEL_LAYERS.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.conf import settings
+
+from ..authentication import ROLE_COUNSELLOR
+
+TYPING_THROTTLE_SECONDS = getattr(settings, "CHAT_TYPING_THROTTLE_SECONDS", 2)
+
+
+class PresenceRegistry:
+    """Open sockets per user, with each user's role."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+        self._roles = {}
+        self._typing_sent = {}
+
+    def connect(self, user_id, channel_name, role) -> bool:
+        """Register a socket; returns True if the user just came online."""
+        with self._lock:
+            came_online = not self._channels[user_id]
+            self._channels[user_id].add(channel_name)
+            self._roles[user_id] = role
+            return came_online
+
+    def disconnect(self, user_id, channel_name) -> bool:
+        """Unregister a socket; returns True if the user just went offline."""
+        with self._lock:
+            channels = self._channels.get(user_id)
+            if not channels or channel_name not in channels:
+                return False
+            channels.discard(channel_name)
+            if channels:
+                return False
+            del self._channels[user_id]
+            self._roles.pop(user_id, None)
+            for key in [key for key in self._typing_sent if key[1] == user_id]:
+                del self._typing_sent[key]
+            return True
+
+    def is_online(self, user_id) -> bool:
+        return bool(self._channels.get(user_id))
+
+    def online(self, user_ids) -> dict:
+        """{user_id: online} for ``user_ids``."""
+        return {user_id: self.is_online(user_id) for user_id in user_ids}
+
+    def online_counsellors(self) -> set:
+        with self._lock:
+            return {user_id for user_id, role in self._roles.items() if role == ROLE_COUNSELLOR}
+
+    def should_send_typing(self, chat_id, user_id, now=None) -> bool:
+        """Throttle: True at most once per TYPING_THROTTLE_SECONDS per (chat, user)."""
+        now = time.monotonic() if now is None else now
+        key = (str(chat_id), user_id)
+        with self._lock:
+            last = self._typing_sent.get(key)
+            if last is not None and now - last < TYPING_THROTTLE_SECONDS:
+                return False
+            self._typing_sent[key] = now
+            return True
+
+    def clear_typing(self, chat_id, user_id) -> bool:
+        """Forget the throttle once the user stops typing; returns whether a typing signal was out."""
+        with self._lock:
+            return self._typing_sent.pop((str(chat_id), user_id), None) is not None
+
+
+presence = PresenceRegistry()
+
+
+def channel_layer_is_shared() -> bool:
+    """
+    Whether group sends reach sockets served by other processes.
+
+    The in-memory layer only reaches sockets of the sending process, so
+    pushes from management commands (e.g. process_chat_billing) go nowhere.
+    """
+    channel_layer = get_channel_layer()
+    return channel_layer is not None and not isinstance(channel_layer, InMemoryChannelLayer)
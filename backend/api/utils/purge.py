@@ -0,0 +1,169 @@
+"""
+Set-based purge engine for deleting users and everything that hangs off them.
+
+``Model.delete()`` and ``QuerySet.delete()`` run Django's cascade collector,
+which loads every related row into memory and deletes them a few at a time.
+For bulk user deletion that takes hours and gigabytes of RAM.
+
+This engine derives a deletion plan from the model graph once (children
+before parents, following each relation's ``on_delete``) and then, for each
+batch of user ids, issues one ``DELETE ... WHERE <path to user> IN (...)`` per
+table (or ``UPDATE ... SET NULL`` for ``SET_NULL`` relations).  No model
+instances are loaded and no signals fire.
+
+Each batch commits in its own transaction and users are processed in id
+order, so an interrupted run simply resumes with the users that remain.
+"""
+import logging
+from collections import Counter
+from dataclasses import dataclass
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models.functions import Lower, Trim
+
+from ..models import ChatArchive, EmailOTP, OutboundEmail
+from .chat_archive import scrub_archived_senders
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = 500
+
+# Rows tied to a user by email rather than by foreign key: (model, field, user
+# field).  These rows store the address normalized (api.utils.emails), so the
+# user's value is normalized the same way in SQL before matching.
+UNLINKED_USER_DATA = [
+    (EmailOTP, "email", "email"),
+    (OutboundEmail, "to_email", "email"),
+]
+
+# Guard against pathological relation cycles
+MAX_PLAN_DEPTH = 8
+
+
+@dataclass(frozen=True)
+class PurgeStep:
+    """Delete (or null out) rows of ``model`` matching ``lookup`` IN <user ids>."""
+    model: type
+    lookup: str
+    set_null_field: str | None = None
+
+    @property
+    def label(self) -> str:
+        action = f"SET NULL {self.set_null_field}" if self.set_null_field else "DELETE"
+        return f"{self.model._meta.db_table}: {action} WHERE {self.lookup}"
+
+
+def _relations(model):
+    """Reverse FK/O2O relations and M2M through tables pointing at ``model``."""
+    for rel in model._meta.related_objects:
+        if rel.many_to_many:
+            through = rel.through
+            yield through, _fk_to(through, model), models.CASCADE
+        else:
+            yield rel.related_model, rel.field, rel.on_delete
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        yield through, _fk_to(through, model), models.CASCADE
+
+
+def _fk_to(through, model):
+    return next(
+        f for f in through._meta.fields
+        if f.is_relation and f.related_model is model
+    )
+
+
+def build_purge_plan(model=User, path: str = "", depth: int = 0) -> list[PurgeStep]:
+    """
+    Ordered purge steps for rows of ``model`` reachable through ``path``.
+
+    Children come before their parents; the final step deletes ``model``
+    itself.  Raises ValueError for PROTECT/RESTRICT relations, which cannot be
+    purged without deciding what to do with the protected rows.
+    """
+    if depth > MAX_PLAN_DEPTH:
+        raise ValueError(f"Relation chain to {model._meta.label} is too deep to purge")
+
+    steps = []
+    own_lookup = f"{path}pk__in" if path else "pk__in"
+    for child, field, on_delete in _relations(model):
+        child_path = f"{field.name}__{path}"
+        if on_delete is models.CASCADE:
+            steps.extend(build_purge_plan(child, child_path, depth + 1))
+        elif on_delete is models.SET_NULL:
+            steps.append(PurgeStep(child, f"{child_path}pk__in" if path else f"{field.name}__in", field.name))
+        elif on_delete is models.DO_NOTHING:
+            continue
+        else:
+            raise ValueError(
+                f"{child._meta.label}.{field.name} uses {on_delete.__name__}; "
+                f"the purge engine only handles CASCADE, SET_NULL and DO_NOTHING"
+            )
+    steps.append(PurgeStep(model, own_lookup))
+    return steps
+
+
+def _execute_step(step: PurgeStep, user_ids, using) -> int:
+    queryset = step.model._base_manager.using(using).filter(**{step.lookup: user_ids})
+    if step.set_null_field:
+        return queryset.update(**{step.set_null_field: None})
+    # Single DELETE statement without the cascade collector (children are
+    # already gone because the plan deletes them first)
+    return queryset._raw_delete(using)
+
+
+def purge_user_batch(user_ids, plan=None, using=DEFAULT_DB_ALIAS) -> Counter:
+    """
+    Purge one batch of users and all their data in a single transaction.
+
+    Returns:
+        Counter: Rows affected per table
+    """
+    plan = plan or build_purge_plan()
+    counts = Counter()
+    user_ids = list(user_ids)
+    with transaction.atomic(using=using):
+        # Archived messages live in blobs the plan's DELETEs cannot reach
+        scrubbed = scrub_archived_senders(user_ids, using=using)
+        if scrubbed:
+            counts[ChatArchive._meta.db_table] += scrubbed
+        for model, field, user_field in UNLINKED_USER_DATA:
+            values = User.objects.using(using).filter(pk__in=user_ids).values(normalized=Lower(Trim(user_field)))
+            affected = model._base_manager.using(using).filter(**{f"{field}__in": values})._raw_delete(using)
+            if affected:
+                counts[model._meta.db_table] += affected
+        for step in plan:
+            affected = _execute_step(step, user_ids, using)
+            if affected:
+                counts[step.model._meta.db_table] += affected
+    return counts
+
+
+def purge_users(queryset, batch_size: int = PURGE_BATCH_SIZE, progress=None, using=DEFAULT_DB_ALIAS) -> Counter:
+    """
+    Purge every user in ``queryset`` in id-ordered batches.
+
+    Only user ids are held in memory.  ``progress(done, total, counts)`` is
+    called after each committed batch.
+
+    Returns:
+        Counter: Rows affected per table over the whole run
+    """
+    plan = build_purge_plan()
+    queryset = queryset.using(using).order_by("pk")
+    total = queryset.count()
+    totals = Counter()
+    done = 0
+    last_id = 0
+    while True:
+        user_ids = list(queryset.filter(pk__gt=last_id).values_list("pk", flat=True)[:batch_size])
+        if not user_ids:
+            break
+        totals.update(purge_user_batch(user_ids, plan=plan, using=using))
+        done += len(user_ids)
+        last_id = user_ids[-1]
+        logger.info("Purged %s/%s users (last id %s)", done, total, last_id)
+        if progress:
+            progress(done, total, totals)
+    return totals
@@ -0,0 +1,74 @@
+"""
+Read watermarks and unread counts.
+
+Every message gets a per-chat sequence number (``ChatMessage.seq``) from the
+chat's maintained ``message_count`` (see api.utils.chat_summary), and every
+participant has a ``ChatReadState`` holding the ``seq`` of the newest
+message they have read.  The unread count of a chat is then
+``message_count - last_read_seq``: badge counts for a whole inbox come from
+the chat rows plus one unique-index lookup each, never from counting
+ChatMessage.
+
+Watermarks only move forward.  Senders' watermarks advance with their own
+messages; readers report progress through the chat socket's ``read`` frame,
+which the consumer debounces to at most one write per
+``READ_DEBOUNCE_SECONDS``.
+"""
+from django.conf import settings
+from django.db.models import F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from ..models import Chat, ChatMessage, ChatReadState
+
+READ_DEBOUNCE_SECONDS = getattr(settings, "CHAT_READ_DEBOUNCE_SECONDS", 2)
+
+
+def advance_watermark(chat_id, user_id, seq, message_id=None) -> bool:
+    """Move ``user_id``'s watermark in ``chat_id`` forward to ``seq``; returns whether it moved."""
+    if not seq:
+        return False
+    moved = ChatReadState.objects.filter(chat_id=chat_id, user_id=user_id, last_read_seq__lt=seq).update(
+        last_read_seq=seq, last_read_message_id=message_id, updated_at=timezone.now()
+    )
+    if moved:
+        return True
+    _, created = ChatReadState.objects.get_or_create(
+        chat_id=chat_id,
+        user_id=user_id,
+        defaults={"last_read_seq": seq, "last_read_message_id": message_id},
+    )
+    return created
+
+
+def mark_read(chat_id, user_id, message_id) -> int | None:
+    """
+    Record that ``user_id`` has read ``chat_id`` up to ``message_id``.
+
+    Returns:
+        int | None: the new watermark, or None if the message is unknown (not
+        in this chat, archived, or predating sequence numbers) or the
+        watermark was already past it.
+    """
+    seq = ChatMessage.objects.filter(id=message_id, chat_id=chat_id).values_list("seq", flat=True).first()
+    if seq and advance_watermark(chat_id, user_id, seq, message_id):
+        return seq
+    return None
+
+
+def with_unread_counts(queryset, user):
+    """Annotate chats with ``unread_count`` for ``user`` (one subquery per row, no COUNT)."""
+    read_seq = ChatReadState.objects.filter(chat=OuterRef("pk"), user_id=user.pk).values("last_read_seq")[:1]
+    return queryset.annotate(
+        unread_count=Greatest(
+            F("message_count") - Coalesce(Subquery(read_seq), Value(0)),
+            Value(0),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def unread_counts(user) -> dict:
+    """{chat_id: unread} for every chat of ``user`` with unread messages, in one query."""
+    chats = with_unread_counts(Chat.objects.filter(Q(user_id=user.pk) | Q(counsellor_id=user.pk)), user)
+    return dict(chats.filter(unread_count__gt=0).order_by().values_list("id", "unread_count"))
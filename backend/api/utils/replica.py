@@ -0,0 +1,156 @@
+"""
+Read-replica routing.
+
+Reads stay on the primary ("default") unless a code path opts in:
+
+* Read-only endpoints mix in ``ReplicaReadMixin``; their GET/HEAD requests
+  read from the replica.  Endpoints that cache what they read (the content
+  catalogs, see api.utils.content_cache) stay on the primary: a rebuild
+  from a lagging replica right after an invalidation would cache stale rows
+  under the new version.  So do endpoints whose GET also writes (chat
+  messages update the chat's activity and may complete it): those decisions
+  must be made on current rows, and a GET never pins the user.
+* Reports and scripts wrap their work in ``use_replica()``; read-only
+  management commands subclass ``ReplicaReportCommand``.
+
+Writes always go to the primary.  After a user writes (any request that
+wrote, or an explicit ``pin_to_primary`` call, e.g. from the chat socket)
+their reads stay on the primary for ``REPLICA_STICKY_SECONDS`` so they
+always see their own writes despite replication lag.  Pins live in the cache,
+which must be shared (e.g. Redis) when several workers serve traffic.
+
+When no replica alias is configured everything reads from the primary.
+Locally, point ``DB_REPLICA_NAME`` at a second SQLite file and refresh it
+with ``manage.py sync_sqlite_replica``.
+"""
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+REPLICA_STICKY_SECONDS = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+@dataclass
+class RoutingState:
+    read_alias: str | None = None
+    wrote: bool = False
+
+
+_routing_state = contextvars.ContextVar("replica_routing_state", default=None)
+
+
+def replica_configured() -> bool:
+    return REPLICA_DB_ALIAS in connections.databases
+
+
+def _pin_key(user_id) -> str:
+    return f"replica:pin:{user_id}"
+
+
+def pin_to_primary(user_id) -> None:
+    """Keep ``user_id``'s reads on the primary for the next few seconds."""
+    if user_id and replica_configured():
+        cache.set(_pin_key(user_id), True, REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id) -> bool:
+    return bool(user_id) and cache.get(_pin_key(user_id)) is not None
+
+
+@contextmanager
+def routing_state():
+    """Track reads and writes for one unit of work (a request, a command)."""
+    token = _routing_state.set(RoutingState())
+    try:
+        yield _routing_state.get()
+    finally:
+        _routing_state.reset(token)
+
+
+def route_reads_to_replica(state: RoutingState, user_id=None) -> bool:
+    """Send the remaining reads of ``state`` to the replica unless the user is pinned."""
+    if not replica_configured() or is_pinned(user_id):
+        return False
+    state.read_alias = REPLICA_DB_ALIAS
+    return True
+
+
+@contextmanager
+def use_replica():
+    """Read from the replica (if configured) inside the block."""
+    with routing_state() as state:
+        route_reads_to_replica(state)
+        yield state
+
+
+class ReplicaRouter:
+    """Database router sending opted-in reads to the replica and all writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or state.read_alias is None:
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction on the primary must see that transaction
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.read_alias
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication
+        return db != REPLICA_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Open a routing state per request and pin users who wrote to the primary.
+
+    The user is read after the view ran, so DRF's JWT authentication has
+    already set it on the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routing_state() as state:
+            request.replica_routing = state
+            response = self.get_response(request)
+            user = getattr(request, "user", None)
+            if state.wrote and request.method not in SAFE_METHODS and user is not None and user.is_authenticated:
+                pin_to_primary(user.id)
+        return response
+
+
+class ReplicaReadMixin:
+    """DRF view mixin: serve safe requests from the replica once the user is authenticated."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        state = getattr(request._request, "replica_routing", None)
+        if state is not None and request.method in SAFE_METHODS:
+            route_reads_to_replica(state, request.user.id)
+
+
+class ReplicaReportCommand(BaseCommand):
+    """Base class for read-only management commands: all reads use the replica."""
+
+    def execute(self, *args, **options):
+        with use_replica():
+            return super().execute(*args, **options)
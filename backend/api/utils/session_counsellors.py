@@ -0,0 +1,148 @@
+"""
+Counselor lookups for UpcomingSession.
+
+Sessions belong to a counselor through the ``counsellor`` foreign key,
+backed by the ``(counsellor, start_time)`` index.  ``counsellor_name`` is
+display text only: matching it with ``icontains`` scans the whole table and
+also matches other counselors whose name contains this one ("Ann" in
+"Joanne").
+
+Older rows only carry the name.  ``backfill_session_counsellors`` resolves
+them once: a name is linked to a counselor when it equals, ignoring case and
+extra whitespace, exactly one counselor's full name or username.  Names that
+match no counselor or several are left unassigned and reported.
+
+``counsellor_sessions_page`` pages a counselor's sessions by keyset on
+``(start_time, id)``, so every page is an index range scan no matter how
+deep.
+"""
+import base64
+import logging
+from collections import Counter, defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from ..models import UpcomingSession
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 5000
+APPOINTMENTS_PAGE_SIZE = 100
+APPOINTMENTS_MAX_PAGE_SIZE = 500
+
+
+def normalize_name(name: str) -> str:
+    return " ".join((name or "").split()).casefold()
+
+
+def counsellor_name_index() -> dict:
+    """{normalized name: counselor id, or None when the name is ambiguous} over every counselor."""
+    index = {}
+    counsellors = User.objects.filter(counsellorprofile__isnull=False).values_list(
+        "id", "username", "first_name", "last_name"
+    )
+    for user_id, username, first_name, last_name in counsellors:
+        names = {normalize_name(username), normalize_name(f"{first_name} {last_name}")}
+        for name in names - {""}:
+            if index.get(name, user_id) != user_id:
+                index[name] = None
+            else:
+                index[name] = user_id
+    return index
+
+
+def backfill_session_counsellors(batch_size: int = BACKFILL_BATCH_SIZE, dry_run: bool = False) -> tuple[Counter, Counter]:
+    """
+    Set ``counsellor`` on sessions that only have ``counsellor_name``.
+
+    Walks unassigned sessions in id order, ``batch_size`` at a time, with one
+    UPDATE per resolved counselor per batch; each batch commits on its own,
+    so an interrupted run resumes where it stopped.
+
+    Returns:
+        tuple: (Counter of sessions "linked", "unmatched" and "ambiguous",
+        Counter of sessions per unresolved name)
+    """
+    index = counsellor_name_index()
+    stats = Counter()
+    unresolved = Counter()
+    last_id = 0
+    while True:
+        rows = list(
+            UpcomingSession.objects.filter(counsellor__isnull=True, id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "counsellor_name")[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        by_counsellor = defaultdict(list)
+        for session_id, name in rows:
+            key = normalize_name(name)
+            if key not in index:
+                stats["unmatched"] += 1
+                unresolved[name] += 1
+            elif index[key] is None:
+                stats["ambiguous"] += 1
+                unresolved[name] += 1
+            else:
+                by_counsellor[index[key]].append(session_id)
+
+        with transaction.atomic():
+            for counsellor_id, session_ids in by_counsellor.items():
+                if dry_run:
+                    stats["linked"] += len(session_ids)
+                    continue
+                # Re-check: the session may have been assigned meanwhile
+                stats["linked"] += UpcomingSession.objects.filter(
+                    id__in=session_ids, counsellor__isnull=True
+                ).update(counsellor_id=counsellor_id)
+
+    logger.info(
+        "Session counsellor backfill: %s %s sessions, %s unmatched, %s ambiguous",
+        "would link" if dry_run else "linked", stats["linked"], stats["unmatched"], stats["ambiguous"]
+    )
+    return stats, unresolved
+
+
+def encode_cursor(session) -> str:
+    """Opaque cursor for the page after ``session``."""
+    raw = f"{session.start_time.isoformat()}|{session.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(start_time, id) from ``encode_cursor``; raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, session_id = raw.rsplit("|", 1)
+        parsed = parse_datetime(start_time)
+        session_id = int(session_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if parsed is None:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return parsed, session_id
+
+
+def counsellor_sessions_page(queryset, cursor: str | None = None, limit: int = APPOINTMENTS_PAGE_SIZE):
+    """
+    One page of ``queryset`` (already filtered by counselor) in ``(start_time, id)`` order.
+
+    Returns:
+        tuple: (sessions, next cursor or None on the last page)
+    """
+    queryset = queryset.order_by("start_time", "id")
+    if cursor:
+        start_time, session_id = decode_cursor(cursor)
+        # ">= and not the ties already seen" rather than "> or (= and id >)":
+        # the OR form defeats the index range on start_time
+        queryset = queryset.filter(start_time__gte=start_time).exclude(start_time=start_time, id__lte=session_id)
+    sessions = list(queryset[:limit + 1])
+    if len(sessions) <= limit:
+        return sessions, None
+    sessions = sessions[:limit]
+    return sessions, encode_cursor(sessions[-1])
@@ -0,0 +1,90 @@
+"""
+Server-pushed session timer events.
+
+Clients used to poll ``sessions/<id>/duration/`` every tick.  Instead the
+server pushes ``session_timer`` frames carrying the session's start/end times
+and the server clock, and clients compute elapsed time locally:
+
+- ``start`` / ``end`` are broadcast when a session starts or ends, to the
+  session socket (``ws/sessions/<id>/``) and to the linked chat socket.
+- ``checkpoint`` frames are sent by the session socket on connect and every
+  ``SESSION_TIMER_CHECKPOINT_SECONDS`` so clients can correct clock drift.
+"""
+import logging
+from datetime import datetime
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SESSION_TIMER_CHECKPOINT_SECONDS = 60
+
+SESSION_EVENT_START = "start"
+SESSION_EVENT_END = "end"
+SESSION_EVENT_CHECKPOINT = "checkpoint"
+
+
+def session_group_name(session_id) -> str:
+    return f"session_{session_id}"
+
+
+def session_timer_state(session) -> dict:
+    """The fields clients need to run a session timer locally."""
+    return {
+        "session_id": session.id,
+        "status": session.session_status,
+        "start_time": session.actual_start_time.isoformat() if session.actual_start_time else None,
+        "end_time": session.actual_end_time.isoformat() if session.actual_end_time else None,
+    }
+
+
+def session_timer_frame(state: dict, event: str) -> dict:
+    """
+    Build a ``session_timer`` frame from ``state`` stamped with the server clock.
+
+    ``duration_seconds`` is computed from ``state`` and the current time, so
+    checkpoints never need a database read.
+    """
+    now = timezone.now()
+    duration_seconds = 0
+    if state.get("start_time"):
+        start = datetime.fromisoformat(state["start_time"])
+        end = datetime.fromisoformat(state["end_time"]) if state.get("end_time") else now
+        duration_seconds = max(int((end - start).total_seconds()), 0)
+    return {
+        "type": "session_timer",
+        "event": event,
+        **state,
+        "server_time": now.isoformat(),
+        "duration_seconds": duration_seconds,
+    }
+
+
+def broadcast_session_event(session, event: str, chat_id=None) -> None:
+    """
+    Push a ``start``/``end`` event to the session group and the chat group.
+
+    Sent after the surrounding transaction commits; failures are logged and
+    never affect the request that changed the session.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    state = session_timer_state(session)
+    groups = [session_group_name(session.id)]
+    if chat_id:
+        groups.append(f"chat_{chat_id}")
+
+    def send():
+        message = {"type": "session.timer", "event": event, "state": state}
+        for group in groups:
+            try:
+                async_to_sync(channel_layer.group_send)(group, message)
+            except Exception as e:
+                logger.error("Failed to broadcast session %s for session %s to %s: %s", event, session.id, group, e)
+
+    transaction.on_commit(send)
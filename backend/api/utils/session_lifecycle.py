@@ -0,0 +1,237 @@
+"""
+Lifecycle service for counselling sessions and their chats.
+
+A ``ChatSession`` row links a Chat to the UpcomingSession it is conducted in.
+Ending goes through ``end_chat_session``, which closes the session, completes
+the chat and settles its bill in one transaction using a fixed number of
+UPDATE statements (no ``Chat.save()`` pre-read, no ``refresh_from_db``).
+
+Records created before the link existed are matched once by user and
+counselor and then linked, so later calls take the direct path.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Chat, ChatSession, UpcomingSession
+from .billing import calculate_chat_billing, calculate_chat_duration_minutes, deduct_wallet_balance
+
+logger = logging.getLogger(__name__)
+
+ENDABLE_CHAT_STATUSES = (Chat.STATUS_ACTIVE, Chat.STATUS_INACTIVE)
+# Claims retried when a billing tick moves billed_amount underneath
+CLAIM_ATTEMPTS = 3
+
+
+def link_chat_session(chat: Chat, session: UpcomingSession) -> bool:
+    """
+    Link ``chat`` and ``session`` unless either is already linked.
+
+    Returns:
+        bool: True if a new link was created
+    """
+    try:
+        with transaction.atomic():
+            ChatSession.objects.create(chat=chat, session=session)
+    except IntegrityError:
+        return False
+    logger.info("Linked chat %s to session %s", chat.id, session.id)
+    return True
+
+
+def get_session_for_user(user, session_id) -> UpcomingSession | None:
+    """Session ``session_id`` if ``user`` takes part in it, with its linked chat (one query)."""
+    return (
+        UpcomingSession.objects.select_related("chat_link__chat")
+        .filter(Q(id=session_id) & (Q(user=user) | Q(counsellor=user)))
+        .first()
+    )
+
+
+def get_chat_with_session(chat_id) -> Chat | None:
+    """Chat ``chat_id`` with its linked session (one query, no access filter)."""
+    return Chat.objects.select_related("session_link__session").filter(id=chat_id).first()
+
+
+def _linked(instance, attr):
+    try:
+        return getattr(instance, attr)
+    except ChatSession.DoesNotExist:
+        return None
+
+
+def linked_chat_id(session: UpcomingSession) -> int | None:
+    """ID of the chat linked to ``session``, if any."""
+    link = _linked(session, "chat_link")
+    return link.chat_id if link else None
+
+
+def chat_for_session(session: UpcomingSession) -> Chat | None:
+    """
+    The chat conducted in ``session``.
+
+    Unlinked sessions fall back to the pair's most recent open chat that is
+    not linked to another session, which is then linked.  Returns None if the
+    link could not be created (a concurrent request linked either side).
+    """
+    link = _linked(session, "chat_link")
+    if link:
+        return link.chat
+    if not (session.user_id and session.counsellor_id):
+        return None
+    chat = (
+        Chat.objects.filter(
+            user_id=session.user_id,
+            counsellor_id=session.counsellor_id,
+            status__in=ENDABLE_CHAT_STATUSES,
+            session_link__isnull=True,
+        )
+        .order_by("-started_at", "-id")
+        .first()
+    )
+    if chat and not link_chat_session(chat, session):
+        return None
+    return chat
+
+
+def session_for_chat(chat: Chat) -> UpcomingSession | None:
+    """
+    The session ``chat`` is conducted in.
+
+    Unlinked chats fall back to the pair's most recent session that is not
+    linked to another chat, which is then linked.  Returns None if the link
+    could not be created (a concurrent request linked either side).
+    """
+    link = _linked(chat, "session_link")
+    if link:
+        return link.session
+    if not (chat.user_id and chat.counsellor_id):
+        return None
+    session = (
+        UpcomingSession.objects.filter(
+            user_id=chat.user_id,
+            counsellor_id=chat.counsellor_id,
+            chat_link__isnull=True,
+        )
+        .order_by("-start_time", "-id")
+        .first()
+    )
+    if session and not link_chat_session(chat, session):
+        return None
+    return session
+
+
+def _end_session(session: UpcomingSession, now) -> None:
+    session.actual_end_time = now
+    session.session_status = "completed"
+    session.is_confirmed = False
+    if not session.actual_start_time:
+        session.actual_start_time = now  # Fallback if never explicitly started
+    end_note = f"\n[Session ended at {now.strftime('%Y-%m-%d %H:%M:%S')}]"
+    session.notes = (session.notes + end_note) if session.notes else end_note.strip()
+    session.save(update_fields=[
+        "actual_end_time",
+        "actual_start_time",
+        "session_status",
+        "is_confirmed",
+        "notes",
+        "updated_at",
+    ])
+
+
+def _complete_chat(chat: Chat, now) -> dict | None:
+    """
+    Complete an active/inactive chat and charge what is still owed.
+
+    ``billed_amount`` holds what has already been deducted (see the
+    ``process_chat_billing`` command), so only the remainder is charged.
+    Returns billing info when the chat ends up billed.
+    """
+    chat.status = Chat.STATUS_COMPLETED
+    if not chat.ended_at:
+        chat.ended_at = now
+    if not chat.started_at:
+        chat.started_at = now  # Fallback for duration calculation
+    chat.duration_minutes = calculate_chat_duration_minutes(chat)
+
+    billed = chat.billed_amount or Decimal("0.00")
+    for _ in range(CLAIM_ATTEMPTS):
+        # Claim only if nothing was charged since the chat was loaded: a
+        # process_chat_billing tick committing in between would otherwise be
+        # charged again as part of the remainder
+        claimed = Chat.objects.filter(
+            id=chat.id,
+            status__in=ENDABLE_CHAT_STATUSES,
+            is_billed=False,
+            billed_amount=billed,
+        ).update(
+            status=chat.status,
+            started_at=chat.started_at,
+            ended_at=chat.ended_at,
+            duration_minutes=chat.duration_minutes,
+            updated_at=now,
+        )
+        if claimed:
+            break
+        billed = (
+            Chat.objects.filter(id=chat.id, status__in=ENDABLE_CHAT_STATUSES, is_billed=False)
+            .values_list("billed_amount", flat=True)
+            .first()
+        )
+        if billed is None:
+            logger.info("Chat %s was already ended elsewhere, skipping billing", chat.id)
+            return None
+    else:
+        logger.warning("Chat %s kept being billed concurrently, leaving it to process_chat_billing", chat.id)
+        return None
+    chat.billed_amount = billed
+
+    total = calculate_chat_billing(chat)
+    # Rounding must never turn the remainder into a credit
+    outstanding = max(total - billed, Decimal("0.00"))
+    if not deduct_wallet_balance(chat.user_id, outstanding):
+        logger.warning(
+            "Insufficient wallet balance to bill chat %s: needs ₹%s. "
+            "Completed unbilled; process_chat_billing retries the remainder.",
+            chat.id, outstanding,
+        )
+        return None
+
+    total = max(total, billed)
+    chat.billed_amount = total
+    chat.is_billed = True
+    chat.billing_processed_at = now
+    Chat.objects.filter(id=chat.id).update(
+        billed_amount=total,
+        is_billed=True,
+        billing_processed_at=now,
+    )
+    logger.info("Billed chat %s: ₹%s for %s minutes", chat.id, total, chat.duration_minutes)
+    return {
+        "billed_amount": float(total),
+        "duration_minutes": chat.duration_minutes,
+    }
+
+
+def end_chat_session(session: UpcomingSession | None = None, chat: Chat | None = None) -> dict:
+    """
+    End a session and/or its chat in one transaction.
+
+    At most four write statements are issued: the session UPDATE, the chat
+    UPDATE, the wallet UPDATE and the billing UPDATE.  Only chats that are
+    active or inactive are completed.
+
+    Returns:
+        dict: ``{"end_time": datetime, "billing": dict | None}``
+    """
+    now = timezone.now()
+    billing = None
+    with transaction.atomic():
+        if session is not None:
+            _end_session(session, now)
+        if chat is not None and chat.status in ENDABLE_CHAT_STATUSES and not chat.is_billed:
+            billing = _complete_chat(chat, now)
+    return {"end_time": now, "billing": billing}
@@ -0,0 +1,109 @@
+"""
+Local SMTP stand-in for benchmarks and manual checks.
+
+A threaded SMTP server on 127.0.0.1 that accepts and discards mail, speaking
+just enough of the protocol for smtplib (and so Django's SMTP backend):
+EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP and QUIT, without TLS or AUTH.
+Latencies stand in for a remote provider: ``connect_latency`` delays the
+greeting (TCP + TLS handshake + AUTH round trips to e.g. smtp.gmail.com),
+``message_latency`` delays the reply to each message; ``fail_rate``
+answers that share of messages with a temporary failure (451).
+
+Point Django at it with::
+
+    with SMTPSink(connect_latency=0.3) as sink, override_settings(**sink.email_settings()):
+        ...
+"""
+import random
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def handle(self):
+        sink = self.server.sink
+        sink.record("connections")
+        time.sleep(sink.connect_latency)
+        self.reply("220 localhost SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                time.sleep(sink.message_latency)
+                if sink.fail_rate and random.random() < sink.fail_rate:
+                    sink.record("rejected")
+                    self.reply("451 Temporary failure, try again later")
+                else:
+                    sink.record("messages")
+                    self.reply("250 OK queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink:
+    """Threaded SMTP server counting connections, accepted and rejected messages."""
+
+    def __init__(self, connect_latency: float = 0.0, message_latency: float = 0.0, fail_rate: float = 0.0):
+        self.connect_latency = connect_latency
+        self.message_latency = message_latency
+        self.fail_rate = fail_rate
+        self.counts = {"connections": 0, "messages": 0, "rejected": 0}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def record(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def start(self):
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def email_settings(self) -> dict:
+        """Settings overrides sending Django's mail to this sink."""
+        host, port = self.address
+        return {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": host,
+            "EMAIL_PORT": port,
+            "EMAIL_USE_TLS": False,
+            "EMAIL_USE_SSL": False,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+        }
@@ -0,0 +1,99 @@
+"""
+Wellness task provisioning and ordering.
+
+Default tasks are created once when a user's profile is created (the
+``post_save`` receiver in ``api.signals``, whichever path created the user;
+the ``provision_wellness_tasks`` command backfills older users) instead of
+being checked for on every list request.  Display
+order within a category comes from per-category counters on ``UserProfile``,
+so adding a task never needs a ``MAX(order)`` aggregate.
+"""
+from django.db import transaction
+from django.db.models import Exists, Max
+
+from ..models import CounsellorProfile, DoctorProfile, UserProfile, WellnessTask
+
+DEFAULT_WELLNESS_TASKS = {
+    WellnessTask.CATEGORY_DAILY: [
+        "Meditation (10 min)",
+        "Drink 2L Water",
+        "Gratitude Note",
+    ],
+    WellnessTask.CATEGORY_EVENING: [
+        "Journaling (5 min)",
+        "Reflect on 3 positive things",
+    ],
+}
+
+# UserProfile column holding the last order assigned in each category
+TASK_ORDER_FIELDS = {
+    WellnessTask.CATEGORY_DAILY: "daily_task_order",
+    WellnessTask.CATEGORY_EVENING: "evening_task_order",
+}
+
+
+def build_default_tasks(user) -> list[WellnessTask]:
+    """Return unsaved default WellnessTask instances for ``user``."""
+    return [
+        WellnessTask(user=user, title=title, category=category, order=index)
+        for category, titles in DEFAULT_WELLNESS_TASKS.items()
+        for index, title in enumerate(titles, start=1)
+    ]
+
+
+def default_task_orders() -> dict:
+    """Counter values matching the orders used by ``build_default_tasks``."""
+    return {
+        TASK_ORDER_FIELDS[category]: len(titles)
+        for category, titles in DEFAULT_WELLNESS_TASKS.items()
+    }
+
+
+def provision_default_tasks(profile: UserProfile) -> bool:
+    """
+    Create the default wellness tasks for the owner of a new profile.
+
+    Counselors, doctors and users who already have tasks are skipped (one
+    query).  The order counters are saved and set on ``profile``, so a later
+    ``profile.save()`` keeps them.
+
+    Returns:
+        bool: True if tasks were created
+    """
+    user_id = profile.user_id
+    skip = (
+        Exists(CounsellorProfile.objects.filter(user_id=user_id))
+        | Exists(DoctorProfile.objects.filter(user_id=user_id))
+        | Exists(WellnessTask.objects.filter(user_id=user_id))
+    )
+    if UserProfile.objects.filter(pk=profile.pk).filter(skip).exists():
+        return False
+    WellnessTask.objects.bulk_create(build_default_tasks(profile.user), ignore_conflicts=True)
+    counters = default_task_orders()
+    UserProfile.objects.filter(pk=profile.pk).update(**counters)
+    for field, value in counters.items():
+        setattr(profile, field, value)
+    return True
+
+
+def next_task_order(user, category: str) -> int:
+    """
+    Reserve the next display order for a task in ``category``.
+
+    Locks the user's profile row, bumps the category counter and returns the
+    new value.  A profile created here has its counters seeded once from the
+    existing tasks.
+    """
+    field = TASK_ORDER_FIELDS[category]
+    with transaction.atomic():
+        profile, created = UserProfile.objects.select_for_update().get_or_create(user=user)
+        if created:
+            current = (
+                WellnessTask.objects.filter(user=user, category=category).aggregate(Max("order"))["order__max"]
+                or 0
+            )
+        else:
+            current = getattr(profile, field)
+        setattr(profile, field, current + 1)
+        profile.save(update_fields=[field])
+    return current + 1
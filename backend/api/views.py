@@ -1,20 +1,21 @@
 import logging
 import secrets
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+from math import ceil
 
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
 from django.db import transaction
-from django.db.models import Avg, Count, Max, Q
-from django.db.models.functions import TruncDate
+from django.db.models import Count, Exists, OuterRef, Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 import pytz
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .authentication import RoleClaimsTokenRefreshSerializer, is_counsellor
 from .models import (
     Chat,
     ChatMessage,
@@ -60,6 +61,40 @@ from .serializers import (
     WellnessTaskSerializer,
 )
 from .serializers import EmailOrUsernameTokenObtainPairSerializer
+from .utils.analytics import get_mood_windows, get_session_counters, get_task_counters
+from .utils.chat_archive import chat_history
+from .utils.chat_summary import create_message
+from .utils.content_cache import (
+    CATALOG_BOOSTERS,
+    CATALOG_GUIDANCE,
+    CATALOG_MEDITATIONS,
+    CATALOG_MUSIC,
+    catalog_response,
+)
+from .utils.cost_ticker import chat_cost_state, with_wallet_balance
+from .utils.diagnostics import debug_diagnostics
+from .utils.email_outbox import enqueue_email
+from .utils.precomputed import PrecomputedJSONView
+from .utils.presence import presence
+from .utils.read_state import unread_counts, with_unread_counts
+from .utils.replica import ReplicaReadMixin
+from .utils.session_counsellors import (
+    APPOINTMENTS_MAX_PAGE_SIZE,
+    APPOINTMENTS_PAGE_SIZE,
+    counsellor_sessions_page,
+)
+from .utils.session_events import SESSION_EVENT_END, SESSION_EVENT_START, broadcast_session_event
+from .utils.session_lifecycle import (
+    ENDABLE_CHAT_STATUSES,
+    chat_for_session,
+    end_chat_session,
+    get_chat_with_session,
+    get_session_for_user,
+    link_chat_session,
+    linked_chat_id,
+    session_for_chat,
+)
+from .utils.wellness import next_task_order
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView as BaseTokenRefreshView
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
@@ -383,72 +418,51 @@ LEGACY_FEATURE_DETAIL = {
 }
 
 
-class LegacyGuidelinesView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+LEGACY_BREATHING = {
+    "cycle_options": [4, 5, 6, 8, 10],
+    "tip": "For calm, try 6–8 second cycles. If you feel lightheaded stop and return to normal breathing.",
+}
 
-    def get(self, request):
-        return Response({"sections": LEGACY_GUIDELINES})
+LEGACY_AFFIRMATIONS = [
+    "I am worthy of care and respect.",
+    "I breathe in calm and exhale tension.",
+    "I am capable of handling what comes my way.",
+    "I give myself permission to rest and heal.",
+]
 
 
-class LegacyExpertConnectView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+# Legacy payloads never change at runtime, so they are served as pre-encoded
+# bytes with a strong ETag instead of going through DRF on every call.
 
-    def get(self, request):
-        return Response({"counsellors": LEGACY_COUNSELLORS})
+class LegacyGuidelinesView(PrecomputedJSONView):
+    payload = {"sections": LEGACY_GUIDELINES}
 
 
-class LegacyBreathingView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+class LegacyExpertConnectView(PrecomputedJSONView):
+    payload = {"counsellors": LEGACY_COUNSELLORS}
 
-    def get(self, request):
-        return Response(
-            {
-                "cycle_options": [4, 5, 6, 8, 10],
-                "tip": "For calm, try 6–8 second cycles. If you feel lightheaded stop and return to normal breathing.",
-            }
-        )
 
+class LegacyBreathingView(PrecomputedJSONView):
+    payload = LEGACY_BREATHING
 
-class LegacyAssessmentView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
 
-    def get(self, request):
-        return Response({"questions": LEGACY_ASSESSMENT_QUESTIONS})
+class LegacyAssessmentView(PrecomputedJSONView):
+    payload = {"questions": LEGACY_ASSESSMENT_QUESTIONS}
 
 
-class LegacyAffirmationsView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+class LegacyAffirmationsView(PrecomputedJSONView):
+    payload = {"affirmations": LEGACY_AFFIRMATIONS}
 
-    def get(self, request):
-        return Response(
-            {
-                "affirmations": [
-                    "I am worthy of care and respect.",
-                    "I breathe in calm and exhale tension.",
-                    "I am capable of handling what comes my way.",
-                    "I give myself permission to rest and heal.",
-                ]
-            }
-        )
 
+class LegacyAdvancedCareSupportView(PrecomputedJSONView):
+    payload = {
+        "services": LEGACY_ADVANCED_SERVICES,
+        "specialists": LEGACY_ADVANCED_SPECIALISTS,
+    }
 
-class LegacyAdvancedCareSupportView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
 
-    def get(self, request):
-        return Response(
-            {
-                "services": LEGACY_ADVANCED_SERVICES,
-                "specialists": LEGACY_ADVANCED_SPECIALISTS,
-            }
-        )
-
-
-class LegacyFeatureDetailView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
-
-    def get(self, request):
-        return Response(LEGACY_FEATURE_DETAIL)
+class LegacyFeatureDetailView(PrecomputedJSONView):
+    payload = LEGACY_FEATURE_DETAIL
 
 
 class WalletRechargeView(APIView):
@@ -546,19 +560,6 @@ class WalletUsageView(APIView):
         )
 
 
-DEFAULT_WELLNESS_TASKS = {
-    WellnessTask.CATEGORY_DAILY: [
-        "Meditation (10 min)",
-        "Drink 2L Water",
-        "Gratitude Note",
-    ],
-    WellnessTask.CATEGORY_EVENING: [
-        "Journaling (5 min)",
-        "Reflect on 3 positive things",
-    ],
-}
-
-
 class WellnessTaskListCreateView(generics.ListCreateAPIView):
     serializer_class = WellnessTaskSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -571,16 +572,20 @@ class WellnessTaskListCreateView(generics.ListCreateAPIView):
         )
 
     def list(self, request, *args, **kwargs):
-        self._ensure_default_tasks(request.user)
+        # Default tasks are provisioned at onboarding (see api.utils.wellness)
         queryset = self.get_queryset()
         serializer = self.get_serializer(queryset, many=True)
         items = list(serializer.data)
         grouped = {
-            WellnessTask.CATEGORY_DAILY: [item for item in items if item["category"] == WellnessTask.CATEGORY_DAILY],
-            WellnessTask.CATEGORY_EVENING: [item for item in items if item["category"] == WellnessTask.CATEGORY_EVENING],
+            WellnessTask.CATEGORY_DAILY: [],
+            WellnessTask.CATEGORY_EVENING: [],
         }
+        completed = 0
+        for item in items:
+            grouped.setdefault(item["category"], []).append(item)
+            if item["is_completed"]:
+                completed += 1
         total = len(items)
-        completed = sum(1 for item in items if item["is_completed"])
         return Response(
             {
                 "tasks": items,
@@ -594,29 +599,7 @@ class WellnessTaskListCreateView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         category = serializer.validated_data.get("category", WellnessTask.CATEGORY_DAILY)
-        next_order = (
-            WellnessTask.objects.filter(user=self.request.user, category=category).aggregate(Max("order"))[
-                "order__max"
-            ]
-            or 0
-        )
-        serializer.save(user=self.request.user, order=next_order + 1)
-
-    def _ensure_default_tasks(self, user):
-        if WellnessTask.objects.filter(user=user).exists():
-            return
-        to_create = []
-        for category, titles in DEFAULT_WELLNESS_TASKS.items():
-            for index, title in enumerate(titles, start=1):
-                to_create.append(
-                    WellnessTask(
-                        user=user,
-                        title=title,
-                        category=category,
-                        order=index,
-                    )
-                )
-        WellnessTask.objects.bulk_create(to_create)
+        serializer.save(user=self.request.user, order=next_task_order(self.request.user, category))
 
 
 class WellnessTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -628,46 +611,31 @@ class WellnessTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
         return WellnessTask.objects.filter(user=self.request.user)
 
 
-DEFAULT_SUPPORT_GROUPS = [
-    {
-        "slug": "anxiety-support",
-        "name": "Anxiety Support",
-        "description": "Discuss and manage anxiety together.",
-        "icon": "people_alt_rounded",
-    },
-    {
-        "slug": "career-stress",
-        "name": "Career Stress",
-        "description": "Talk about workplace pressure and burnout.",
-        "icon": "work_outline_rounded",
-    },
-    {
-        "slug": "relationships",
-        "name": "Relationships",
-        "description": "Express emotions and build healthy connections.",
-        "icon": "favorite_outline_rounded",
-    },
-    {
-        "slug": "general-awareness",
-        "name": "General Awareness",
-        "description": "Learn self-care and mental health awareness.",
-        "icon": "self_improvement_rounded",
-    },
-]
-
-
 class SupportGroupListView(APIView):
+    """
+    List support groups with membership state and member counts.
+
+    Default groups are seeded by migration 0027, not on the request path.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self, user):
+        # is_joined and member_count are resolved in the same query as the groups
+        return SupportGroup.objects.annotate(
+            is_joined=Exists(
+                SupportGroupMembership.objects.filter(user=user, group=OuterRef("pk"))
+            ),
+            member_count=Count("memberships"),
+        )
+
     def get(self, request):
-        self._ensure_default_groups()
-        queryset = SupportGroup.objects.all()
+        groups = list(self.get_queryset(request.user))
         serializer = SupportGroupSerializer(
-            queryset,
+            groups,
             many=True,
             context={"request": request},
         )
-        joined_count = SupportGroupMembership.objects.filter(user=request.user).count()
+        joined_count = sum(1 for group in groups if group.is_joined)
         return Response(
             {
                 "groups": serializer.data,
@@ -687,26 +655,10 @@ class SupportGroupListView(APIView):
         else:
             SupportGroupMembership.objects.filter(user=request.user, group=group).delete()
 
+        group = self.get_queryset(request.user).get(pk=group.pk)
         updated = SupportGroupSerializer(group, context={"request": request}).data
         return Response({"status": "ok", "group": updated})
 
-    def _ensure_default_groups(self):
-        existing_slugs = set(SupportGroup.objects.values_list("slug", flat=True))
-        to_create = []
-        for item in DEFAULT_SUPPORT_GROUPS:
-            if item["slug"] in existing_slugs:
-                continue
-            to_create.append(
-                SupportGroup(
-                    slug=item["slug"],
-                    name=item["name"],
-                    description=item["description"],
-                    icon=item["icon"],
-                )
-            )
-        if to_create:
-            SupportGroup.objects.bulk_create(to_create)
-
 
 class UpcomingSessionListCreateView(generics.ListCreateAPIView):
     serializer_class = UpcomingSessionSerializer
@@ -734,12 +686,10 @@ class SessionStartView(APIView):
 
     def post(self, request, session_id):
         try:
-            session = None
+            chat = None
             
             # Try to find session by ID first
-            session = UpcomingSession.objects.filter(
-                Q(id=session_id) & (Q(user=request.user) | Q(counsellor=request.user))
-            ).first()
+            session = get_session_for_user(request.user, session_id)
             
             # If not found by session_id, try to find by chat_id (session_id might be chat_id)
             if not session:
@@ -770,14 +720,17 @@ class SessionStartView(APIView):
                                 session_status='scheduled',
                             )
                             logger.info(
-                                f"Created new session {session.id} for chat {chat_id} "
-                                f"(user={chat.user.username}, counsellor={chat.counsellor.username})"
+                                "Created new session %s for chat %s "
+                                "(user=%s, counsellor=%s)",
+                                session.id, chat_id, chat.user.username, chat.counsellor.username
                             )
                         else:
                             logger.info(
-                                f"Found existing session {session.id} for chat {chat_id} "
-                                f"(user={chat.user.username}, counsellor={chat.counsellor.username})"
+                                "Found existing session %s for chat %s "
+                                "(user=%s, counsellor=%s)",
+                                session.id, chat_id, chat.user.username, chat.counsellor.username
                             )
+                        link_chat_session(chat, session)
                 except (ValueError, TypeError):
                     # session_id is not a valid integer, continue to return error
                     pass
@@ -816,8 +769,13 @@ class SessionStartView(APIView):
                 session.notes = start_note.strip()
             
             session.save()
+            broadcast_session_event(
+                session,
+                SESSION_EVENT_START,
+                chat_id=chat.id if chat else linked_chat_id(session),
+            )
             
-            logger.info(f"Session {session_id} started by user {request.user.username} at {now}")
+            logger.info("Session %s started by user %s at %s", session_id, request.user.username, now)
             
             return Response(
                 {
@@ -831,7 +789,7 @@ class SessionStartView(APIView):
                 status=status.HTTP_200_OK
             )
         except Exception as e:
-            logger.error(f"Error starting session {session_id}: {e}", exc_info=True)
+            logger.error("Error starting session %s: %s", session_id, e, exc_info=True)
             return Response(
                 {"error": f"Failed to start session: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -843,268 +801,90 @@ class SessionEndView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, session_id):
-        # Log the raw request data for debugging
-        logger.info("=" * 80)
-        logger.info(
-            f"SessionEndView: ===== REQUEST TO END SESSION ====="
-        )
         logger.info(
-            f"SessionEndView: Request to end session. "
-            f"session_id={session_id} (type={type(session_id).__name__}), "
-            f"user={request.user.username} (id={request.user.id}), "
-            f"is_counsellor={hasattr(request.user, 'counsellorprofile')}"
+            "SessionEndView: Request to end session. "
+            "session_id=%s, user=%s (id=%s)",
+            session_id, request.user.username, request.user.id
         )
-        
+
         try:
-            
-            session = None
-            
-            # Try to find session by ID first
-            session = UpcomingSession.objects.filter(
-                Q(id=session_id) & (Q(user=request.user) | Q(counsellor=request.user))
-            ).first()
-            
-            if session:
-                logger.info(
-                    f"SessionEndView: Found session {session.id} by session_id. "
-                    f"status={session.session_status}, "
-                    f"user={session.user.username if session.user else None}, "
-                    f"counsellor={session.counsellor.username if session.counsellor else None}"
-                )
-            
-            # If not found by session_id, try to find by chat_id (session_id might be chat_id)
             chat = None
-            if not session:
+            session = get_session_for_user(request.user, session_id)
+
+            if session:
+                chat = chat_for_session(session)
+            else:
+                # session_id might be a chat id
                 try:
-                    chat_id = int(session_id)
-                    # First, try to get the chat without access filter to check if it exists
-                    chat = Chat.objects.filter(id=chat_id).first()
-                    
-                    if chat:
-                        logger.info(
-                            f"SessionEndView: Found chat {chat_id} by session_id. "
-                            f"Request by user={request.user.username} "
-                            f"(chat.user={chat.user.username if chat.user else None}, "
-                            f"counsellor={chat.counsellor.username if chat.counsellor else None}, "
-                            f"status={chat.status})"
-                        )
-                        
-                        # Access control: only the chat user or assigned counsellor may end the chat
-                        if not (chat.user_id == request.user.id or (chat.counsellor_id and chat.counsellor_id == request.user.id)):
-                            logger.warning(
-                                f"SessionEndView: Access denied to end chat {chat.id} for user {request.user.username}. "
-                                f"Chat owned by user_id={chat.user_id}, counsellor_id={chat.counsellor_id}, "
-                                f"request.user.id={request.user.id}"
-                            )
-                            return Response(
-                                {"error": "Access denied to end this chat"},
-                                status=status.HTTP_403_FORBIDDEN
-                            )
-                        
-                        # If chat has a counsellor, try to find associated session
-                        if chat.user and chat.counsellor:
-                            # Find associated UpcomingSession by user and counsellor
-                            # Look for ANY session status, not just scheduled/in_progress
-                            session = UpcomingSession.objects.filter(
-                                Q(user=chat.user) & 
-                                Q(counsellor=chat.counsellor)
-                            ).order_by('-start_time', '-id').first()
-                            
-                            if session:
-                                logger.info(
-                                    f"SessionEndView: Found session {session.id} for chat {chat_id} "
-                                    f"(user={chat.user.username}, counsellor={chat.counsellor.username}, "
-                                    f"status={session.session_status})"
-                                )
-                            else:
-                                # No session exists for this chat
-                                logger.info(
-                                    f"SessionEndView: No session found for chat {chat_id}, "
-                                    f"will end chat directly if active/inactive"
-                                )
-                        else:
-                            # Chat has no counsellor assigned (queued)
-                            logger.info(
-                                f"SessionEndView: Chat {chat.id} has no counsellor assigned "
-                                f"(status={chat.status})"
-                            )
-                except (ValueError, TypeError) as e:
-                    # session_id is not a valid integer, continue to return error
-                    logger.debug(
-                        f"SessionEndView: session_id={session_id} is not a valid integer. "
-                        f"Error: {e}"
+                    chat = get_chat_with_session(int(session_id))
+                except (ValueError, TypeError):
+                    chat = None
+
+                if chat is None:
+                    logger.warning(
+                        "SessionEndView: No session or chat found with id=%s "
+                        "for user=%s",
+                        session_id, request.user.username
                     )
-                    pass
-            
-            # If still no session found, but we have a chat, handle ending the chat directly
-            if not session and chat:
-                logger.info(
-                    f"SessionEndView: No session exists for chat {chat.id}. "
-                    f"Request by user={request.user.username} "
-                    f"(chat.user={chat.user.username if chat.user else None}, "
-                    f"counsellor={chat.counsellor.username if chat.counsellor else None}, "
-                    f"status={chat.status})"
-                )
-                
-                # If there's no counsellor assigned and chat is queued, return a clear message
-                if chat.counsellor is None:
-                    logger.info(
-                        f"SessionEndView: Chat {chat.id} has no counsellor assigned — cannot end session by chat id"
+                    return Response(
+                        {
+                            "error": "Session not found or access denied",
+                            "details": f"No session or chat found with id={session_id} for user={request.user.username}",
+                            "session_id": session_id,
+                        },
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+
+                # Access control: only the chat user or assigned counsellor may end the chat
+                if request.user.id not in (chat.user_id, chat.counsellor_id):
+                    logger.warning(
+                        "SessionEndView: Access denied to end chat %s for user %s. "
+                        "Chat owned by user_id=%s, counsellor_id=%s",
+                        chat.id, request.user.username, chat.user_id, chat.counsellor_id
                     )
+                    return Response(
+                        {"error": "Access denied to end this chat", "chat_id": chat.id},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+
+                if chat.counsellor_id is None:
                     return Response(
                         {"error": "Chat has no counselor assigned; cannot end session by chat id"},
                         status=status.HTTP_400_BAD_REQUEST
                     )
-                
-                # If chat is active or inactive, proceed to end and bill
-                if chat.status in [Chat.STATUS_ACTIVE, Chat.STATUS_INACTIVE]:
-                    now = timezone.now()
-                    
-                    # End the chat
-                    chat.status = Chat.STATUS_COMPLETED
-                    if not chat.ended_at:
-                        chat.ended_at = now
-                    if not chat.started_at:
-                        chat.started_at = now  # Fallback for duration calculation
-                    
-                    # Save (this should trigger billing in Chat.save())
-                    chat.save()
-                    
-                    # Explicitly trigger billing to ensure it happens
-                    from .utils.billing import calculate_and_deduct_chat_billing
-                    try:
-                        chat.refresh_from_db()
-                        if not chat.is_billed:
-                            logger.info(f"Explicitly triggering billing for chat {chat.id} from SessionEndView")
-                            calculate_and_deduct_chat_billing(chat)
-                    except Exception as e:
-                        logger.error(f"Error explicitly triggering billing for chat {chat.id}: {e}", exc_info=True)
-                    
-                    # Refresh to get billing info
-                    chat.refresh_from_db()
-                    
-                    billing_info = None
-                    if getattr(chat, "is_billed", False):
-                        billing_info = {
-                            "billed_amount": float(getattr(chat, "billed_amount", 0.0)),
-                            "duration_minutes": getattr(chat, "duration_minutes", 0),
-                        }
-                    
-                    # Calculate duration manually if needed
-                    duration_seconds = 0
-                    duration_minutes = 0
-                    if chat.started_at and chat.ended_at:
-                        delta = chat.ended_at - chat.started_at
-                        from math import ceil
-                        duration_seconds = int(delta.total_seconds())
-                        duration_minutes = int(ceil(duration_seconds / 60))
-                    
-                    logger.info(
-                        f"SessionEndView: Chat {chat.id} ended successfully (no session existed). "
-                        f"Duration: {duration_minutes} minutes, Billing: ₹{billing_info['billed_amount'] if billing_info else 0}"
-                    )
-                    
+
+                session = session_for_chat(chat)
+
+            # No session exists for this chat: end the chat directly
+            if session is None:
+                if chat.status not in ENDABLE_CHAT_STATUSES:
                     return Response(
-                        {
-                            "status": "ended",
-                            "message": "Chat ended successfully (no session existed)",
-                            "chat_id": chat.id,
-                            "end_time": chat.ended_at.isoformat() if chat.ended_at else None,
-                            "duration_seconds": duration_seconds,
-                            "duration_minutes": duration_minutes,
-                            "billing": billing_info,
-                        },
-                        status=status.HTTP_200_OK
+                        {"error": f"Chat {chat.id} is currently {chat.status} and cannot be ended"},
+                        status=status.HTTP_400_BAD_REQUEST
                     )
-                
-                # Chat cannot be ended because it's not active/inactive
+
+                result = end_chat_session(chat=chat)
+                duration_seconds = int((chat.ended_at - chat.started_at).total_seconds())
+                duration_minutes = int(ceil(duration_seconds / 60))
+
                 logger.info(
-                    f"SessionEndView: Chat {chat.id} is in status {chat.status}, cannot end"
-                )
-                return Response(
-                    {"error": f"Chat {chat.id} is currently {chat.status} and cannot be ended"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Final check: if still no session found
-            if not session:
-                logger.warning("=" * 80)
-                logger.warning(
-                    f"SessionEndView: ===== FINAL CHECK - NO SESSION FOUND ====="
-                )
-                
-                # Check if chat lookup failed because chat doesn't exist or access denied
-                if chat is None:
-                    # Try to see if chat exists but we don't have access
-                    try:
-                        chat_id = int(session_id)
-                        existing_chat = Chat.objects.filter(id=chat_id).first()
-                        if existing_chat:
-                            logger.warning(
-                                f"SessionEndView: Chat {chat_id} EXISTS but ACCESS DENIED. "
-                                f"Request by user={request.user.username} (id={request.user.id}), "
-                                f"chat.user_id={existing_chat.user_id}, "
-                                f"chat.counsellor_id={existing_chat.counsellor_id}, "
-                                f"chat.status={existing_chat.status}"
-                            )
-                            return Response(
-                                {
-                                    "error": "Access denied to end this chat",
-                                    "chat_id": chat_id,
-                                    "details": f"Chat exists but user {request.user.username} does not have access"
-                                },
-                                status=status.HTTP_403_FORBIDDEN
-                            )
-                        else:
-                            logger.warning(
-                                f"SessionEndView: Chat {chat_id} DOES NOT EXIST in database. "
-                                f"Request by user={request.user.username}"
-                            )
-                    except (ValueError, TypeError) as parse_error:
-                        logger.warning(
-                            f"SessionEndView: Cannot parse session_id={session_id} as integer. "
-                            f"Error: {parse_error}"
-                        )
-                
-                # Log summary of what we found
-                logger.warning(
-                    f"SessionEndView: ===== SUMMARY ====="
-                )
-                logger.warning(
-                    f"SessionEndView: session_id provided: {session_id} (type={type(session_id).__name__})"
-                )
-                logger.warning(
-                    f"SessionEndView: session found: {session is not None}"
+                    "SessionEndView: Chat %s ended (no session existed). "
+                    "Duration: %s minutes, billing=%s",
+                    chat.id, duration_minutes, result['billing']
                 )
-                logger.warning(
-                    f"SessionEndView: chat found: {chat is not None}"
-                )
-                if chat:
-                    logger.warning(
-                        f"SessionEndView: chat.id={chat.id}, chat.status={chat.status}, "
-                        f"chat.user_id={chat.user_id}, chat.counsellor_id={chat.counsellor_id}"
-                    )
-                logger.warning(
-                    f"SessionEndView: requesting user={request.user.username} (id={request.user.id}), "
-                    f"is_counsellor={hasattr(request.user, 'counsellorprofile')}"
-                )
-                logger.warning("=" * 80)
-                
                 return Response(
                     {
-                        "error": "Session not found or access denied",
-                        "details": f"No session or chat found with id={session_id} for user={request.user.username}",
-                        "session_id": session_id,
-                        "debug_info": {
-                            "session_found": session is not None,
-                            "chat_found": chat is not None,
-                            "chat_id": chat.id if chat else None,
-                            "chat_status": chat.status if chat else None,
-                        }
+                        "status": "ended",
+                        "message": "Chat ended successfully (no session existed)",
+                        "chat_id": chat.id,
+                        "end_time": chat.ended_at.isoformat(),
+                        "duration_seconds": duration_seconds,
+                        "duration_minutes": duration_minutes,
+                        "billing": result["billing"],
                     },
-                    status=status.HTTP_404_NOT_FOUND
+                    status=status.HTTP_200_OK
                 )
-            
+
             # If already ended, return current state
             if session.actual_end_time and session.session_status == 'completed':
                 return Response(
@@ -1118,95 +898,12 @@ class SessionEndView(APIView):
                     },
                     status=status.HTTP_200_OK
                 )
-            
-            # Store actual end time and calculate duration
-            now = timezone.now()
-            session.actual_end_time = now
-            session.session_status = 'completed'
-            session.is_confirmed = False
-            
-            # Ensure start time exists (for duration calculation)
-            if not session.actual_start_time:
-                session.actual_start_time = now  # Fallback if never explicitly started
-            
-            # Add end note to notes field
-            end_note = f"\n[Session ended at {now.strftime('%Y-%m-%d %H:%M:%S')}]"
-            if session.notes:
-                session.notes += end_note
-            else:
-                session.notes = end_note.strip()
-            
-            session.save()
-            
-            # Process billing for associated chat if exists
-            billing_info = None
-            if session.user and session.counsellor:
-                try:
-                    chat = Chat.objects.filter(
-                        user=session.user,
-                        counsellor=session.counsellor,
-                        status__in=[Chat.STATUS_ACTIVE, Chat.STATUS_INACTIVE]
-                    ).order_by('-started_at', '-id').first()
-                    
-                    if chat and not chat.is_billed and chat.started_at:
-                        logger.info(
-                            f"Processing billing for chat {chat.id} when session {session.id} ended: "
-                            f"current_status={chat.status}, started_at={chat.started_at}, ended_at={chat.ended_at}"
-                        )
-                        
-                        # Ensure chat is ended if session is ending
-                        if chat.status != Chat.STATUS_COMPLETED:
-                            chat.status = Chat.STATUS_COMPLETED
-                            if not chat.ended_at:
-                                chat.ended_at = now
-                            chat.save()  # This will trigger billing in Chat.save()
-                        
-                        # Get billing info after save
-                        chat.refresh_from_db()
-                        
-                        # If billing wasn't triggered by save(), trigger it explicitly
-                        if not chat.is_billed and chat.started_at and chat.ended_at:
-                            logger.warning(
-                                f"Billing not triggered automatically for chat {chat.id}, "
-                                f"triggering explicitly..."
-                            )
-                            from .utils.billing import calculate_and_deduct_chat_billing
-                            try:
-                                success = calculate_and_deduct_chat_billing(chat)
-                                chat.refresh_from_db()
-                                if success:
-                                    logger.info(
-                                        f"✅ Explicit billing triggered successfully for chat {chat.id}"
-                                    )
-                                else:
-                                    logger.error(
-                                        f"❌ Explicit billing failed for chat {chat.id}"
-                                    )
-                            except Exception as e:
-                                logger.error(
-                                    f"Error triggering explicit billing for chat {chat.id}: {e}",
-                                    exc_info=True
-                                )
-                        
-                        if chat.is_billed:
-                            billing_info = {
-                                "billed_amount": float(chat.billed_amount),
-                                "duration_minutes": chat.duration_minutes,
-                            }
-                            logger.info(
-                                f"✅ Billing processed for chat {chat.id} when session {session.id} ended: "
-                                f"₹{chat.billed_amount} for {chat.duration_minutes} minutes"
-                            )
-                        else:
-                            logger.warning(
-                                f"⚠️ Billing not processed for chat {chat.id} after session {session.id} ended: "
-                                f"is_billed={chat.is_billed}, duration_minutes={chat.duration_minutes}"
-                            )
-                except Exception as e:
-                    logger.error(f"Error processing billing when session {session.id} ended: {e}", exc_info=True)
-            
-            logger.info(f"Session {session_id} ended by user {request.user.username} at {now}")
-            
+
+            result = end_chat_session(session=session, chat=chat)
+            broadcast_session_event(session, SESSION_EVENT_END, chat_id=chat.id if chat else None)
+
+            logger.info("Session %s ended by user %s at %s", session.id, request.user.username, result['end_time'])
+
             response_data = {
                 "status": "ended",
                 "session_id": session.id,  # Return actual UpcomingSession ID
@@ -1216,26 +913,22 @@ class SessionEndView(APIView):
                 "duration_seconds": session.duration_seconds,
                 "duration_minutes": session.duration_minutes,
             }
-            
-            if billing_info:
-                response_data["billing"] = billing_info
-            
+
+            if result["billing"]:
+                response_data["billing"] = result["billing"]
+
             return Response(
                 response_data,
                 status=status.HTTP_200_OK
             )
         except Exception as e:
-            logger.error("=" * 80)
             logger.error(
-                f"SessionEndView: ===== EXCEPTION IN END SESSION ====="
-            )
-            logger.error(
-                f"SessionEndView: Error ending session. "
-                f"session_id={session_id}, user={request.user.username} (id={request.user.id}), "
-                f"error={str(e)}, type={type(e).__name__}"
+                "SessionEndView: Error ending session. "
+                "session_id=%s, user=%s (id=%s), "
+                "error=%s, type=%s",
+                session_id, request.user.username, request.user.id, str(e), type(e).__name__,
+                exc_info=True
             )
-            logger.error(f"SessionEndView: Full traceback:", exc_info=True)
-            logger.error("=" * 80)
             return Response(
                 {
                     "error": f"Failed to end session: {str(e)}",
@@ -1247,10 +940,30 @@ class SessionEndView(APIView):
 
 
 class SessionDurationView(APIView):
-    """Get current session duration from backend."""
+    """
+    Get current session duration from backend.
+
+    Clients should follow ``ws/sessions/<id>/`` timer events and compute
+    elapsed time locally.  When polling, pass ``since`` (the ``updated_at``
+    from the previous response) to get 304 Not Modified while the session is
+    unchanged.
+    """
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, session_id):
+        since = None
+        since_param = request.query_params.get("since")
+        if since_param:
+            # An unencoded "+" in the UTC offset arrives as a space
+            since = parse_datetime(since_param.replace(" ", "+"))
+            if since is None:
+                return Response(
+                    {"error": "Invalid 'since' timestamp; expected ISO 8601"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, dt_timezone.utc)
+
         try:
             # Check if user is the session owner or assigned counselor
             session = UpcomingSession.objects.filter(
@@ -1262,6 +975,9 @@ class SessionDurationView(APIView):
                     {"error": "Session not found or access denied"},
                     status=status.HTTP_404_NOT_FOUND
                 )
+
+            if since is not None and session.updated_at <= since:
+                return Response(status=status.HTTP_304_NOT_MODIFIED)
             
             # Calculate duration
             duration_seconds = session.duration_seconds
@@ -1275,9 +991,11 @@ class SessionDurationView(APIView):
                 "duration_seconds": duration_seconds,
                 "duration_minutes": duration_minutes,
                 "is_active": session.session_status == 'in_progress',
+                "server_time": timezone.now().isoformat(),
+                "updated_at": session.updated_at.isoformat(),
             }, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error getting session duration {session_id}: {e}", exc_info=True)
+            logger.error("Error getting session duration %s: %s", session_id, e, exc_info=True)
             return Response(
                 {"error": f"Failed to get session duration: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1335,12 +1053,12 @@ class SessionUpdateView(APIView):
             
             session.save()
             
-            logger.info(f"Session {session_id} updated by user {request.user.username}: {update_data}")
+            logger.info("Session %s updated by user %s: %s", session_id, request.user.username, update_data)
             
             serializer = UpcomingSessionSerializer(session)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error updating session {session_id}: {e}", exc_info=True)
+            logger.error("Error updating session %s: %s", session_id, e, exc_info=True)
             return Response(
                 {"error": f"Failed to update session: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1375,7 +1093,7 @@ class SessionSummaryView(APIView):
                 ).order_by('-created_at').first()
                 
                 if chat:
-                    message_count = ChatMessage.objects.filter(chat=chat).count()
+                    message_count = chat.message_count
             
             return Response({
                 "session_id": session.id,
@@ -1394,7 +1112,7 @@ class SessionSummaryView(APIView):
                 "is_confirmed": session.is_confirmed,
             }, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error getting session summary {session_id}: {e}", exc_info=True)
+            logger.error("Error getting session summary %s: %s", session_id, e, exc_info=True)
             return Response(
                 {"error": f"Failed to get session summary: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1475,44 +1193,18 @@ class RegistrationSendOTPView(APIView):
                 token=token,
                 expires_at=timezone.now() + timezone.timedelta(minutes=10),
             )
+            # Delivered by the outbox worker (send_outbox_emails); committed with the OTP
+            enqueue_email(
+                email,
+                subject="Your Soul Support verification code",
+                body=f"Use this code to finish your sign up: {otp.code}. It expires in 10 minutes.",
+                expires_at=otp.expires_at,
+            )
 
         logger.info("Registration OTP for %s is %s", email, code)
         print(f"[OTP] Registration code for {email}: {code}")
 
-        # Send email with proper error handling
-        try:
-            from django.conf import settings
-            
-            # Use DEFAULT_FROM_EMAIL from settings
-            from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'python.nexnoratech@gmail.com')
-            
-            logger.info(f"Attempting to send OTP email to {email} from {from_email}")
-            print(f"[OTP] Sending email to {email} from {from_email}")
-            
-            result = send_mail(
-            subject="Your Soul Support verification code",
-            message=f"Use this code to finish your sign up: {otp.code}. It expires in 10 minutes.",
-                from_email=from_email,
-            recipient_list=[email],
-            fail_silently=False,
-        )
-
-            logger.info(f"OTP email sent successfully to {email}. Result: {result}")
-            print(f"[OTP] Email sent successfully to {email}")
-            
-            return Response({"status": "sent", "message": "OTP sent successfully"})
-            
-        except Exception as e:
-            error_msg = f"Failed to send OTP email to {email}: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            print(f"[OTP ERROR] {error_msg}")
-            
-            # Still return success to user (security: don't reveal email issues)
-            # But log the error for debugging
-            return Response(
-                {"status": "sent", "message": "OTP sent successfully"},
-                status=status.HTTP_200_OK
-            )
+        return Response({"status": "sent", "message": "OTP sent successfully"})
 
 
 class RegistrationVerifyOTPView(APIView):
@@ -1528,34 +1220,14 @@ class RegistrationVerifyOTPView(APIView):
 
 
 class EmailOrUsernameTokenObtainPairView(TokenObtainPairView):
-    serializer_class = EmailOrUsernameTokenObtainPairSerializer
+    """
+    Login with username or email.
 
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        
-        if response.status_code == 200:
-            # Get user from serializer
-            serializer = self.get_serializer(data=request.data)
-            serializer.is_valid(raise_exception=False)
-            user = serializer.user
-            
-            # Determine user role
-            role = 'user'
-            if hasattr(user, 'counsellorprofile'):
-                role = 'counsellor'
-            elif hasattr(user, 'doctorprofile'):
-                role = 'doctor'
-            elif user.is_superuser:
-                role = 'admin'
-            
-            # Add role to response
-            data = response.data
-            data['role'] = role
-            data['user_id'] = user.id
-            data['username'] = user.username
-            
-            return Response(data)
-        return response
+    Returns the token pair with the user's role, id and username; the
+    serializer authenticates once and resolves all of it (see
+    EmailOrUsernameTokenObtainPairSerializer).
+    """
+    serializer_class = EmailOrUsernameTokenObtainPairSerializer
 
 
 class TokenRefreshView(BaseTokenRefreshView):
@@ -1563,14 +1235,16 @@ class TokenRefreshView(BaseTokenRefreshView):
     Custom token refresh view that handles cases where the user no longer exists.
     Returns 401 Unauthorized instead of 500 Internal Server Error.
     """
+    serializer_class = RoleClaimsTokenRefreshSerializer
     
     def post(self, request, *args, **kwargs):
         try:
             return super().post(request, *args, **kwargs)
         except User.DoesNotExist:
             logger.warning(
-                f"Token refresh attempted for non-existent user. "
-                f"Request data: {request.data if hasattr(request, 'data') else 'N/A'}"
+                "Token refresh attempted for non-existent user. "
+                "Request data: %s",
+                request.data if hasattr(request, 'data') else 'N/A'
             )
             return Response(
                 {
@@ -1580,7 +1254,7 @@ class TokenRefreshView(BaseTokenRefreshView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         except (InvalidToken, TokenError) as e:
-            logger.warning(f"Token refresh failed: {e}")
+            logger.warning("Token refresh failed: %s", e)
             return Response(
                 {
                     "detail": str(e),
@@ -1589,7 +1263,7 @@ class TokenRefreshView(BaseTokenRefreshView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         except Exception as e:
-            logger.error(f"Unexpected error in token refresh: {e}", exc_info=True)
+            logger.error("Unexpected error in token refresh: %s", e, exc_info=True)
             return Response(
                 {
                     "detail": "An error occurred while refreshing the token. Please try again.",
@@ -1599,55 +1273,34 @@ class TokenRefreshView(BaseTokenRefreshView):
             )
 
 
-class ReportsAnalyticsView(APIView):
+class ReportsAnalyticsView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         user = request.user
         now = timezone.now()
-        seven_days_ago = now - timezone.timedelta(days=6)
-        thirty_days_ago = now - timezone.timedelta(days=29)
-
-        weekly_logs = (
-            MoodLog.objects.filter(user=user, recorded_at__date__gte=seven_days_ago.date())
-            .annotate(day=TruncDate("recorded_at"))
-            .values("day")
-            .annotate(average=Avg("value"), count=Count("id"))
-            .order_by("day")
-        )
-        monthly_logs = (
-            MoodLog.objects.filter(user=user, recorded_at__date__gte=thirty_days_ago.date())
-            .annotate(day=TruncDate("recorded_at"))
-            .values("day")
-            .annotate(average=Avg("value"), count=Count("id"))
-            .order_by("day")
-        )
 
-        weekly_data = [
-            {"date": entry["day"].isoformat(), "average": round(entry["average"], 2), "count": entry["count"]}
-            for entry in weekly_logs
-        ]
-        monthly_data = [
-            {"date": entry["day"].isoformat(), "average": round(entry["average"], 2), "count": entry["count"]}
-            for entry in monthly_logs
-        ]
+        mood = get_mood_windows(user, now)
+        weekly_data = mood["weekly"]
+        monthly_data = mood["monthly"]
 
-        tasks_qs = WellnessTask.objects.filter(user=user)
-        tasks_total = tasks_qs.count()
-        tasks_completed = tasks_qs.filter(is_completed=True).count()
-        tasks_daily = tasks_qs.filter(category=WellnessTask.CATEGORY_DAILY).count()
-        tasks_evening = tasks_qs.filter(category=WellnessTask.CATEGORY_EVENING).count()
+        task_counters = get_task_counters(user)
+        tasks_total = task_counters["total"]
+        tasks_completed = task_counters["completed"]
+        tasks_daily = task_counters["daily"]
+        tasks_evening = task_counters["evening"]
         completion_rate = (tasks_completed / tasks_total) if tasks_total else 0
 
         top_tasks = list(
-            tasks_qs.values("title")
+            WellnessTask.objects.filter(user=user)
+            .values("title")
             .annotate(total=Count("id"))
             .order_by("-total", "title")[:5]
         )
 
-        sessions_qs = UpcomingSession.objects.filter(user=user)
-        total_sessions = sessions_qs.count()
-        upcoming_sessions = sessions_qs.filter(start_time__gte=now).count()
+        session_counters = get_session_counters(user, now)
+        total_sessions = session_counters["total"]
+        upcoming_sessions = session_counters["upcoming"]
         past_sessions = total_sessions - upcoming_sessions
 
         profile, _ = UserProfile.objects.get_or_create(user=user)
@@ -1696,27 +1349,29 @@ class ProfessionalGuidanceListView(APIView):
         category = request.query_params.get("category")
         featured = request.query_params.get("featured")
 
-        queryset = GuidanceResource.objects.all()
-        if resource_type:
-            queryset = queryset.filter(resource_type=resource_type)
-        if category:
-            queryset = queryset.filter(category__iexact=category)
-        if featured:
-            queryset = queryset.filter(is_featured=True)
-
-        serializer = GuidanceResourceSerializer(queryset, many=True)
-        categories = (
-            GuidanceResource.objects.exclude(category="")
-            .order_by("category")
-            .values_list("category", flat=True)
-            .distinct()
-        )
-        return Response(
-            {
+        def build():
+            queryset = GuidanceResource.objects.all()
+            if resource_type:
+                queryset = queryset.filter(resource_type=resource_type)
+            if category:
+                queryset = queryset.filter(category__iexact=category)
+            if featured:
+                queryset = queryset.filter(is_featured=True)
+
+            serializer = GuidanceResourceSerializer(queryset, many=True)
+            categories = (
+                GuidanceResource.objects.exclude(category="")
+                .order_by("category")
+                .values_list("category", flat=True)
+                .distinct()
+            )
+            return {
                 "resources": serializer.data,
                 "categories": list(categories),
             }
-        )
+
+        params = {"type": resource_type, "category": (category or "").lower(), "featured": featured}
+        return catalog_response(request, CATALOG_GUIDANCE, params, build)
 
 
 class MusicTrackListView(APIView):
@@ -1724,23 +1379,26 @@ class MusicTrackListView(APIView):
 
     def get(self, request):
         mood = request.query_params.get("mood")
-        queryset = MusicTrack.objects.all()
-        if mood:
-            queryset = queryset.filter(mood=mood)
-
-        serializer = MusicTrackSerializer(queryset, many=True)
-        moods = (
-            MusicTrack.objects.order_by("mood")
-            .values_list("mood", flat=True)
-            .distinct()
-        )
-        return Response(
-            {
-                "tracks": serializer.data,
+
+        def build():
+            queryset = MusicTrack.objects.all()
+            if mood:
+                queryset = queryset.filter(mood=mood)
+
+            serializer = MusicTrackSerializer(queryset, many=True)
+            moods = (
+                MusicTrack.objects.order_by("mood")
+                .values_list("mood", flat=True)
+                .distinct()
+            )
+            tracks = serializer.data
+            return {
+                "tracks": tracks,
                 "moods": list(moods),
-                "count": queryset.count(),
+                "count": len(tracks),
             }
-        )
+
+        return catalog_response(request, CATALOG_MUSIC, {"mood": mood}, build)
 
 
 class MindCareBoosterListView(APIView):
@@ -1748,28 +1406,30 @@ class MindCareBoosterListView(APIView):
 
     def get(self, request):
         category = request.query_params.get("category")
-        queryset = MindCareBooster.objects.all()
-        if category:
-            queryset = queryset.filter(category=category)
-
-        serializer = MindCareBoosterSerializer(queryset, many=True)
-        grouped: dict[str, list[dict]] = defaultdict(list)
-        for item in serializer.data:
-            grouped[item["category"]].append(item)
-
-        categories = (
-            MindCareBooster.objects.order_by("category")
-            .values_list("category", flat=True)
-            .distinct()
-        )
-        grouped_dict = {key: value for key, value in grouped.items()}
-        return Response(
-            {
+
+        def build():
+            queryset = MindCareBooster.objects.all()
+            if category:
+                queryset = queryset.filter(category=category)
+
+            serializer = MindCareBoosterSerializer(queryset, many=True)
+            grouped: dict[str, list[dict]] = defaultdict(list)
+            for item in serializer.data:
+                grouped[item["category"]].append(item)
+
+            categories = (
+                MindCareBooster.objects.order_by("category")
+                .values_list("category", flat=True)
+                .distinct()
+            )
+            grouped_dict = {key: value for key, value in grouped.items()}
+            return {
                 "boosters": serializer.data,
                 "categories": list(categories),
                 "grouped": grouped_dict,
             }
-        )
+
+        return catalog_response(request, CATALOG_BOOSTERS, {"category": category}, build)
 
 
 class MeditationSessionListView(APIView):
@@ -1780,36 +1440,38 @@ class MeditationSessionListView(APIView):
         difficulty = request.query_params.get("difficulty")
         featured = request.query_params.get("featured")
 
-        queryset = MeditationSession.objects.all()
-        if category:
-            queryset = queryset.filter(category__iexact=category)
-        if difficulty:
-            queryset = queryset.filter(difficulty=difficulty)
-        if featured:
-            queryset = queryset.filter(is_featured=True)
-
-        serializer = MeditationSessionSerializer(queryset, many=True)
-        grouped: dict[str, list[dict]] = defaultdict(list)
-        featured_items = []
-        for item in serializer.data:
-            grouped[item["category"]].append(item)
-            if item["is_featured"]:
-                featured_items.append(item)
-
-        categories = (
-            MeditationSession.objects.order_by("category")
-            .values_list("category", flat=True)
-            .distinct()
-        )
-        grouped_dict = {key: value for key, value in grouped.items()}
-        return Response(
-            {
+        def build():
+            queryset = MeditationSession.objects.all()
+            if category:
+                queryset = queryset.filter(category__iexact=category)
+            if difficulty:
+                queryset = queryset.filter(difficulty=difficulty)
+            if featured:
+                queryset = queryset.filter(is_featured=True)
+
+            serializer = MeditationSessionSerializer(queryset, many=True)
+            grouped: dict[str, list[dict]] = defaultdict(list)
+            featured_items = []
+            for item in serializer.data:
+                grouped[item["category"]].append(item)
+                if item["is_featured"]:
+                    featured_items.append(item)
+
+            categories = (
+                MeditationSession.objects.order_by("category")
+                .values_list("category", flat=True)
+                .distinct()
+            )
+            grouped_dict = {key: value for key, value in grouped.items()}
+            return {
                 "sessions": serializer.data,
                 "categories": list(categories),
                 "grouped": grouped_dict,
                 "featured": featured_items,
             }
-        )
+
+        params = {"category": (category or "").lower(), "difficulty": difficulty, "featured": featured}
+        return catalog_response(request, CATALOG_MEDITATIONS, params, build)
 
 
 class CounsellorProfileView(generics.RetrieveUpdateAPIView):
@@ -1817,25 +1479,30 @@ class CounsellorProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        if not hasattr(self.request.user, 'counsellorprofile'):
+        if not is_counsellor(self.request.user):
             raise generics.NotFound("Counsellor profile not found")
-        return self.request.user.counsellorprofile
+        return get_object_or_404(CounsellorProfile.objects.select_related('user'), user_id=self.request.user.id)
 
 
 class CounsellorAppointmentsView(generics.ListAPIView):
+    """
+    The counselor's sessions in start-time order, a page at a time.
+
+    The body stays a plain list.  Pass ``limit`` (default 100, max 500) and
+    the ``X-Next-Cursor`` header of the previous response as ``cursor`` to
+    get the next page; the header is absent on the last page.
+    """
     serializer_class = CounsellorAppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        if not hasattr(self.request.user, 'counsellorprofile'):
+        if not is_counsellor(self.request.user):
             return UpcomingSession.objects.none()
         
-        # Get all sessions where counsellor_name matches this counselor
-        counsellor_name = self.request.user.counsellorprofile.user.get_full_name() or self.request.user.username
-        
+        # Sessions assigned to this counselor, via the (counsellor, start_time) index
         queryset = UpcomingSession.objects.filter(
-            counsellor_name__icontains=counsellor_name
-        ).order_by('start_time')
+            counsellor_id=self.request.user.id
+        ).select_related('user__profile').order_by('start_time', 'id')
         
         # Filter by status if provided
         status = self.request.query_params.get('status', None)
@@ -1851,49 +1518,64 @@ class CounsellorAppointmentsView(generics.ListAPIView):
         
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get('limit', APPOINTMENTS_PAGE_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= APPOINTMENTS_MAX_PAGE_SIZE:
+            return Response(
+                {"error": f"'limit' must be between 1 and {APPOINTMENTS_MAX_PAGE_SIZE}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            sessions, next_cursor = counsellor_sessions_page(
+                self.get_queryset(), request.query_params.get('cursor'), limit
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response(self.get_serializer(sessions, many=True).data)
+        if next_cursor:
+            response['X-Next-Cursor'] = next_cursor
+        return response
+
 
 class CounsellorStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        if not hasattr(request.user, 'counsellorprofile'):
+        if not is_counsellor(request.user):
             return Response(
                 {"error": "Counsellor profile not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        counsellor_name = request.user.counsellorprofile.user.get_full_name() or request.user.username
         now = timezone.now()
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        # Get all sessions for this counselor
-        all_sessions = UpcomingSession.objects.filter(
-            counsellor_name__icontains=counsellor_name
+        # All session counts for this counselor in one pass over the
+        # (counsellor, start_time) index
+        counts = UpcomingSession.objects.filter(counsellor_id=request.user.id).aggregate(
+            total_sessions=Count('id'),
+            today_sessions=Count('id', filter=Q(
+                start_time__gte=today_start, start_time__lt=today_start + timedelta(days=1)
+            )),
+            upcoming_sessions=Count('id', filter=Q(start_time__gt=now)),
+            completed_sessions=Count('id', filter=Q(start_time__lt=now)),
+            monthly_sessions=Count('id', filter=Q(start_time__gte=month_start, start_time__lt=now)),
+            total_clients=Count('user', distinct=True),
         )
         
-        total_sessions = all_sessions.count()
-        today_sessions = all_sessions.filter(
-            start_time__gte=today_start,
-            start_time__lt=today_start + timedelta(days=1)
-        ).count()
-        upcoming_sessions = all_sessions.filter(start_time__gt=now).count()
-        completed_sessions = all_sessions.filter(start_time__lt=now).count()
-        
-        # Get unique clients
-        total_clients = all_sessions.values('user').distinct().count()
-        
         # Get counselor profile for rating
-        profile = request.user.counsellorprofile
-        average_rating = float(profile.rating)
+        rating = CounsellorProfile.objects.filter(user_id=request.user.id).values_list('rating', flat=True).first()
+        average_rating = float(rating or 0)
         
         # Calculate earnings (simplified - 100 per session)
         session_rate = 100
-        monthly_earnings = all_sessions.filter(
-            start_time__gte=month_start,
-            start_time__lt=now
-        ).count() * session_rate
-        total_earnings = completed_sessions * session_rate
+        monthly_earnings = counts['monthly_sessions'] * session_rate
+        total_earnings = counts['completed_sessions'] * session_rate
         
         # Get queued chats count
         queued_chats = Chat.objects.filter(
@@ -1902,15 +1584,16 @@ class CounsellorStatsView(APIView):
         ).count()
         
         stats = {
-            "total_sessions": total_sessions,
-            "today_sessions": today_sessions,
-            "upcoming_sessions": upcoming_sessions,
-            "completed_sessions": completed_sessions,
+            "total_sessions": counts['total_sessions'],
+            "today_sessions": counts['today_sessions'],
+            "upcoming_sessions": counts['upcoming_sessions'],
+            "completed_sessions": counts['completed_sessions'],
             "average_rating": average_rating,
-            "total_clients": total_clients,
+            "total_clients": counts['total_clients'],
             "monthly_earnings": monthly_earnings,
             "total_earnings": total_earnings,
             "queued_chats": queued_chats,
+            "online_counselors": len(presence.online_counsellors()),
         }
         
         serializer = CounsellorStatsSerializer(stats)
@@ -1945,8 +1628,9 @@ class ChatCreateView(APIView):
         )
 
         logger.info(
-            f"Chat {chat.id} created by user {request.user.username} "
-            f"(wallet balance: {current_balance} minutes)"
+            "Chat %s created by user %s "
+            "(wallet balance: %s minutes)",
+            chat.id, request.user.username, current_balance
         )
 
         return Response(
@@ -1955,17 +1639,20 @@ class ChatCreateView(APIView):
         )
 
 
-class ChatListView(generics.ListAPIView):
+class ChatListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = ChatSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Everything ChatSerializer reads, so listing a page is a single query
+    inbox_related = ('user__profile', 'counsellor__counsellorprofile', 'last_sender')
 
     def get_queryset(self):
         # Check if user is a counselor
-        is_counselor = hasattr(self.request.user, 'counsellorprofile')
+        is_counselor = is_counsellor(self.request.user)
         
         logger.debug(
-            f"ChatListView: User {self.request.user.username} (ID: {self.request.user.id}) requesting chats. "
-            f"Is counselor: {is_counselor}"
+            "ChatListView: User %s (ID: %s) requesting chats. "
+            "Is counselor: %s",
+            self.request.user.username, self.request.user.id, is_counselor
         )
         
         if is_counselor:
@@ -1973,58 +1660,113 @@ class ChatListView(generics.ListAPIView):
             # Include ALL statuses (active, completed, etc.) - counselors should see their chat history
             counselor_id = self.request.user.id
             
-            # Query: Get all chats where this counselor is assigned
+            # Query: Get all chats where this counselor is assigned. The last
+            # message and message count come from the chat's summary columns.
             queryset = Chat.objects.filter(
                 counsellor_id=counselor_id  # Use counsellor_id for direct database query
-            ).select_related('user', 'counsellor').prefetch_related('messages').order_by("-created_at", "-updated_at")
+            ).select_related(*self.inbox_related).order_by("-created_at", "-updated_at")
+            queryset = with_unread_counts(queryset, self.request.user)
+        else:
+            # For regular users: return only their own chats
+            queryset = Chat.objects.filter(user_id=self.request.user.id).select_related(*self.inbox_related).order_by("-created_at", "-updated_at")
+            queryset = with_unread_counts(queryset, self.request.user)
+
+        if debug_diagnostics(logger):
+            self._log_diagnostics(queryset, is_counselor)
+        return queryset
+
+    def _log_diagnostics(self, queryset, is_counselor):
+        """Debug-only context; every query here is extra to the response."""
+        count = queryset.count()
+        logger.debug(
+            "ChatListView: %s %s "
+            "(ID: %s) requesting chats. Found %s chats",
+            'Counselor' if is_counselor else 'User', self.request.user.username, self.request.user.id, count
+        )
+        if not is_counselor:
+            return
+
+        # Log details of each chat for debugging
+        if count > 0:
+            logger.debug("ChatListView: Showing %s chats to counselor:", min(count, 10))
+            for chat in queryset[:10]:
+                logger.debug(
+                    "  - Chat ID: %s, User: %s (ID: %s), "
+                    "Status: %s, Counsellor ID: %s, "
+                    "Messages: %s, Created: %s",
+                    chat.id, chat.user.username, chat.user.id, chat.status, chat.counsellor_id,
+                    chat.message_count, chat.created_at
+                )
+        else:
+            # Check if there are any chats in database and what counselor IDs exist
+            all_chats = Chat.objects.select_related('user', 'counsellor').all()[:10]
+            total_chats = Chat.objects.count()
+            chats_with_counselor = Chat.objects.exclude(counsellor__isnull=True).count()
             
-            count = queryset.count()
             logger.debug(
-                f"ChatListView: Counselor {self.request.user.username} (ID: {counselor_id}) requesting chats. "
-                f"Query: counsellor_id={counselor_id}, Found {count} chats"
+                "ChatListView: No chats found for counselor ID %s. "
+                "Total chats in DB: %s, Chats with counselor: %s",
+                self.request.user.id, total_chats, chats_with_counselor
             )
             
-            # Log details of each chat for debugging
-            if count > 0:
-                logger.debug(f"ChatListView: Showing {min(count, 10)} chats to counselor:")
-                for chat in queryset[:10]:
-                    msg_count = chat.messages.count() if hasattr(chat, 'messages') else ChatMessage.objects.filter(chat=chat).count()
-                    logger.debug(
-                        f"  - Chat ID: {chat.id}, User: {chat.user.username} (ID: {chat.user.id}), "
-                        f"Status: {chat.status}, Counsellor ID: {chat.counsellor_id}, "
-                        f"Messages: {msg_count}, Created: {chat.created_at}"
-                    )
-            else:
-                # Check if there are any chats in database and what counselor IDs exist
-                all_chats = Chat.objects.select_related('counsellor').all()[:10]
-                total_chats = Chat.objects.count()
-                chats_with_counselor = Chat.objects.exclude(counsellor__isnull=True).count()
-                
-                logger.warning(
-                    f"ChatListView: No chats found for counselor ID {counselor_id}. "
-                    f"Total chats in DB: {total_chats}, Chats with counselor: {chats_with_counselor}"
+            # Log all chats to see what's in database
+            for chat in all_chats:
+                logger.debug(
+                    "  - Chat ID: %s, User: %s, Status: %s, "
+                    "Counsellor ID: %s, "
+                    "Counsellor Username: %s, "
+                    "Created: %s",
+                    chat.id, chat.user.username, chat.status, chat.counsellor_id,
+                    chat.counsellor.username if chat.counsellor else None, chat.created_at
                 )
-                
-                # Log all chats to see what's in database
-                for chat in all_chats:
-                    logger.debug(
-                        f"  - Chat ID: {chat.id}, User: {chat.user.username}, Status: {chat.status}, "
-                        f"Counsellor ID: {chat.counsellor_id}, "
-                        f"Counsellor Username: {chat.counsellor.username if chat.counsellor else None}, "
-                        f"Created: {chat.created_at}"
-                    )
-            
-            return queryset
-        else:
-            # For regular users: return only their own chats
-            user_id = self.request.user.id
-            queryset = Chat.objects.filter(user_id=user_id).select_related('user', 'counsellor').order_by("-created_at", "-updated_at")
-            count = queryset.count()
-            logger.debug(
-                f"ChatListView: User {self.request.user.username} (ID: {user_id}) requesting chats. "
-                f"Query: user_id={user_id}, Found {count} chats"
+
+
+class ChatUnreadCountsView(ReplicaReadMixin, APIView):
+    """
+    Unread badge counts across all of the requester's chats.
+
+    GET /api/chats/unread/
+    Returns: {"total": 7, "chats": {"12": 4, "15": 3}} (chats with nothing
+    unread are omitted). Served from the maintained message sequence and read
+    watermarks in one query.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        counts = unread_counts(request.user)
+        return Response({
+            "total": sum(counts.values()),
+            "chats": {str(chat_id): unread for chat_id, unread in counts.items()},
+        })
+
+
+class ChatCostView(APIView):
+    """
+    Running-cost state of one chat for a locally ticking cost display.
+
+    Returns ``started_at``, the rate and what has been charged so far in a
+    single query; the client also gets their wallet balance and when it runs
+    out, which the counsellor must not see.  The one-time low-balance warning
+    is sent by the client's chat socket.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, chat_id):
+        chat = with_wallet_balance(
+            Chat.objects.filter(
+                Q(id=chat_id) & (Q(user=request.user) | Q(counsellor=request.user))
+            )
+        ).first()
+        if not chat:
+            return Response(
+                {"error": "Chat not found or access denied"},
+                status=status.HTTP_404_NOT_FOUND
             )
-            return queryset
+
+        return Response(
+            chat_cost_state(chat, include_wallet=request.user.id == chat.user_id),
+            status=status.HTTP_200_OK,
+        )
 
 
 class QueuedChatsView(generics.ListAPIView):
@@ -2032,41 +1774,47 @@ class QueuedChatsView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        if not hasattr(self.request.user, 'counsellorprofile'):
-            logger.warning(f"QueuedChatsView: User {self.request.user.username} (ID: {self.request.user.id}) does not have counsellorprofile")
+        if not is_counsellor(self.request.user):
+            logger.warning("QueuedChatsView: User %s (ID: %s) does not have counsellorprofile", self.request.user.username, self.request.user.id)
             return Chat.objects.none()
         
-        # Get all queued chats without counselor assigned
+        # Get all queued chats without counselor assigned. Queued chats have
+        # no counselor, but ChatSerializer still reads the other relations.
         queryset = Chat.objects.filter(
             status="queued",
             counsellor__isnull=True
-        ).select_related('user').order_by("created_at")
-        
+        ).select_related(*ChatListView.inbox_related).order_by("created_at")
+
+        if debug_diagnostics(logger):
+            self._log_diagnostics(queryset)
+        return queryset
+
+    def _log_diagnostics(self, queryset):
+        """Debug-only context; every query here is extra to the response."""
         count = queryset.count()
-        logger.debug(f"QueuedChatsView: Found {count} queued chats for counselor {self.request.user.username} (ID: {self.request.user.id})")
+        logger.debug("QueuedChatsView: Found %s queued chats for counselor %s (ID: %s)", count, self.request.user.username, self.request.user.id)
         
         # Log details of each queued chat for debugging
         if count > 0:
             for chat in queryset[:5]:  # Log first 5
-                logger.debug(f"  - Chat ID: {chat.id}, User: {chat.user.username}, Status: {chat.status}, Counsellor: {chat.counsellor}, Created: {chat.created_at}")
+                logger.debug("  - Chat ID: %s, User: %s, Status: %s, Counsellor: %s, Created: %s", chat.id, chat.user.username, chat.status, chat.counsellor, chat.created_at)
         else:
-            # Log all chats to see what's in the database (only at DEBUG level to reduce noise)
-            all_chats = Chat.objects.all()[:10]
-            logger.debug(f"QueuedChatsView: No queued chats found. Total chats in DB: {Chat.objects.count()}")
+            # Log all chats to see what's in the database
+            all_chats = Chat.objects.select_related('user').all()[:10]
+            logger.debug("QueuedChatsView: No queued chats found. Total chats in DB: %s", Chat.objects.count())
             for chat in all_chats:
-                logger.debug(f"  - Chat ID: {chat.id}, User: {chat.user.username}, Status: {chat.status}, Counsellor: {chat.counsellor_id}, Created: {chat.created_at}")
-        
-        return queryset
+                logger.debug("  - Chat ID: %s, User: %s, Status: %s, Counsellor: %s, Created: %s", chat.id, chat.user.username, chat.status, chat.counsellor_id, chat.created_at)
 
 
 class ChatAcceptView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def patch(self, request, chat_id):
-        if not hasattr(request.user, 'counsellorprofile'):
+        if not is_counsellor(request.user):
             logger.warning(
-                f"ChatAcceptView: User {request.user.username} (ID: {request.user.id}) "
-                f"does not have counsellorprofile"
+                "ChatAcceptView: User %s (ID: %s) "
+                "does not have counsellorprofile",
+                request.user.username, request.user.id
             )
             return Response(
                 {"error": "Only counsellors can accept chats"},
@@ -2077,8 +1825,9 @@ class ChatAcceptView(APIView):
             chat = Chat.objects.select_related('user', 'counsellor').get(id=chat_id, status="queued")
         except Chat.DoesNotExist:
             logger.warning(
-                f"ChatAcceptView: Chat {chat_id} not found or not queued. "
-                f"User: {request.user.username} (ID: {request.user.id})"
+                "ChatAcceptView: Chat %s not found or not queued. "
+                "User: %s (ID: %s)",
+                chat_id, request.user.username, request.user.id
             )
             return Response(
                 {"error": "Chat not found or not available"},
@@ -2087,8 +1836,9 @@ class ChatAcceptView(APIView):
 
         # Assign counselor to chat and activate it
         logger.info(
-            f"ChatAcceptView: Counselor {request.user.username} (ID: {request.user.id}) "
-            f"accepting chat {chat_id} from user {chat.user.username} (ID: {chat.user.id})"
+            "ChatAcceptView: Counselor %s (ID: %s) "
+            "accepting chat %s from user %s (ID: %s)",
+            request.user.username, request.user.id, chat_id, chat.user.username, chat.user.id
             )
 
         chat.counsellor = request.user
@@ -2099,8 +1849,9 @@ class ChatAcceptView(APIView):
         # Verify the save
         updated_chat = Chat.objects.get(id=chat_id)
         logger.info(
-            f"ChatAcceptView: Chat {chat_id} updated successfully. "
-            f"Counsellor ID: {updated_chat.counsellor_id}, Status: {updated_chat.status}"
+            "ChatAcceptView: Chat %s updated successfully. "
+            "Counsellor ID: %s, Status: %s",
+            chat_id, updated_chat.counsellor_id, updated_chat.status
         )
 
         return Response(ChatSerializer(updated_chat).data)
@@ -2116,20 +1867,23 @@ class ChatMessageListView(generics.ListCreateAPIView):
         request_username = self.request.user.username
         
         logger.debug(
-            f"ChatMessageListView GET: chat_id={chat_id}, "
-            f"request_user={request_username} (id={request_user_id})"
+            "ChatMessageListView GET: chat_id=%s, "
+            "request_user=%s (id=%s)",
+            chat_id, request_username, request_user_id
         )
         
         try:
             # Get chat with all related data
-            chat = Chat.objects.select_related('user', 'counsellor').prefetch_related('messages').get(id=chat_id)
+            chat = Chat.objects.select_related('user', 'counsellor').get(id=chat_id)
             
             # Log chat details
             logger.debug(
-                f"ChatMessageListView: Chat found - ID: {chat_id}, "
-                f"User: {chat.user.username} (ID: {chat.user.id}), "
-                f"Counsellor: {chat.counsellor.username if chat.counsellor else None} (ID: {chat.counsellor_id}), "
-                f"Status: {chat.status}"
+                "ChatMessageListView: Chat found - ID: %s, "
+                "User: %s (ID: %s), "
+                "Counsellor: %s (ID: %s), "
+                "Status: %s",
+                chat_id, chat.user.username, chat.user.id,
+                chat.counsellor.username if chat.counsellor else None, chat.counsellor_id, chat.status
             )
             
             # Check if user has access to this chat
@@ -2137,16 +1891,18 @@ class ChatMessageListView(generics.ListCreateAPIView):
             is_chat_counsellor = chat.counsellor_id is not None and chat.counsellor_id == request_user_id
             
             logger.debug(
-                f"ChatMessageListView: Access check - is_chat_user={is_chat_user}, "
-                f"is_chat_counsellor={is_chat_counsellor}, "
-                f"chat_user_id={chat.user_id}, chat_counsellor_id={chat.counsellor_id}, "
-                f"request_user_id={request_user_id}"
+                "ChatMessageListView: Access check - is_chat_user=%s, "
+                "is_chat_counsellor=%s, "
+                "chat_user_id=%s, chat_counsellor_id=%s, "
+                "request_user_id=%s",
+                is_chat_user, is_chat_counsellor, chat.user_id, chat.counsellor_id, request_user_id
             )
             
             if not is_chat_user and not is_chat_counsellor:
                 logger.warning(
-                    f"ChatMessageListView: Access DENIED for user {request_username} (ID: {request_user_id}) "
-                    f"to chat {chat_id}. User is not the chat user or assigned counselor."
+                    "ChatMessageListView: Access DENIED for user %s (ID: %s) "
+                    "to chat %s. User is not the chat user or assigned counselor.",
+                    request_username, request_user_id, chat_id
                 )
                 return ChatMessage.objects.none()
             
@@ -2163,9 +1919,11 @@ class ChatMessageListView(generics.ListCreateAPIView):
                     if chat.last_user_activity < one_hour_ago:
                         # User was inactive for > 1 hour, auto-disconnect
                         logger.info(
-                            f"ChatMessageListView GET: Auto-disconnecting inactive chat {chat_id}, "
-                            f"last_user_activity={chat.last_user_activity}, "
-                            f"hours_inactive={(now - chat.last_user_activity).total_seconds() / 3600:.2f}"
+                            "ChatMessageListView GET: Auto-disconnecting inactive chat %s, "
+                            "last_user_activity=%s, "
+                            "hours_inactive=%.2f",
+                            chat_id, chat.last_user_activity,
+                            (now - chat.last_user_activity).total_seconds() / 3600
                         )
                         chat.status = 'completed'
                         if not chat.ended_at:
@@ -2174,7 +1932,7 @@ class ChatMessageListView(generics.ListCreateAPIView):
                         if not chat.started_at:
                             chat.started_at = chat.created_at or now
                         chat.save(update_fields=['status', 'ended_at', 'started_at', 'last_user_activity', 'updated_at'])
-                        logger.info(f"Chat {chat_id} auto-disconnected due to 1 hour inactivity")
+                        logger.info("Chat %s auto-disconnected due to 1 hour inactivity", chat_id)
                     else:
                         # User is active, just update last_user_activity
                         chat.save(update_fields=['last_user_activity', 'updated_at'])
@@ -2186,42 +1944,46 @@ class ChatMessageListView(generics.ListCreateAPIView):
                     # Chat is queued or active, just update last_user_activity
                     chat.save(update_fields=['last_user_activity', 'updated_at'])
             
-            # User has access - return ALL messages for this chat from database
-            messages = ChatMessage.objects.filter(
-                chat_id=chat_id  # Use chat_id for direct database query
-            ).select_related('sender', 'chat').order_by("created_at", "id")
+            # User has access - return ALL messages for this chat, including
+            # messages moved to the compressed archive
+            messages = chat_history(chat)
             
-            msg_count = messages.count()
+            msg_count = len(messages)
             
             logger.debug(
-                f"ChatMessageListView: Access GRANTED. Returning {msg_count} messages for chat {chat_id}. "
-                f"User {request_username} has access."
+                "ChatMessageListView: Access GRANTED. Returning %s messages for chat %s. "
+                "User %s has access.",
+                msg_count, chat_id, request_username
             )
             
             # Log first few messages for debugging
-            if msg_count > 0:
-                logger.debug(f"ChatMessageListView: First {min(msg_count, 5)} messages:")
-                for msg in messages[:5]:
+            if debug_diagnostics(logger):
+                if msg_count > 0:
+                    logger.debug("ChatMessageListView: First %s messages:", min(msg_count, 5))
+                    for msg in messages[:5]:
+                        logger.debug(
+                            "  - Message ID: %s, Sender: %s (ID: %s), "
+                            "Text: %s..., Created: %s",
+                            msg.id, msg.sender.username, msg.sender_id, msg.text[:50], msg.created_at
+                        )
+                else:
                     logger.debug(
-                        f"  - Message ID: {msg.id}, Sender: {msg.sender.username} (ID: {msg.sender_id}), "
-                        f"Text: {msg.text[:50]}..., Created: {msg.created_at}"
+                        "ChatMessageListView: No messages found in database for chat %s. "
+                        "Chat exists but has no messages.",
+                        chat_id
                     )
-            else:
-                logger.debug(
-                    f"ChatMessageListView: No messages found in database for chat {chat_id}. "
-                    f"Chat exists but has no messages."
-                )
             
             return messages
         except Chat.DoesNotExist:
             logger.error(
-                f"ChatMessageListView: Chat {chat_id} NOT FOUND in database. "
-                f"User: {request_username} (ID: {request_user_id})"
+                "ChatMessageListView: Chat %s NOT FOUND in database. "
+                "User: %s (ID: %s)",
+                chat_id, request_username, request_user_id
             )
             return ChatMessage.objects.none()
         except Exception as e:
             logger.error(
-                f"ChatMessageListView: ERROR getting messages for chat {chat_id}: {e}", 
+                "ChatMessageListView: ERROR getting messages for chat %s: %s", chat_id, e, 
                 exc_info=True
             )
             return ChatMessage.objects.none()
@@ -2230,7 +1992,7 @@ class ChatMessageListView(generics.ListCreateAPIView):
         try:
             chat = Chat.objects.select_related('user', 'counsellor').get(id=chat_id)
         except Chat.DoesNotExist:
-            logger.error(f"ChatMessageListView POST: Chat {chat_id} not found")
+            logger.error("ChatMessageListView POST: Chat %s not found", chat_id)
             return Response(
                 {"error": "Chat not found"},
                 status=status.HTTP_404_NOT_FOUND
@@ -2238,22 +2000,26 @@ class ChatMessageListView(generics.ListCreateAPIView):
 
         # Log access check
         logger.info(
-            f"ChatMessageListView POST: chat_id={chat_id}, "
-            f"request_user={request.user.username} (id={request.user.id}), "
-            f"chat_user={chat.user.username} (id={chat.user.id}), "
-            f"chat_counsellor={chat.counsellor.username if chat.counsellor else None} "
-            f"(id={chat.counsellor_id if chat.counsellor else None}), "
-            f"chat_status={chat.status}"
+            "ChatMessageListView POST: chat_id=%s, "
+            "request_user=%s (id=%s), "
+            "chat_user=%s (id=%s), "
+            "chat_counsellor=%s "
+            "(id=%s), "
+            "chat_status=%s",
+            chat_id, request.user.username, request.user.id, chat.user.username, chat.user.id,
+            chat.counsellor.username if chat.counsellor else None,
+            chat.counsellor_id if chat.counsellor else None, chat.status
         )
 
         # Check if user has access to this chat
-        is_chat_user = chat.user == request.user
-        is_chat_counsellor = chat.counsellor is not None and chat.counsellor == request.user
+        is_chat_user = chat.user_id == request.user.id
+        is_chat_counsellor = chat.counsellor_id is not None and chat.counsellor_id == request.user.id
         
         if not is_chat_user and not is_chat_counsellor:
             logger.warning(
-                f"ChatMessageListView POST: Access denied for user {request.user.username} (ID: {request.user.id}) "
-                f"to chat {chat_id}"
+                "ChatMessageListView POST: Access denied for user %s (ID: %s) "
+                "to chat %s",
+                request.user.username, request.user.id, chat_id
             )
             return Response(
                 {"error": "You don't have access to this chat"},
@@ -2265,8 +2031,9 @@ class ChatMessageListView(generics.ListCreateAPIView):
         if is_chat_user and chat.status in ['completed', 'cancelled']:
             # User wants to continue the conversation - always allow reopening
             logger.info(
-                f"ChatMessageListView POST: User {request.user.username} reopening chat {chat_id} "
-                f"(old_status={chat.status}, ended_at={chat.ended_at})"
+                "ChatMessageListView POST: User %s reopening chat %s "
+                "(old_status=%s, ended_at=%s)",
+                request.user.username, chat_id, chat.status, chat.ended_at
             )
             chat.reopen()
             # Update last_user_activity
@@ -2279,7 +2046,7 @@ class ChatMessageListView(generics.ListCreateAPIView):
         # Check if chat is active (after potential reopen)
         if chat.status != "active":
             logger.warning(
-                f"ChatMessageListView POST: Chat {chat_id} is not active (status: {chat.status})"
+                "ChatMessageListView POST: Chat %s is not active (status: %s)", chat_id, chat.status
             )
             return Response(
                 {"error": "Chat is not active"},
@@ -2290,25 +2057,19 @@ class ChatMessageListView(generics.ListCreateAPIView):
         serializer.is_valid(raise_exception=True)
 
         text = serializer.validated_data["text"]
-        logger.info(f"API SAVING MESSAGE: chat_id={chat_id}, sender={request.user.username} (id={request.user.id}), text_length={len(text)}")
+        logger.info("API SAVING MESSAGE: chat_id=%s, sender=%s (id=%s), text_length=%s", chat_id, request.user.username, request.user.id, len(text))
         
         try:
-            message = ChatMessage.objects.create(
-                chat=chat,
-                sender=request.user,
-                text=text
-            )
-            
-            # Verify it was saved
-            saved_message = ChatMessage.objects.get(id=message.id)
-            logger.info(f"API MESSAGE SAVED SUCCESSFULLY: message_id={saved_message.id}, chat_id={saved_message.chat_id}, created_at={saved_message.created_at}")
-            
-            # Count total messages for this chat
-            total_messages = ChatMessage.objects.filter(chat=chat).count()
-            logger.info(f"Total messages in chat {chat_id}: {total_messages}")
+            with transaction.atomic():
+                message = create_message(
+                    chat,
+                    sender=request.user,
+                    text=text
+                )
+            logger.info("API MESSAGE SAVED SUCCESSFULLY: message_id=%s, chat_id=%s, created_at=%s", message.id, message.chat_id, message.created_at)
             
         except Exception as e:
-            logger.error(f"ERROR SAVING MESSAGE VIA API: chat_id={chat_id}, error={e}", exc_info=True)
+            logger.error("ERROR SAVING MESSAGE VIA API: chat_id=%s, error=%s", chat_id, e, exc_info=True)
             return Response(
                 {"error": f"Failed to save message: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
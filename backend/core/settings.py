@@ -1,5 +1,6 @@
 from pathlib import Path
 from datetime import timedelta
+import os
 import sys
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -32,6 +33,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.utils.replica.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -55,15 +57,102 @@ TEMPLATES = [
 WSGI_APPLICATION = "core.wsgi.application"
 ASGI_APPLICATION = "core.asgi.application"
 
-DATABASES = {
-    "default": {
+# Database configuration ----------------------------------------------------
+# DB_ENGINE=postgres selects PostgreSQL (production); anything else keeps the
+# SQLite development database. SQLite serializes all writes and ignores
+# select_for_update, so concurrent chat writers queue on one database-wide lock.
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite").lower()
+
+if DB_ENGINE in ("postgres", "postgresql"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "soul_support"),
+            "USER": os.environ.get("DB_USER", "soul_support"),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+            # Reuse connections across requests and verify them before reuse
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", "5")),
+            },
+        }
+    }
+    if os.environ.get("DB_POOL", "false").lower() == "true":
+        # psycopg connection pool (requires psycopg[pool]); replaces
+        # persistent connections, so CONN_MAX_AGE must be 0
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "20")),
+            "timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": {
+                # Take the write lock when a transaction starts instead of on
+                # its first write, so lock upgrades cannot deadlock
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
+    }
+
+# Optional read replica (see api.utils.replica): DB_REPLICA_HOST for
+# PostgreSQL, DB_REPLICA_NAME for a second SQLite file kept up to date with
+# `manage.py sync_sqlite_replica`. Read-only endpoints and reports read from it.
+DB_REPLICA_HOST = os.environ.get("DB_REPLICA_HOST")
+DB_REPLICA_NAME = os.environ.get("DB_REPLICA_NAME")
+if DB_REPLICA_HOST and DATABASES["default"]["ENGINE"].endswith("postgresql"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": DB_REPLICA_HOST,
+        "PORT": os.environ.get("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+    }
+elif DB_REPLICA_NAME and DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+    DATABASES["replica"] = {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": DB_REPLICA_NAME,
     }
+if "replica" in DATABASES:
+    # Tests run against a single database
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+DATABASE_ROUTERS = ["api.utils.replica.ReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they write
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "5"))
+
+# PRAGMAs applied to every new SQLite connection (see api.signals)
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,
+    "mmap_size": 134217728,
+    "cache_size": -20000,
 }
 
 AUTH_PASSWORD_VALIDATORS: list[dict[str, str]] = []
 
+# Login CPU is dominated by one PBKDF2 verification. Opt in to another work
+# factor with PASSWORD_PBKDF2_ITERATIONS (Django's default is 1,000,000);
+# stored hashes are rewritten on each user's next login. Fewer iterations also
+# make leaked hashes cheaper to crack. See api/utils/hashers.py
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", "0")) or None
+if PASSWORD_PBKDF2_ITERATIONS:
+    PASSWORD_HASHERS = [
+        "api.utils.hashers.ConfigurablePBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.Argon2PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+        "django.contrib.auth.hashers.ScryptPasswordHasher",
+    ]
+
 LANGUAGE_CODE = "en-us"
 
 TIME_ZONE = "UTC"
@@ -78,7 +167,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWTAuthentication from the token's role claims; loads the User lazily
+        "api.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
@@ -91,6 +181,8 @@ SIMPLE_JWT = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+# Keyset pagination cursor of the counselor appointments list
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor"]
 
 # Email configuration -------------------------------------------------------
 # In development we dump emails to the console so you can see OTP codes.
@@ -108,7 +200,6 @@ CORS_ALLOW_ALL_ORIGINS = True
 # --- Email Configuration ---
 # For development: Use console backend to see OTPs in terminal
 # For production: Use SMTP backend with proper credentials
-import os
 USE_CONSOLE_EMAIL = os.environ.get('USE_CONSOLE_EMAIL', 'false').lower() == 'true'
 
 if USE_CONSOLE_EMAIL:
@@ -141,14 +232,61 @@ EMAIL_PAGE_DOMAIN = 'http://localhost:8000'
 
 # Channels (WebSocket) configuration
 # Using in-memory channel layer for development (no Redis required)
-# For production, switch to Redis: "channels_redis.core.RedisChannelLayer"
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
-    },
-}
+# The in-memory layer only reaches sockets of the sending process: pushes from
+# management commands (process_chat_billing ending chats whose wallet ran out,
+# and their session end events) are lost. Set CHANNEL_REDIS_URL (e.g.
+# redis://localhost:6379/0) to share the layer between Daphne and the commands
+CHANNEL_REDIS_URL = os.environ.get("CHANNEL_REDIS_URL")
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [CHANNEL_REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
+
+# Cache configuration
+# Using in-memory cache for development (per process): content catalogs then
+# expire after a minute, since invalidation cannot reach other workers
+# With several workers, set CACHE_REDIS_URL (e.g. redis://localhost:6379/1) to
+# share the cache so catalog invalidation is seen by all workers
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "soul-support",
+        },
+    }
 
 # Logging configuration - ALL logs to terminal/console ONLY (no files)
+# LOG_ASYNC=true (default) hands records to a background writer thread so a
+# slow stdout never blocks the event loop; LOG_FORMAT=json emits one JSON
+# object per line. See api/utils/logging_pipeline.py
+LOG_ASYNC = os.environ.get("LOG_ASYNC", "true").lower() == "true"
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+# Fraction of INFO records kept per "logger" or "logger:message prefix";
+# warnings and errors are never sampled
+LOG_SAMPLING = {
+    "api.consumers:WS RECEIVE": 0.01,
+    "api.consumers:WS DELIVER": 0.01,
+    "api.consumers:WS BROADCAST": 0.01,
+    "api.consumers:WS ACK": 0.01,
+}
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,  # Keep existing loggers but redirect to console
@@ -161,11 +299,22 @@ LOGGING = {
             "format": "{levelname} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "api.utils.logging_pipeline.JSONFormatter",
+        },
+    },
+    "filters": {
+        "sampling": {
+            "()": "api.utils.logging_pipeline.SamplingFilter",
+            "rates": LOG_SAMPLING,
+        },
     },
     "handlers": {
         "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
+            "()": "api.utils.logging_pipeline.console_handler",
+            "async_output": LOG_ASYNC,
+            "formatter": "json" if LOG_FORMAT == "json" else "verbose",
+            "filters": ["sampling"],
             "stream": "ext://sys.stdout",  # Output to stdout (terminal)
         },
         # NO FILE HANDLERS - all logs go to terminal only
@@ -240,6 +389,4 @@ LOGGING = {
             "propagate": False,
         },
     },
-    # Explicitly disable any file handlers that might be added
-    "filters": {},
 }
\ No newline at end of file